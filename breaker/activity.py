@@ -0,0 +1,173 @@
+"""
+Team activity stream for the Circuit Breakers Team Hub.
+
+Pages record what people do (tasks created, started and completed, build log
+entries, posts and replies, uploads, events and sponsors added) as they save
+it. Entries are appended, one JSON object per line, to a file per month under
+ACTIVITY_DIR, e.g. "activity/2024-09.jsonl", and are never rewritten.
+
+recent() reads the newest entries from the end of the newest file backwards,
+block by block, so the dashboard feed costs the same however long the
+history grows. Each entry carries the time it actually happened.
+
+The stream is seeded from the existing records (log dates, message
+timestamps, task creation and completion times), so an existing
+installation does not start with an empty feed. config.bootstrap() seeds it
+before a page can save anything; if the first record() comes first, the
+seed already covers the change being recorded and its entry is skipped.
+"""
+
+import json
+import os
+import threading
+from datetime import datetime
+
+import storage
+
+# Activity files live with the data, so backups include them
+ACTIVITY_DIR = os.path.join(storage.DATA_DIR, "activity")
+
+BLOCK_SIZE = 64 * 1024
+
+_lock = threading.Lock()
+
+
+def _month_path(timestamp):
+    return os.path.join(ACTIVITY_DIR, f"{timestamp.strftime('%Y-%m')}.jsonl")
+
+
+def _entry(kind, description, user, timestamp):
+    return {
+        "type": kind,
+        "description": description,
+        "user": user,
+        "timestamp": timestamp.isoformat(),
+    }
+
+
+def _append(path, lines):
+    data = "".join(lines).encode()
+    fd = os.open(path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        # A torn last line (interrupted append) must not swallow this entry
+        size = os.fstat(fd).st_size
+        if size and os.pread(fd, 1, size - 1) != b"\n":
+            data = b"\n" + data
+        os.write(fd, data)
+    finally:
+        os.close(fd)
+
+
+def _seed_entries():
+    """Activity entries reconstructed from the records already stored."""
+    entries = []
+    for log in storage.load_collection("logs"):
+        if log.get("date_dt"):
+            entries.append((log["date_dt"], _entry("Log Entry", f"Added build log: {log.get('title')}", log.get("author"), log["date_dt"])))
+    for task in storage.load_collection("tasks"):
+        if task.get("created_at_dt"):
+            entries.append((task["created_at_dt"], _entry("Task", f"Created task: {task.get('title')}", task.get("created_by"), task["created_at_dt"])))
+        if task.get("status") == "Completed" and task.get("completed_at_dt"):
+            entries.append((task["completed_at_dt"], _entry("Task", f"Completed task: {task.get('title')}", task.get("assigned_to"), task["completed_at_dt"])))
+    for message in storage.load_collection("messages"):
+        if message.get("timestamp_dt"):
+            entries.append((message["timestamp_dt"], _entry("Message", f"Posted: {message.get('title', 'Response')}", message.get("author"), message["timestamp_dt"])))
+    entries.sort(key=lambda pair: pair[0])
+    return entries
+
+
+def _ensure_stream():
+    """Create the activity directory, seeding it from existing records the first time.
+
+    Returns the seeded entries, or None if the stream already existed.
+    """
+    if os.path.isdir(ACTIVITY_DIR):
+        return None
+    entries = _seed_entries()
+    by_month = {}
+    for timestamp, entry in entries:
+        by_month.setdefault(_month_path(timestamp), []).append(json.dumps(entry) + "\n")
+    os.makedirs(ACTIVITY_DIR, exist_ok=True)
+    for path, lines in by_month.items():
+        _append(path, lines)
+    return [entry for _, entry in entries]
+
+
+def ensure_stream():
+    """Seed the stream from the stored records if it does not exist yet."""
+    try:
+        with _lock:
+            _ensure_stream()
+    except Exception as e:
+        print(f"Error seeding activity stream: {str(e)}")
+
+
+def record(kind, description, user, timestamp=None):
+    """Append an activity entry (timestamp defaults to now).
+
+    Inside a storage batch the entry is appended when the batch commits,
+    and dropped if it is discarded. Failures are reported but not raised:
+    the change being recorded has already been saved.
+    """
+    timestamp = timestamp or datetime.now()
+    pending = storage.active_batch()
+    if pending is not None:
+        pending.after_commit(lambda: _write(kind, description, user, timestamp))
+    else:
+        _write(kind, description, user, timestamp)
+
+
+def _same_change(entry, other):
+    return all(entry[field] == other[field] for field in ("type", "description", "user"))
+
+
+def _write(kind, description, user, timestamp):
+    try:
+        entry = _entry(kind, description, user, timestamp)
+        with _lock:
+            seeded = _ensure_stream()
+            # The seed was read after the change was saved, so it may have it
+            if seeded and any(_same_change(entry, other) for other in seeded):
+                return
+            _append(_month_path(timestamp), [json.dumps(entry) + "\n"])
+    except Exception as e:
+        print(f"Error recording activity: {str(e)}")
+
+
+def _lines_backwards(path):
+    """Yield the lines of a file from last to first, reading it in blocks from the end."""
+    with open(path, "rb") as f:
+        position = f.seek(0, os.SEEK_END)
+        rest = b""
+        while position > 0:
+            step = min(BLOCK_SIZE, position)
+            position -= step
+            f.seek(position)
+            lines = (f.read(step) + rest).split(b"\n")
+            # The first piece may be the end of a line that starts in an earlier block
+            rest = lines.pop(0)
+            for line in reversed(lines):
+                if line.strip():
+                    yield line
+        if rest.strip():
+            yield rest
+
+
+def recent(limit=10):
+    """Return the newest activity entries, newest first, with "timestamp_dt"/"timestamp_ts"."""
+    with _lock:
+        _ensure_stream()
+
+    months = sorted((name for name in os.listdir(ACTIVITY_DIR) if name.endswith(".jsonl")), reverse=True)
+    entries = []
+    for name in months:
+        for line in _lines_backwards(os.path.join(ACTIVITY_DIR, name)):
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # Torn line of an interrupted append
+                continue
+            entries.append({**entry, **storage._parse_times(entry)})
+            if len(entries) >= limit:
+                return entries
+    return entries
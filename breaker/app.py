@@ -1,5 +1,4 @@
 import streamlit as st
-import pandas as pd
 import os
 import sys
 
@@ -11,30 +10,11 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Ensure assets directory exists
-os.makedirs("assets", exist_ok=True)
-
-# Check if logo file exists, if not create a default one
-if not os.path.exists("assets/logo.svg"):
-    # Create a default logo SVG file
-    default_logo = """<svg width="200" height="200" xmlns="http://www.w3.org/2000/svg">
-        <circle cx="100" cy="100" r="90" fill="#f1f1f1" stroke="#0084D8" stroke-width="5"/>
-        <text x="100" y="90" font-family="Arial" font-size="18" fill="#0084D8" text-anchor="middle">CIRCUIT</text>
-        <text x="100" y="115" font-family="Arial" font-size="18" fill="#0084D8" text-anchor="middle">BREAKERS</text>
-        <path d="M80,130 L95,150 L110,130 L125,150" stroke="#C0C0C0" stroke-width="4" fill="none"/>
-        <path d="M60,120 L140,120" stroke="#0084D8" stroke-width="3" fill="none"/>
-        <path d="M70,60 L130,60" stroke="#0084D8" stroke-width="3" fill="none"/>
-        <path d="M90,60 L90,120" stroke="#0084D8" stroke-width="3" fill="none"/>
-        <path d="M110,60 L110,120" stroke="#0084D8" stroke-width="3" fill="none"/>
-    </svg>"""
-    
-    with open("assets/logo.svg", "w") as f:
-        f.write(default_logo)
-
-# Import auth (after creating assets)
 import auth
-from database import create_tables, migrate_data_from_json
-import config  # Import the new configuration file
+import config
+
+# One-time setup of environment, data files and migrations for this process
+config.bootstrap()
 
 # Utility function to load SVG
 def load_svg(svg_path):
@@ -63,11 +43,6 @@ def load_svg(svg_path):
             <text x="75" y="30" font-family="Arial" font-size="16" fill="white" text-anchor="middle">Circuit Breakers</text>
         </svg>"""
 
-# Initialize required data structures and directories
-config.configure_environment()
-create_tables()
-migrate_data_from_json()
-
 # Initialize session state for data persistence
 if 'authenticated' not in st.session_state:
     st.session_state.authenticated = False
@@ -76,6 +51,9 @@ if 'user' not in st.session_state:
 if 'role' not in st.session_state:
     st.session_state.role = None
 
+# Restore the login from the session token after a refresh or reconnect
+auth.restore_session()
+
 # Authentication
 if not st.session_state.authenticated:
     auth.show_login_page()
@@ -95,9 +73,7 @@ else:
         st.write(f"Role: {st.session_state.role}")
         
         if st.button("Logout"):
-            st.session_state.authenticated = False
-            st.session_state.user = None
-            st.session_state.role = None
+            auth.end_session()
             st.rerun()
     
     # App Home Page
@@ -159,6 +135,7 @@ else:
         ]
     }
     
+    import pandas as pd
     activity_df = pd.DataFrame(activity_data)
     st.dataframe(activity_df, use_container_width=True)
     
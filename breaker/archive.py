@@ -0,0 +1,196 @@
+"""
+Cold storage for aged records of the Circuit Breakers Team Hub.
+
+Records that are no longer live (tasks completed more than
+TASK_ARCHIVE_DAYS ago, messages past the retention period and sponsors
+whose sponsorship ended) are moved out of the collections loaded on every
+rerun into gzip-compressed JSON Lines files under ARCHIVE_DIR, one per
+collection and month, e.g. "archive/tasks/2024-09.jsonl.gz". Archived
+records stay available on demand: load_archive() only opens the months it
+is asked for, and restore_records() moves records back into the live data.
+"""
+
+import gzip
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+
+import storage
+
+# Archive files live with the data, so backups include them
+ARCHIVE_DIR = os.path.join(storage.DATA_DIR, "archive")
+
+TASK_ARCHIVE_DAYS = 90
+DEFAULT_MESSAGE_RETENTION_DAYS = 180
+
+# Collection -> time fields deciding a record's month, first present one wins
+ARCHIVE_DATE_FIELDS = {
+    "tasks": ["completed_at", "due_date", "created_at"],
+    "messages": ["timestamp"],
+    "sponsors": ["end_date", "start_date"],
+}
+
+# Partition for records without any usable date; sorts after every month
+UNDATED = "undated"
+
+_lock = threading.Lock()
+
+# partition path -> (file stamp, records); partitions are read on demand only
+_cache = {}
+
+
+def _record_date(collection, record):
+    for field in ARCHIVE_DATE_FIELDS[collection]:
+        value = record.get(f"{field}_dt") or storage.parse_timestamp(record.get(field))
+        if value is not None:
+            return value
+    return None
+
+
+def _month(value):
+    return value.strftime("%Y-%m") if value is not None else UNDATED
+
+
+def partition_path(collection, month):
+    return os.path.join(ARCHIVE_DIR, collection, f"{month}.jsonl.gz")
+
+
+def partitions(collection):
+    """Return the months ("YYYY-MM", or "undated") archived for a collection, oldest first."""
+    directory = os.path.join(ARCHIVE_DIR, collection)
+    if not os.path.isdir(directory):
+        return []
+    return sorted(filename[:-len(".jsonl.gz")] for filename in os.listdir(directory) if filename.endswith(".jsonl.gz"))
+
+
+def _read_partition(path):
+    stamp = storage._file_stamp(path)
+    cached = _cache.get(path)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+
+    records = {}
+    with gzip.open(path, "rt") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                # A record archived twice (e.g. after an interrupted run) keeps its latest copy
+                records[record.get("id")] = record
+    records = list(records.values())
+    _cache[path] = (stamp, records)
+    return records
+
+
+def _write_partition(path, records):
+    tmp_path = f"{path}.tmp"
+    with gzip.open(tmp_path, "wt") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+    os.replace(tmp_path, path)
+
+
+def load_archive(collection, start=None, end=None):
+    """Return archived records whose month lies between start and end (inclusive).
+
+    start and end are datetimes or "YYYY-MM" strings; either may be None for
+    an open range. Undated records count as newer than every month. Records
+    carry the same parsed "_dt"/"_ts" keys as live ones.
+    """
+    start = start.strftime("%Y-%m") if isinstance(start, datetime) else start
+    end = end.strftime("%Y-%m") if isinstance(end, datetime) else end
+
+    records = []
+    for month in partitions(collection):
+        if (start and month < start) or (end and month > end):
+            continue
+        records.extend(_read_partition(partition_path(collection, month)))
+    return [{**record, **storage._parse_times(record)} for record in records]
+
+
+def archive_records(collection, records):
+    """Move records out of a live collection into its monthly archive files; returns how many moved.
+
+    Records are appended to the archive before they are deleted from the live
+    collection, so an interruption can only leave a duplicate, never lose one.
+    """
+    if not records:
+        return 0
+
+    by_month = {}
+    for record in records:
+        by_month.setdefault(_month(_record_date(collection, record)), []).append(storage._strip_times(record))
+
+    with _lock:
+        os.makedirs(os.path.join(ARCHIVE_DIR, collection), exist_ok=True)
+        for month, month_records in by_month.items():
+            # Appending adds a gzip member; readers see one continuous stream
+            with gzip.open(partition_path(collection, month), "at") as f:
+                for record in month_records:
+                    f.write(json.dumps(record) + "\n")
+
+    return storage.delete_records(collection, [record["id"] for record in records])
+
+
+def restore_records(collection, ids):
+    """Move archived records back into the live collection; returns how many were restored."""
+    ids = set(ids)
+    with _lock:
+        live_ids = {item.get("id") for item in storage.load_collection_shared(collection)}
+        restored = []
+        changed = []
+        for month in partitions(collection):
+            path = partition_path(collection, month)
+            records = _read_partition(path)
+            if not any(record.get("id") in ids for record in records):
+                continue
+            restored.extend(r for r in records if r.get("id") in ids and r.get("id") not in live_ids)
+            changed.append((path, [r for r in records if r.get("id") not in ids]))
+
+        storage.insert_records(collection, restored)
+        for path, remaining in changed:
+            if remaining:
+                _write_partition(path, remaining)
+            else:
+                os.remove(path)
+    return len(restored)
+
+
+def archive_completed_tasks(days=TASK_ARCHIVE_DAYS, now=None):
+    """Archive tasks completed more than days ago; returns how many moved."""
+    cutoff = (now or datetime.now()) - timedelta(days=days)
+    tasks = [
+        task for task in storage.load_collection("tasks")
+        if task.get("status") == "Completed"
+        and (_record_date("tasks", task) or cutoff) < cutoff
+    ]
+    return archive_records("tasks", tasks)
+
+
+def archive_old_messages(days=DEFAULT_MESSAGE_RETENTION_DAYS, now=None):
+    """Archive message threads without activity for more than days; returns how many messages moved.
+
+    A thread (a post and its replies) is archived as a whole, so no reply is
+    left behind without its post.
+    """
+    cutoff = (now or datetime.now()) - timedelta(days=days)
+    messages = storage.load_collection("messages")
+
+    latest = {}
+    for message in messages:
+        thread = message.get("parent_id") or message["id"]
+        posted = message.get("timestamp_dt") or cutoff
+        latest[thread] = max(latest.get(thread, posted), posted)
+
+    old = [message for message in messages if latest[message.get("parent_id") or message["id"]] < cutoff]
+    return archive_records("messages", old)
+
+
+def archive_expired_sponsors(now=None):
+    """Archive sponsors whose end date has passed; returns how many moved."""
+    now = now or datetime.now()
+    sponsors = [
+        sponsor for sponsor in storage.load_collection("sponsors")
+        if sponsor.get("end_date_dt") is not None and sponsor["end_date_dt"] < now
+    ]
+    return archive_records("sponsors", sponsors)
@@ -1,45 +1,35 @@
 import streamlit as st
-import pandas as pd
-import hashlib
+import streamlit.components.v1 as components
 import json
 import os
 from datetime import datetime
+import directory
+import passwords
+import sessions
 
-# Create directory for data storage if it doesn't exist
-os.makedirs("data", exist_ok=True)
+# Browser cookie holding the session token, so a refresh keeps the login
+SESSION_COOKIE = "breaker_session"
 
-# Define user data file path
-USER_DATA_FILE = "breaker/data/users.json"
+# Query parameter earlier versions kept the token in; removed when seen
+LEGACY_SESSION_PARAM = "session"
 
-# Hash password function
+# Hash a password for storing (salted scrypt, see passwords.py)
 def hash_password(password):
-    return hashlib.sha256(password.encode()).hexdigest()
+    return passwords.hash_password(password)
 
 # Initialize the database with a default admin user if no users exist
 def initialize_user_data():
-    # Check if user data file exists, if not create it with default admin
-    if not os.path.exists(USER_DATA_FILE) or os.path.getsize(USER_DATA_FILE) == 0:
-        default_users = {
-            "admin": {
-                "password": hash_password("admin123"),
-                "name": "Admin User",
-                "role": "admin",
-                "email": "admin@circuitbreakers.org",
-                "created_at": datetime.now().isoformat(),
-                "id": 1
-            }
-        }
-        with open(USER_DATA_FILE, 'w') as f:
-            json.dump(default_users, f, indent=4)
-        return default_users
-
-    # Otherwise, load existing users
+    # Only a missing or empty users document is seeded. A document that can't
+    # be read, or whose users fail validation, is reported and left untouched
+    # so that no real accounts are overwritten.
     try:
-        with open(USER_DATA_FILE, 'r') as f:
-            return json.load(f)
-    except:
-        # If there's an error reading the file, create a fresh one
-        default_users = {
+        users = directory.load_users()
+    except Exception as e:
+        st.error(f"Error loading users: {str(e)}")
+        return
+    
+    if users == {}:
+        users = {
             "admin": {
                 "password": hash_password("admin123"),
                 "name": "Admin User",
@@ -49,45 +39,52 @@ def initialize_user_data():
                 "id": 1
             }
         }
-        with open(USER_DATA_FILE, 'w') as f:
-            json.dump(default_users, f, indent=4)
-        return default_users
+        directory.save_users(users)
+        return
+    
+    for username, error in directory.invalid_users().items():
+        st.error(f"User '{username}' can't log in, its stored record is invalid: {error}")
 
 # Validate user credentials
 def authenticate(username, password):
     try:
-        # Load users from JSON file
-        if os.path.exists(USER_DATA_FILE):
-            with open(USER_DATA_FILE, 'r') as f:
-                users = json.load(f)
-            
-            if username in users:
-                user_data = users[username]
-                if user_data.get('password') == hash_password(password):
-                    return True, user_data.get('name', ''), user_data.get('role', 'member'), user_data.get('id', None)
+        # Look the user up in the cached directory
+        user = directory.get_user(username)
+        
+        if user is not None:
+            stored_hash = user.password
+            if passwords.verify_password(password, stored_hash):
+                # Replace legacy (unsalted SHA-256) or outdated hashes now that we know the password
+                if passwords.needs_rehash(stored_hash):
+                    _rehash_password(username, stored_hash, password)
+                return True, user.get('name', ''), user.get('role', 'member'), user.id
         
         return False, None, None, None
     except Exception as e:
         st.error(f"Authentication error: {str(e)}")
         return False, None, None, None
 
+# Store a fresh hash of a user's password, unless it changed meanwhile
+def _rehash_password(username, old_hash, password):
+    new_hash = hash_password(password)
+    users = directory.load_users()
+    if username in users and users[username].get('password') == old_hash:
+        users[username]['password'] = new_hash
+        directory.save_users(users)
+
 # Create new user
 def create_user(username, password, name, email, role, department=None):
     try:
-        # Load existing users
-        if os.path.exists(USER_DATA_FILE):
-            try:
-                with open(USER_DATA_FILE, 'r') as f:
-                    users = json.load(f)
-            except:
-                users = {}
-        else:
-            users = {}
-        
         # Check if username exists
-        if username in users:
+        if directory.get_user(username) is not None:
             return False, "Username already exists"
         
+        # Load existing users
+        try:
+            users = directory.load_users()
+        except Exception:
+            users = {}
+        
         # Generate a new ID
         new_id = 1
         if users:
@@ -107,14 +104,108 @@ def create_user(username, password, name, email, role, department=None):
             "id": new_id
         }
         
-        # Save users back to file
-        with open(USER_DATA_FILE, 'w') as f:
-            json.dump(users, f, indent=4)
+        # Save users back to the store
+        directory.save_users(users)
         
         return True, "User created successfully"
     except Exception as e:
         return False, f"Error creating user: {str(e)}"
 
+# Put a user's details into the Streamlit session state
+def _set_login_state(token, username, name, role, user_id):
+    st.session_state.authenticated = True
+    st.session_state.session_token = token
+    st.session_state.user = name
+    st.session_state.role = role
+    st.session_state.user_id = user_id
+    st.session_state.username = username
+
+# Fingerprint of the browser this Streamlit session runs in; tokens only
+# work from the browser they were issued to
+def _client():
+    return sessions.client_fingerprint(st.context.headers.get("User-Agent"))
+
+# Ask for the session cookie to be set (or cleared, token None) on the next
+# restore_session(); login and logout rerun the script right away, which
+# would discard a component emitted before the rerun
+def _queue_cookie(token):
+    st.session_state._session_cookie = token or ""
+
+# Set or clear the session cookie in the browser. Streamlit can't send
+# response headers, so the cookie is written from a script in a zero-height
+# component; it never appears in URLs, history or Referer headers, but it
+# can't be HttpOnly, so any script injected into the page can read and
+# replay the token (see sessions.py).
+def _write_cookie():
+    if "_session_cookie" not in st.session_state:
+        return
+    token = st.session_state.pop("_session_cookie")
+    max_age = sessions.SESSION_TTL if token else 0
+    components.html(
+        "<script>"
+        f"window.parent.document.cookie = '{SESSION_COOKIE}={token}; Max-Age={max_age}; Path=/; SameSite=Strict'"
+        " + (window.parent.location.protocol === 'https:' ? '; Secure' : '');"
+        "</script>",
+        height=0,
+    )
+
+# Log a user in after their password was checked: creates a server-side
+# session bound to this browser and keeps its token in a cookie
+def start_session(username, name, role, user_id):
+    token = sessions.create_session(username, name, role, user_id, _client())
+    _set_login_state(token, username, name, role, user_id)
+    _queue_cookie(token)
+
+# Restore or re-check the login from the session token; call at the top of
+# app.py and every page. After a refresh or reconnect the token in the
+# session cookie logs the user back in without a password or a read of the
+# users file; the token is then replaced by a new one, so a copied cookie
+# stops working. Returns whether the user is logged in.
+def restore_session():
+    if LEGACY_SESSION_PARAM in st.query_params:
+        del st.query_params[LEGACY_SESSION_PARAM]
+
+    token = st.session_state.get("session_token")
+    if token:
+        session = sessions.validate(token, _client())
+        if session is None:
+            # Expired or revoked (e.g. the user was deleted): log out
+            end_session()
+        else:
+            _set_login_state(token, session.username, session.name, session.role, session.user_id)
+    elif not st.session_state.get("_session_cookie_checked"):
+        # The cookies are the ones sent when this connection was opened, so
+        # they are only looked at once per Streamlit session
+        st.session_state._session_cookie_checked = True
+        cookie = st.context.cookies.get(SESSION_COOKIE)
+        session = None
+        if cookie:
+            token, session = sessions.rotate(cookie, _client())
+            if session is None:
+                _queue_cookie(None)
+            else:
+                _set_login_state(token, session.username, session.name, session.role, session.user_id)
+                _queue_cookie(token)
+    else:
+        session = None
+
+    _write_cookie()
+    return session is not None
+
+# Log out: ends the server-side session, clears the login state and the
+# session cookie
+def end_session():
+    token = st.session_state.get("session_token")
+    if token:
+        sessions.revoke(token)
+        _queue_cookie(None)
+    st.session_state.authenticated = False
+    st.session_state.session_token = None
+    st.session_state.user = None
+    st.session_state.role = None
+    st.session_state.user_id = None
+    st.session_state.username = None
+
 # Show login page
 def show_login_page():
     st.title("Circuit Breakers Team Hub")
@@ -133,11 +224,7 @@ def show_login_page():
             if username and password:
                 success, name, role, user_id = authenticate(username, password)
                 if success:
-                    st.session_state.authenticated = True
-                    st.session_state.user = name
-                    st.session_state.role = role
-                    st.session_state.user_id = user_id
-                    st.session_state.username = username
+                    start_session(username, name, role, user_id)
                     st.rerun()
                 else:
                     st.error("Invalid username or password")
@@ -0,0 +1,331 @@
+"""
+Incremental, content-addressed backups of the Circuit Breakers Team Hub data.
+
+A backup is a JSON manifest in BACKUP_DIR/snapshots mapping every backed-up
+file to the SHA-256 of its contents. The contents themselves live once in
+BACKUP_DIR/objects, named by their hash, so files that did not change
+between backups (most of the data, and nearly all media uploads) are stored
+only once. Files whose size and mtime match the previous backup are not even
+read again, which keeps nightly backups cheap as uploads grow.
+
+The SQLite database is copied with the sqlite3 backup API rather than read
+as a file, so a backup taken while the app is writing is still consistent.
+
+Creating, restoring and deleting backups hold a lock (a thread lock plus,
+where fcntl is available, a lock file shared by processes), so deleting a
+backup never collects objects another backup is in the middle of storing.
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+import re
+import shutil
+import sqlite3
+import tempfile
+import threading
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: only threads of this process are serialised
+    fcntl = None
+
+import storage
+from sqlite_store import SQLITE_PATH
+
+# Where manifests and content objects are kept, next to the data directory
+BACKUP_DIR = os.path.join(os.path.dirname(storage.DATA_DIR), "backups")
+OBJECTS_DIR = os.path.join(BACKUP_DIR, "objects")
+SNAPSHOTS_DIR = os.path.join(BACKUP_DIR, "snapshots")
+LOCK_PATH = os.path.join(BACKUP_DIR, ".lock")
+
+# Directories included in a backup. The pages store uploads under "data/",
+# relative to the working directory, which may differ from DATA_DIR.
+BACKUP_ROOTS = [storage.DATA_DIR, "data"]
+
+# Upload directories, skipped when a backup excludes media files
+UPLOAD_DIRS = {"resource_uploads", "media_uploads"}
+
+# SQLite side files; the database itself is copied through the backup API
+SKIPPED_SUFFIXES = (".db-wal", ".db-shm", ".tmp")
+
+CHUNK_SIZE = 1024 * 1024
+
+# Object files are OBJECTS_DIR/<2 hex digits>/<62 hex digits>; nothing else
+# in OBJECTS_DIR (such as an object still being written) is ever collected
+OBJECT_DIR_NAME = re.compile(r"[0-9a-f]{2}")
+OBJECT_FILE_NAME = re.compile(r"[0-9a-f]{62}")
+
+_lock = threading.Lock()
+
+
+@contextlib.contextmanager
+def _exclusive():
+    """Hold the backup lock for a create, restore or delete."""
+    with _lock:
+        os.makedirs(BACKUP_DIR, exist_ok=True)
+        with open(LOCK_PATH, "a") as lock_file:
+            if fcntl is not None:
+                # Released when the file is closed
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+
+
+def _object_path(digest):
+    return os.path.join(OBJECTS_DIR, digest[:2], digest[2:])
+
+
+def _store_object(path):
+    """Copy a file into the object store; returns (digest, bytes newly stored)."""
+    os.makedirs(OBJECTS_DIR, exist_ok=True)
+    sha = hashlib.sha256()
+    fd, tmp_path = tempfile.mkstemp(dir=OBJECTS_DIR)
+    try:
+        with open(path, "rb") as src, os.fdopen(fd, "wb") as dst:
+            for chunk in iter(lambda: src.read(CHUNK_SIZE), b""):
+                sha.update(chunk)
+                dst.write(chunk)
+        digest = sha.hexdigest()
+        target = _object_path(digest)
+        if os.path.exists(target):
+            return digest, 0
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(tmp_path, target)
+        return digest, os.path.getsize(target)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _hash_file(path):
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def _source_files(include_media):
+    """Yield the relative paths of every file to back up, once each."""
+    seen = set()
+    for root in BACKUP_ROOTS:
+        for dirpath, dirnames, filenames in os.walk(root):
+            if not include_media:
+                dirnames[:] = [d for d in dirnames if d not in UPLOAD_DIRS]
+            dirnames.sort()
+            for filename in sorted(filenames):
+                path = os.path.normpath(os.path.join(dirpath, filename))
+                real = os.path.realpath(path)
+                if real in seen or filename.endswith(SKIPPED_SUFFIXES):
+                    continue
+                seen.add(real)
+                yield path
+
+
+def _snapshot_id(name):
+    safe_name = re.sub(r"[^A-Za-z0-9_.-]+", "_", name).strip("_") or "backup"
+    backup_id = f"{datetime.now().strftime('%Y%m%dT%H%M%S')}_{safe_name}"
+    suffix = 1
+    while os.path.exists(_manifest_path(backup_id if suffix == 1 else f"{backup_id}_{suffix}")):
+        suffix += 1
+    return backup_id if suffix == 1 else f"{backup_id}_{suffix}"
+
+
+def _manifest_path(backup_id):
+    return os.path.join(SNAPSHOTS_DIR, f"{backup_id}.json")
+
+
+def load_manifest(backup_id):
+    """Return a backup's manifest; raises ValueError for an unknown backup."""
+    path = _manifest_path(backup_id)
+    if not os.path.exists(path):
+        raise ValueError(f"Unknown backup '{backup_id}'")
+    with open(path) as f:
+        return json.load(f)
+
+
+def list_backups():
+    """Return all backup manifests, newest first."""
+    if not os.path.isdir(SNAPSHOTS_DIR):
+        return []
+    manifests = [
+        load_manifest(filename[:-len(".json")])
+        for filename in os.listdir(SNAPSHOTS_DIR) if filename.endswith(".json")
+    ]
+    manifests.sort(key=lambda manifest: manifest["created_at"], reverse=True)
+    return manifests
+
+
+def create_backup(name, include_media=True):
+    """Snapshot the data (and optionally upload) directories; returns the manifest.
+
+    Only files whose contents are not yet in the object store are copied; the
+    manifest's "new_bytes" says how much this backup actually added.
+    """
+    with _exclusive():
+        return _create_backup(name, include_media)
+
+
+def _create_backup(name, include_media):
+    previous = {}
+    for manifest in list_backups():
+        previous.update({path: entry for path, entry in manifest["files"].items() if path not in previous})
+
+    files = {}
+    new_bytes = 0
+    for path in _source_files(include_media):
+        if os.path.abspath(path) == os.path.abspath(SQLITE_PATH):
+            continue
+        stat = os.stat(path)
+        entry = previous.get(path)
+        if (entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns
+                and os.path.exists(_object_path(entry["hash"]))):
+            digest = entry["hash"]
+        else:
+            digest, added = _store_object(path)
+            new_bytes += added
+        files[path] = {"hash": digest, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    if os.path.exists(SQLITE_PATH):
+        # A consistent copy of the live database, including unflushed WAL pages
+        os.makedirs(BACKUP_DIR, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=BACKUP_DIR, suffix=".db")
+        os.close(fd)
+        try:
+            source = sqlite3.connect(SQLITE_PATH)
+            target = sqlite3.connect(tmp_path)
+            try:
+                source.backup(target)
+                # Stored copies must not need -wal/-shm files next to them
+                target.execute("PRAGMA journal_mode=DELETE")
+            finally:
+                target.close()
+                source.close()
+            digest, added = _store_object(tmp_path)
+            new_bytes += added
+            files[os.path.normpath(SQLITE_PATH)] = {
+                "hash": digest, "size": os.path.getsize(tmp_path), "mtime_ns": None, "sqlite": True,
+            }
+        finally:
+            os.remove(tmp_path)
+
+    manifest = {
+        "id": _snapshot_id(name),
+        "name": name,
+        "created_at": datetime.now().isoformat(),
+        "storage_mode": storage.storage_mode(),
+        "include_media": include_media,
+        "files": files,
+        "total_bytes": sum(entry["size"] for entry in files.values()),
+        "new_bytes": new_bytes,
+    }
+    os.makedirs(SNAPSHOTS_DIR, exist_ok=True)
+    storage._write_json(_manifest_path(manifest["id"]), manifest)
+    return manifest
+
+
+def verify_backup(backup_id):
+    """Check that every object of a backup exists and is intact; returns a list of problems."""
+    problems = []
+    checked = {}
+    for path, entry in load_manifest(backup_id)["files"].items():
+        digest = entry["hash"]
+        if digest not in checked:
+            object_path = _object_path(digest)
+            if not os.path.exists(object_path):
+                checked[digest] = "missing"
+            elif _hash_file(object_path) != digest:
+                checked[digest] = "corrupted"
+            else:
+                checked[digest] = None
+        if checked[digest]:
+            problems.append(f"{path}: object {digest[:12]} is {checked[digest]}")
+    return problems
+
+
+def _restore_sqlite(object_path):
+    """Copy a backed-up database into the live one, in place.
+
+    Collection versions are raised above every version seen before the
+    restore, so no process mistakes restored data for what it has cached.
+    """
+    target = sqlite3.connect(SQLITE_PATH, timeout=30)
+    try:
+        try:
+            (before,) = target.execute("SELECT COALESCE(MAX(version), 0) FROM collection_versions").fetchone()
+        except sqlite3.OperationalError:
+            before = 0
+        source = sqlite3.connect(f"file:{object_path}?mode=ro", uri=True)
+        try:
+            source.backup(target)
+        finally:
+            source.close()
+        target.execute("UPDATE collection_versions SET version = version + ?", (before + 1,))
+        target.commit()
+    finally:
+        target.close()
+
+
+def restore_backup(backup_id):
+    """Restore the data to the state of a backup; returns the safety backup's manifest.
+
+    The current state is backed up first (cheaply, as almost everything is
+    already in the object store), so a restore can itself be undone. Files
+    that did not exist at backup time are removed, except in upload
+    directories the backup did not include.
+    """
+    with _exclusive():
+        return _restore_backup(backup_id)
+
+
+def _restore_backup(backup_id):
+    manifest = load_manifest(backup_id)
+    problems = verify_backup(backup_id)
+    if problems:
+        raise ValueError(f"Backup '{backup_id}' failed verification: {problems[0]}")
+
+    safety = _create_backup(f"before_restore_{manifest['name']}", include_media=True)
+
+    files = manifest["files"]
+    for path, entry in files.items():
+        object_path = _object_path(entry["hash"])
+        if entry.get("sqlite"):
+            _restore_sqlite(object_path)
+            continue
+        if os.path.exists(path) and os.path.getsize(path) == entry["size"] and _hash_file(path) == entry["hash"]:
+            continue
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        shutil.copyfile(object_path, tmp_path)
+        os.replace(tmp_path, path)
+        os.utime(path, ns=(entry["mtime_ns"], entry["mtime_ns"]))
+
+    for path in _source_files(manifest["include_media"]):
+        if path not in files and os.path.abspath(path) != os.path.abspath(SQLITE_PATH):
+            os.remove(path)
+
+    storage.invalidate()
+    return safety
+
+
+def delete_backup(backup_id):
+    """Delete a backup and every object no other backup refers to; returns bytes freed."""
+    with _exclusive():
+        os.remove(_manifest_path(backup_id))
+        referenced = {entry["hash"] for manifest in list_backups() for entry in manifest["files"].values()}
+
+        freed = 0
+        if os.path.isdir(OBJECTS_DIR):
+            for prefix in os.listdir(OBJECTS_DIR):
+                subdir = os.path.join(OBJECTS_DIR, prefix)
+                if not OBJECT_DIR_NAME.fullmatch(prefix) or not os.path.isdir(subdir):
+                    continue
+                for filename in os.listdir(subdir):
+                    if OBJECT_FILE_NAME.fullmatch(filename) and prefix + filename not in referenced:
+                        path = os.path.join(subdir, filename)
+                        freed += os.path.getsize(path)
+                        os.remove(path)
+        return freed
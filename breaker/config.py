@@ -4,6 +4,38 @@ Provides environment and path configuration functionality.
 """
 
 import os
+import threading
+
+_bootstrapped = False
+_bootstrap_lock = threading.Lock()
+
+def bootstrap():
+    """
+    Prepares the process once: environment defaults, data files (or the
+    SQLite schema), migration of JSON data into SQLite and the activity
+    feed. app.py and every page call this first; only the first call in a
+    process does any work, so modules themselves have no side effects at
+    import time.
+    """
+    global _bootstrapped
+    if _bootstrapped:
+        return
+    
+    with _bootstrap_lock:
+        if _bootstrapped:
+            return
+        
+        configure_environment()
+        
+        from database import create_tables, migrate_data_from_json
+        create_tables()
+        migrate_data_from_json()
+        
+        # Seed the activity feed before any page saves a change
+        import activity
+        activity.ensure_stream()
+        
+        _bootstrapped = True
 
 def configure_environment():
     """
@@ -20,3 +52,8 @@ def configure_environment():
     # Ensure any other needed environment variables are set
     if "CIRCUIT_BREAKERS_ENV" not in os.environ:
         os.environ["CIRCUIT_BREAKERS_ENV"] = "production"
+    
+    # Storage mode for collections: "json" rewrites whole files on save,
+    # "journal" appends changed records to a per-collection journal
+    if "CIRCUIT_BREAKERS_STORAGE" not in os.environ:
+        os.environ["CIRCUIT_BREAKERS_STORAGE"] = "json"
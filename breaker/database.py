@@ -5,10 +5,10 @@ for the SQLAlchemy database functionality.
 
 import os
 import json
+from dataclasses import dataclass, fields
 from datetime import datetime
-
-# Create data directory
-os.makedirs("data", exist_ok=True)
+from typing import Optional, get_args
+import storage
 
 # Define paths for data files
 USERS_FILE = "breaker/data/users.json"
@@ -23,7 +23,12 @@ SETTINGS_FILE = "breaker/data/settings.json"
 
 # Initialize default files if they don't exist
 def create_tables():
-    """Create all data files if they don't exist."""
+    """Create all data files (or the SQLite schema) if they don't exist."""
+    if storage.storage_mode() == "sqlite":
+        # The SQLite store creates its tables and indexes when first opened
+        storage.get_store()
+        return True
+    
     # Users
     if not os.path.exists(USERS_FILE):
         with open(USERS_FILE, 'w') as f:
@@ -73,10 +78,33 @@ def create_tables():
 
 def migrate_data_from_json():
     """
-    This function is kept for compatibility, but doesn't do anything
-    since we're already using JSON files as the primary data store.
+    Copy existing JSON data (including any pending journal records) into the
+    SQLite database the first time it is used. Does nothing when the JSON
+    files are the primary data store.
     """
-    pass
+    if storage.storage_mode() != "sqlite":
+        return
+    
+    store = storage.get_store()
+    json_store = storage.JournalStore()
+    
+    for name in storage.COLLECTION_FILES:
+        if store.version(name) == 0:
+            try:
+                items = json_store.load(name)
+                if items:
+                    store.save(name, items)
+            except Exception as e:
+                print(f"Error migrating {name} to SQLite: {str(e)}")
+    
+    for name in storage.DOCUMENT_FILES:
+        if store.version(name) == 0:
+            try:
+                data = json_store.load_document(name)
+                if data:
+                    store.save_document(name, data)
+            except Exception as e:
+                print(f"Error migrating {name} to SQLite: {str(e)}")
 
 def get_db():
     """
@@ -85,51 +113,259 @@ def get_db():
     """
     return None
 
-# Stub classes to maintain compatibility with existing code
-class User:
-    def __init__(self, **kwargs):
-        for key, value in kwargs.items():
-            setattr(self, key, value)
-
-class Task:
-    def __init__(self, **kwargs):
-        for key, value in kwargs.items():
-            setattr(self, key, value)
-
-class BuildLog:
-    def __init__(self, **kwargs):
-        for key, value in kwargs.items():
-            setattr(self, key, value)
-
-class Resource:
-    def __init__(self, **kwargs):
-        for key, value in kwargs.items():
-            setattr(self, key, value)
-
-class MediaItem:
-    def __init__(self, **kwargs):
-        for key, value in kwargs.items():
-            setattr(self, key, value)
-
-class Message:
-    def __init__(self, **kwargs):
-        for key, value in kwargs.items():
-            setattr(self, key, value)
-
-class Event:
-    def __init__(self, **kwargs):
-        for key, value in kwargs.items():
-            setattr(self, key, value)
-
-class Sponsor:
-    def __init__(self, **kwargs):
-        for key, value in kwargs.items():
-            setattr(self, key, value)
-
-class AppSetting:
-    def __init__(self, **kwargs):
-        for key, value in kwargs.items():
-            setattr(self, key, value)
+# Record models. Each stored record decodes to an immutable, slotted
+# instance, which is much smaller than a dict and faster to read in filters.
+# Keys a model doesn't declare are kept in `extra` and declared keys stored
+# as null are listed in `nulls` (both None when there are none), so encoding
+# a decoded record gives back the stored dict.
+class Record:
+    __slots__ = ()
+    
+    @classmethod
+    def _field_types(cls):
+        """Return {field name: expected type} for the declared fields, built once per class."""
+        types = cls.__dict__.get("_types_cache")
+        if types is None:
+            types = {}
+            for field_info in fields(cls):
+                if field_info.name in ("extra", "nulls"):
+                    continue
+                expected = [arg for arg in get_args(field_info.type) if arg is not type(None)]
+                types[field_info.name] = expected[0] if expected else field_info.type
+            type.__setattr__(cls, "_types_cache", types)
+        return types
+    
+    @classmethod
+    def from_dict(cls, data):
+        """Decode and validate a stored record; raises ValueError if it is malformed."""
+        if not isinstance(data, dict):
+            raise ValueError(f"{cls.__name__} record must be an object, got {type(data).__name__}")
+        
+        types = cls._field_types()
+        values = {}
+        extra = {}
+        nulls = []
+        for key, value in data.items():
+            expected = types.get(key)
+            if expected is None:
+                extra[key] = value
+            elif value is None:
+                nulls.append(key)
+            elif not isinstance(value, expected):
+                raise ValueError(f"{cls.__name__}.{key} must be {expected.__name__}, got {type(value).__name__}")
+            else:
+                values[key] = value
+        
+        for key in cls.REQUIRED:
+            if values.get(key) in (None, ""):
+                raise ValueError(f"{cls.__name__} record is missing '{key}'")
+        
+        return cls(**values, extra=extra or None, nulls=tuple(nulls) or None)
+    
+    def to_dict(self):
+        """Encode back to the stored dict format (unset fields are left out, stored nulls kept)."""
+        data = {}
+        for key in self._field_types():
+            value = getattr(self, key)
+            if value is not None:
+                data[key] = value
+        if self.nulls:
+            data.update(dict.fromkeys(self.nulls))
+        if self.extra:
+            data.update(self.extra)
+        return data
+    
+    def get(self, key, default=None):
+        """Dict-style access so records can stand in for dicts in page code."""
+        if key in self._field_types():
+            value = getattr(self, key)
+            return default if value is None else value
+        return self.extra.get(key, default) if self.extra else default
+
+@dataclass(frozen=True, slots=True)
+class User(Record):
+    REQUIRED = ("username",)
+    username: Optional[str] = None
+    password: Optional[str] = None
+    name: Optional[str] = None
+    email: Optional[str] = None
+    role: Optional[str] = None
+    department: Optional[str] = None
+    created_at: Optional[object] = None
+    id: Optional[int] = None
+    extra: Optional[dict] = None
+    nulls: Optional[tuple] = None
+
+@dataclass(frozen=True, slots=True)
+class Task(Record):
+    REQUIRED = ("id",)
+    id: Optional[str] = None
+    title: Optional[str] = None
+    description: Optional[str] = None
+    status: Optional[str] = None
+    priority: Optional[str] = None
+    category: Optional[str] = None
+    assigned_to: Optional[str] = None
+    created_by: Optional[str] = None
+    created_at: Optional[str] = None
+    due_date: Optional[str] = None
+    completed_at: Optional[str] = None
+    assignee_id: Optional[int] = None
+    extra: Optional[dict] = None
+    nulls: Optional[tuple] = None
+
+@dataclass(frozen=True, slots=True)
+class BuildLog(Record):
+    REQUIRED = ("id",)
+    id: Optional[str] = None
+    title: Optional[str] = None
+    description: Optional[str] = None
+    category: Optional[str] = None
+    author: Optional[str] = None
+    date: Optional[str] = None
+    image_description: Optional[str] = None
+    author_id: Optional[int] = None
+    extra: Optional[dict] = None
+    nulls: Optional[tuple] = None
+
+@dataclass(frozen=True, slots=True)
+class Resource(Record):
+    REQUIRED = ("id",)
+    id: Optional[str] = None
+    title: Optional[str] = None
+    description: Optional[str] = None
+    category: Optional[str] = None
+    uploaded_by: Optional[str] = None
+    upload_date: Optional[str] = None
+    file_type: Optional[str] = None
+    file_size: Optional[str] = None
+    file_path: Optional[str] = None
+    url: Optional[str] = None
+    tags: Optional[list] = None
+    author_id: Optional[int] = None
+    extra: Optional[dict] = None
+    nulls: Optional[tuple] = None
+
+@dataclass(frozen=True, slots=True)
+class MediaItem(Record):
+    REQUIRED = ("id",)
+    id: Optional[str] = None
+    title: Optional[str] = None
+    description: Optional[str] = None
+    category: Optional[str] = None
+    media_type: Optional[str] = None
+    uploaded_by: Optional[str] = None
+    upload_date: Optional[str] = None
+    file_path: Optional[str] = None
+    url: Optional[str] = None
+    tags: Optional[list] = None
+    event: Optional[str] = None
+    date: Optional[str] = None
+    author_id: Optional[int] = None
+    extra: Optional[dict] = None
+    nulls: Optional[tuple] = None
+
+@dataclass(frozen=True, slots=True)
+class Message(Record):
+    REQUIRED = ("id",)
+    id: Optional[str] = None
+    title: Optional[str] = None
+    content: Optional[str] = None
+    author: Optional[str] = None
+    timestamp: Optional[str] = None
+    channel: Optional[str] = None
+    category: Optional[str] = None
+    priority: Optional[str] = None
+    parent_id: Optional[str] = None
+    author_id: Optional[int] = None
+    extra: Optional[dict] = None
+    nulls: Optional[tuple] = None
+
+@dataclass(frozen=True, slots=True)
+class Event(Record):
+    REQUIRED = ("id",)
+    id: Optional[str] = None
+    title: Optional[str] = None
+    description: Optional[str] = None
+    start_time: Optional[str] = None
+    end_time: Optional[str] = None
+    location: Optional[str] = None
+    organizer: Optional[str] = None
+    participants: Optional[list] = None
+    category: Optional[str] = None
+    event_type: Optional[str] = None
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
+    creator_id: Optional[int] = None
+    # Recurring events: RRULE-style rule, cancelled dates and per-date changes (see recurrence.py)
+    recurrence: Optional[str] = None
+    exceptions: Optional[list] = None
+    overrides: Optional[dict] = None
+    extra: Optional[dict] = None
+    nulls: Optional[tuple] = None
+
+@dataclass(frozen=True, slots=True)
+class Sponsor(Record):
+    REQUIRED = ("id",)
+    id: Optional[str] = None
+    name: Optional[str] = None
+    level: Optional[str] = None
+    contribution: Optional[object] = None
+    contact_name: Optional[str] = None
+    contact_email: Optional[str] = None
+    contact_phone: Optional[str] = None
+    website: Optional[str] = None
+    description: Optional[str] = None
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
+    sponsorship_level: Optional[str] = None
+    amount: Optional[object] = None
+    date_added: Optional[str] = None
+    notes: Optional[str] = None
+    logo_path: Optional[str] = None
+    extra: Optional[dict] = None
+    nulls: Optional[tuple] = None
+
+@dataclass(frozen=True, slots=True)
+class AppSetting(Record):
+    REQUIRED = ("key",)
+    key: Optional[str] = None
+    value: Optional[object] = None
+    extra: Optional[dict] = None
+    nulls: Optional[tuple] = None
+
+# Collection name -> record model
+RECORD_CLASSES = {
+    "tasks": Task,
+    "logs": BuildLog,
+    "resources": Resource,
+    "media": MediaItem,
+    "messages": Message,
+    "events": Event,
+    "sponsors": Sponsor,
+}
+
+def decode_records(collection, items):
+    """Decode a collection's stored dicts into record instances."""
+    from_dict = RECORD_CLASSES[collection].from_dict
+    return [from_dict(item) for item in items]
+
+def decode_valid_records(collection, items):
+    """Decode the stored dicts that pass validation; returns (records, {record id or position: error}) for the rest."""
+    from_dict = RECORD_CLASSES[collection].from_dict
+    records = []
+    errors = {}
+    for position, item in enumerate(items):
+        try:
+            records.append(from_dict(item))
+        except ValueError as e:
+            record_id = item.get("id") if isinstance(item, dict) else None
+            errors[record_id if record_id is not None else position] = str(e)
+    return records, errors
+
+def encode_records(records):
+    """Encode record instances back into stored dicts."""
+    return [record.to_dict() for record in records]
 
 # Dummy session class for compatibility
 class SessionLocal:
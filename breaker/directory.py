@@ -0,0 +1,129 @@
+"""
+Cached user directory for the Circuit Breakers Team Hub.
+
+Every page needs to resolve users: the login checks a username, task
+assignees and message authors are stored by display name, sessions carry a
+user id. Instead of each page loading the "users" document and scanning it,
+the directory decodes the document once per version into User records (see
+database.py) and indexes them by username, id, display name and email, so
+each lookup is a dict access.
+
+The directory is rebuilt only when the users document changes; saves made
+through any path (save_users(), storage.save_document(), another process in
+SQLite mode) bump the document's version, which invalidates it. Changes
+still pending in a unit of work are not visible until it is flushed.
+"""
+
+import threading
+
+import storage
+from database import User
+
+
+class _Directory:
+    __slots__ = ("version", "users", "by_username", "by_id", "by_name", "by_email", "members", "errors")
+
+    def __init__(self, version, document):
+        self.version = version
+        self.users = []
+        self.by_username = {}
+        self.by_id = {}
+        self.by_name = {}
+        self.by_email = {}
+        # username -> validation error of users that could not be loaded
+        self.errors = {}
+
+        for username, data in document.items():
+            try:
+                user = User.from_dict({**data, "username": username})
+            except ValueError as e:
+                print(f"Error loading user '{username}': {str(e)}")
+                self.errors[username] = str(e)
+                continue
+            self.users.append(user)
+            self.by_username[username] = user
+            # Ids, names and emails should be unique; if not, the first user wins
+            if user.id is not None:
+                self.by_id.setdefault(user.id, user)
+            if user.name:
+                self.by_name.setdefault(user.name, user)
+            if user.email:
+                self.by_email.setdefault(user.email.lower(), user)
+
+        self.members = [
+            {"username": user.username, "name": user.name, "role": user.role, "email": user.email}
+            for user in self.users
+        ]
+
+
+_lock = threading.Lock()
+_directory = None
+
+
+def _build():
+    # Read the committed document from the store: storage.load_document()
+    # would return a unit of work's pending copy, which must not be cached
+    # under the committed version. The version must be the one the document
+    # belongs to, or the directory would be kept after a save in between.
+    while True:
+        version = storage.collection_version("users")
+        document = storage.get_store().load_document("users")
+        if storage.collection_version("users") == version:
+            return _Directory(version, document)
+
+
+def _current():
+    global _directory
+    version = storage.collection_version("users")
+    directory = _directory
+    if directory is None or directory.version != version:
+        with _lock:
+            if _directory is None or _directory.version != storage.collection_version("users"):
+                _directory = _build()
+            directory = _directory
+    return directory
+
+
+def get_user(username):
+    """Return the User with a username, or None."""
+    return _current().by_username.get(username)
+
+
+def get_user_by_id(user_id):
+    """Return the User with an id, or None."""
+    return _current().by_id.get(user_id)
+
+
+def get_user_by_name(name):
+    """Return the User with a display name (as stored in assignees and authors), or None."""
+    return _current().by_name.get(name)
+
+
+def get_user_by_email(email):
+    """Return the User with an email address (case-insensitive), or None."""
+    return _current().by_email.get(email.lower()) if email else None
+
+
+def all_users():
+    """Return every User, in stored order."""
+    return list(_current().users)
+
+
+def team_members():
+    """Return {"username", "name", "role", "email"} dicts for every user."""
+    return [dict(member) for member in _current().members]
+
+
+def invalid_users():
+    """Return {username: error} for stored users that failed validation and were left out."""
+    return dict(_current().errors)
+
+
+def load_users():
+    """Return the users document ({username: data}) as a copy the caller may modify and save."""
+    return storage.load_document("users")
+
+
+def save_users(users):
+    """Persist the users document; the directory is rebuilt on the next lookup."""
+    storage.save_document("users", users)
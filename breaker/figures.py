@@ -0,0 +1,72 @@
+"""
+Cache of built Plotly figures shared by all sessions of the Circuit Breakers Team Hub.
+
+Analytics pages draw the same charts on every rerun, usually from data that
+has not changed. cached_figure() keeps each built figure as JSON under its
+chart id, the versions of the collections it is drawn from and any
+parameters (filters, the current day), so the DataFrame work and figure
+building only run again after the data or the parameters change. At most
+MAX_FIGURES figures are kept; the least recently used is evicted first.
+"""
+
+import json
+import threading
+from collections import OrderedDict
+
+import storage
+
+MAX_FIGURES = 64
+
+_lock = threading.Lock()
+
+# (chart id, collection versions, parameters) -> figure JSON, least recently used first
+_figures = OrderedDict()
+
+_hits = 0
+_misses = 0
+
+
+def cached_figure(chart_id, collections, build, params=None):
+    """Return the figure for chart_id, calling build() only if it is not cached.
+
+    collections lists the collections (or documents) the chart is drawn from;
+    params holds anything else the figure depends on and must be JSON
+    serializable. build() returns a plotly Figure; each caller gets its own
+    copy, so it can be changed freely.
+    """
+    global _hits, _misses
+    import plotly.io as pio
+
+    key = (
+        chart_id,
+        tuple(storage.collection_version(name) for name in collections),
+        json.dumps(params, sort_keys=True, default=str),
+    )
+    with _lock:
+        figure_json = _figures.get(key)
+        if figure_json is not None:
+            _figures.move_to_end(key)
+            _hits += 1
+
+    if figure_json is None:
+        figure_json = build().to_json()
+        with _lock:
+            _misses += 1
+            _figures[key] = figure_json
+            _figures.move_to_end(key)
+            while len(_figures) > MAX_FIGURES:
+                _figures.popitem(last=False)
+
+    return pio.from_json(figure_json)
+
+
+def cache_info():
+    """Return the number of cached figures, hits and misses."""
+    with _lock:
+        return {"figures": len(_figures), "hits": _hits, "misses": _misses}
+
+
+def clear():
+    """Drop every cached figure."""
+    with _lock:
+        _figures.clear()
@@ -0,0 +1,125 @@
+"""
+Sortable unique record ids for the Circuit Breakers Team Hub.
+
+Ids are ULIDs: 26 Crockford base32 characters, a 48-bit millisecond
+timestamp followed by 80 random bits. They sort lexicographically by
+creation time, so listings can page by id instead of parsing timestamps.
+Records created before ULIDs have second-resolution timestamp ids
+("20250101120000") that compare after every ULID as plain strings; sort
+and page with sort_key(), which places them by their time among the ULIDs.
+Within a process, ids created in the same millisecond increment the
+random part, which keeps them strictly increasing and lets batches be
+produced without drawing new randomness per id. The random starting
+point makes collisions between processes practically impossible.
+"""
+
+import os
+import threading
+import time
+from datetime import datetime
+
+# Crockford base32 alphabet (no I, L, O or U)
+ENCODING = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+
+TIME_LENGTH = 10
+RANDOM_LENGTH = 16
+RANDOM_LIMIT = 1 << 80
+
+# Ids generated before ULIDs: the local time of creation, to the second
+LEGACY_FORMAT = "%Y%m%d%H%M%S"
+LEGACY_LENGTH = 14
+
+_lock = threading.Lock()
+_last_time = 0
+_last_random = 0
+
+
+def _reset_after_fork():
+    """Forked children must not continue the parent's sequence."""
+    global _last_time, _last_random
+    _last_time = 0
+    _last_random = 0
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _encode(value, length):
+    chars = []
+    for _ in range(length):
+        value, index = divmod(value, 32)
+        chars.append(ENCODING[index])
+    return "".join(reversed(chars))
+
+
+def _random_bits():
+    return int.from_bytes(os.urandom(10), "big")
+
+
+def new_ids(count):
+    """Return count new ids, strictly increasing."""
+    global _last_time, _last_random
+    ids = []
+    with _lock:
+        now = time.time_ns() // 1_000_000
+        if now <= _last_time:
+            # Same millisecond (or the clock moved back): continue the sequence
+            now = _last_time
+            random_part = _last_random + 1
+        else:
+            random_part = _random_bits()
+
+        for _ in range(count):
+            if random_part >= RANDOM_LIMIT:
+                # Sequence exhausted for this millisecond; move to the next one
+                now += 1
+                random_part = _random_bits()
+            ids.append(_encode(now, TIME_LENGTH) + _encode(random_part, RANDOM_LENGTH))
+            random_part += 1
+
+        _last_time = now
+        _last_random = random_part - 1
+    return ids
+
+
+def new_id():
+    """Return a single new id."""
+    return new_ids(1)[0]
+
+
+def _legacy_datetime(record_id):
+    if len(record_id) != LEGACY_LENGTH or not record_id.isdigit():
+        return None
+    try:
+        return datetime.strptime(record_id, LEGACY_FORMAT)
+    except ValueError:
+        return None
+
+
+def id_datetime(record_id):
+    """Return the creation time encoded in an id (ULID or legacy timestamp), or None."""
+    record_id = str(record_id)
+    if len(record_id) != TIME_LENGTH + RANDOM_LENGTH:
+        return _legacy_datetime(record_id)
+    try:
+        millis = 0
+        for char in record_id[:TIME_LENGTH].upper():
+            millis = millis * 32 + ENCODING.index(char)
+    except ValueError:
+        return None
+    return datetime.fromtimestamp(millis / 1000)
+
+
+def sort_key(record_id):
+    """Return a string that orders ids by creation time, legacy ids included.
+
+    A legacy id maps to the ULID time prefix of its second with a zero
+    random part, so it sorts before the ULIDs created in that second.
+    Other ids are left as they are.
+    """
+    record_id = str(record_id)
+    legacy = _legacy_datetime(record_id)
+    if legacy is None:
+        return record_id.upper()
+    return _encode(int(legacy.timestamp() * 1000), TIME_LENGTH) + "0" * RANDOM_LENGTH
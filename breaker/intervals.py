@@ -0,0 +1,182 @@
+"""
+Interval index over the team's events for the Circuit Breakers Team Hub.
+
+The calendar asks the same question in several places: which events overlap
+a window (the month grid, today's events, the upcoming timeline). Instead of
+filtering every event each time, the events are indexed as intervals
+[start, end): sorted by start and laid out as an implicit balanced tree in
+which every node also stores the latest end in its subtree. A query for the
+events overlapping [t0, t1) skips every subtree that ends before t0 and
+everything starting at or after t1, so it costs O(log n + k) for k results.
+
+Events that last several days (a competition weekend) are found for every
+day they span, not just the day they start; events_by_day() lists them under
+each of those days.
+
+A recurring event is indexed once, as the interval covering its whole series
+(open-ended if the rule never ends), and expanded into the occurrences
+inside the queried window only (see recurrence.py).
+
+The index is rebuilt only when the events collection changes (any save bumps
+its version, see storage.collection_version()), and is shared by all
+sessions; the returned event dicts must not be modified.
+"""
+
+import threading
+from datetime import datetime, time, timedelta
+
+import recurrence
+import storage
+
+
+class IntervalIndex:
+    """Intervals [start, end) over integer timestamps, queried by overlap with a window."""
+
+    def __init__(self, intervals):
+        # intervals: iterable of (start, end, value); an interval ending at or
+        # before its start is kept as the single second it starts in
+        ordered = sorted(
+            ((start, max(end, start + 1), value) for start, end, value in intervals),
+            key=lambda interval: interval[0],
+        )
+        self._starts = [interval[0] for interval in ordered]
+        self._ends = [interval[1] for interval in ordered]
+        self._values = [interval[2] for interval in ordered]
+
+        # Node mid of the range [lo, hi) (mid = (lo + hi) // 2) covers that
+        # whole range; _max_end[mid] is the latest end within it
+        self._max_end = list(self._ends)
+        if ordered:
+            self._fill_max_end(0, len(ordered))
+
+    def __len__(self):
+        return len(self._starts)
+
+    def _fill_max_end(self, lo, hi):
+        mid = (lo + hi) // 2
+        latest = self._ends[mid]
+        if lo < mid:
+            latest = max(latest, self._fill_max_end(lo, mid))
+        if mid + 1 < hi:
+            latest = max(latest, self._fill_max_end(mid + 1, hi))
+        self._max_end[mid] = latest
+        return latest
+
+    def overlapping(self, t0, t1):
+        """Return the values of the intervals overlapping [t0, t1), ordered by start."""
+        found = []
+        if t0 < t1 and self._starts:
+            self._collect(0, len(self._starts), t0, t1, found)
+        return found
+
+    def _collect(self, lo, hi, t0, t1, found):
+        if lo >= hi:
+            return
+        mid = (lo + hi) // 2
+        # Nothing in this subtree ends after the window starts
+        if self._max_end[mid] <= t0:
+            return
+        self._collect(lo, mid, t0, t1, found)
+        # Intervals from mid onwards start at or after mid's start
+        if self._starts[mid] >= t1:
+            return
+        if self._ends[mid] > t0:
+            found.append(self._values[mid])
+        self._collect(mid + 1, hi, t0, t1, found)
+
+
+def _ts(value):
+    return int(value.timestamp())
+
+
+# End of a recurring series without an end date
+FOREVER = float("inf")
+
+
+class _EventIndex:
+    __slots__ = ("version", "index")
+
+    def __init__(self, version, items):
+        self.version = version
+        intervals = []
+        for item in items:
+            event = {**item, **storage._parse_times(item)}
+            start = event.get("start_time_ts")
+            if start is None:
+                continue
+            if recurrence.rule_of(event) is not None:
+                series_start, series_end = recurrence.series_span(event)
+                intervals.append((_ts(series_start), _ts(series_end) if series_end else FOREVER, event))
+            else:
+                intervals.append((start, event.get("end_time_ts") or start, event))
+        self.index = IntervalIndex(intervals)
+
+
+_lock = threading.Lock()
+_events = None
+
+
+def _build():
+    # The version must be the one the records belong to, or the index would
+    # be kept after a save landing in between
+    while True:
+        version = storage.collection_version("events")
+        items = storage.load_collection_shared("events")
+        if storage.collection_version("events") == version:
+            return _EventIndex(version, items)
+
+
+def _current():
+    global _events
+    version = storage.collection_version("events")
+    events = _events
+    if events is None or events.version != version:
+        with _lock:
+            if _events is None or _events.version != storage.collection_version("events"):
+                _events = _build()
+            events = _events
+    return events.index
+
+
+def events_between(start, end):
+    """Return the events (and occurrences of recurring events) overlapping [start, end), ordered by start time."""
+    found = []
+    expanded = False
+    for event in _current().overlapping(_ts(start), _ts(end)):
+        if event.get("recurrence"):
+            found.extend(recurrence.occurrences(event, start, end))
+            expanded = True
+        else:
+            found.append(event)
+    if expanded:
+        found.sort(key=lambda event: event["start_time_ts"])
+    return found
+
+
+def events_on(day):
+    """Return the events taking place (at least partly) on a date."""
+    start = datetime.combine(day, time.min)
+    return events_between(start, start + timedelta(days=1))
+
+
+def event_days(event):
+    """Return the first and last date an event takes place on."""
+    start = event["start_time_dt"]
+    end = event.get("end_time_dt") or start
+    # An event ending at midnight does not take place on the following day
+    last = (end - timedelta(microseconds=1)).date() if end > start else start.date()
+    return start.date(), last
+
+
+def events_by_day(start, end):
+    """Return {date: [events]} for [start, end), listing each event under every day it spans."""
+    by_day = {}
+    first_day = start.date()
+    last_day = (end - timedelta(microseconds=1)).date()
+    for event in events_between(start, end):
+        event_first, event_last = event_days(event)
+        day = max(event_first, first_day)
+        while day <= min(event_last, last_day):
+            by_day.setdefault(day, []).append(event)
+            day += timedelta(days=1)
+    return by_day
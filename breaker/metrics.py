@@ -0,0 +1,284 @@
+"""
+Materialized dashboard metrics for the Circuit Breakers Team Hub.
+
+The dashboard shows task counts by status, the next events, how many build
+log entries were written in the last week and the latest logs and
+announcements; the build logbook shows log counts by category and the
+span of their dates. Instead of computing these from the full
+collections on every rerun, this module keeps them in per-collection views:
+counters by task status and lists of (timestamp, id) kept sorted with
+bisect, so each dashboard figure is a dict lookup, a bisect or a slice.
+Recurring events are kept per series; only their next occurrences are
+generated, when the upcoming events are read.
+
+Views are updated incrementally from storage's record-write listeners
+(insert/update/patch/delete). Each view remembers the collection version it
+reflects; a change it was not told about record by record (a whole
+collection save, a batch, another process) shows up as a different version,
+and the view is rebuilt from the collection on its next read.
+"""
+
+import threading
+from bisect import bisect_left, insort
+from datetime import datetime
+from itertools import islice
+
+import recurrence
+import storage
+
+# Message category shown as announcements
+ANNOUNCEMENT_CATEGORY = "Announcement"
+
+
+class SortedIndex:
+    """Records ordered by an integer timestamp (oldest first), with O(log n) range counts."""
+
+    def __init__(self):
+        self._keys = []
+        self._records = {}
+
+    def __len__(self):
+        return len(self._keys)
+
+    def add(self, ts, record):
+        key = (ts, str(record["id"]))
+        insort(self._keys, key)
+        self._records[key] = record
+
+    def remove(self, ts, record_id):
+        key = (ts, str(record_id))
+        position = bisect_left(self._keys, key)
+        if position < len(self._keys) and self._keys[position] == key:
+            del self._keys[position]
+            del self._records[key]
+
+    def count_after(self, ts):
+        """Number of records with a timestamp strictly after ts."""
+        return len(self._keys) - bisect_left(self._keys, (ts + 1,))
+
+    def first_after(self, ts, limit):
+        """The earliest records with a timestamp strictly after ts."""
+        position = bisect_left(self._keys, (ts + 1,))
+        return [self._records[key] for key in self._keys[position:position + limit]]
+
+    def span(self, after):
+        """The (earliest, latest) timestamps strictly after the given one, or None if there are none."""
+        position = bisect_left(self._keys, (after + 1,))
+        if position == len(self._keys):
+            return None
+        return self._keys[position][0], self._keys[-1][0]
+
+    def newest(self, limit):
+        """The latest records, newest first."""
+        return [self._records[key] for key in reversed(self._keys[-limit:])] if limit > 0 else []
+
+
+def _ts(record, field):
+    return record.get(f"{field}_ts") or 0
+
+
+class TaskView:
+    """Task counts by status."""
+
+    def __init__(self):
+        self.status_counts = {}
+        self.total = 0
+
+    def add(self, task):
+        status = task.get("status")
+        self.status_counts[status] = self.status_counts.get(status, 0) + 1
+        self.total += 1
+
+    def remove(self, task):
+        status = task.get("status")
+        self.status_counts[status] -= 1
+        if not self.status_counts[status]:
+            del self.status_counts[status]
+        self.total -= 1
+
+
+class LogView:
+    """Build log entries by date (rolling counts, the latest entries) and counts by category."""
+
+    def __init__(self):
+        self.by_date = SortedIndex()
+        self.category_counts = {}
+
+    def add(self, log):
+        self.by_date.add(_ts(log, "date"), log)
+        category = log.get("category")
+        self.category_counts[category] = self.category_counts.get(category, 0) + 1
+
+    def remove(self, log):
+        self.by_date.remove(_ts(log, "date"), log["id"])
+        category = log.get("category")
+        self.category_counts[category] -= 1
+        if not self.category_counts[category]:
+            del self.category_counts[category]
+
+
+class EventView:
+    """One-off events by start time, and recurring series, for the upcoming events list."""
+
+    def __init__(self):
+        self.by_start = SortedIndex()
+        # id -> recurring event; its occurrences are generated when read
+        self.series = {}
+
+    def add(self, event):
+        if recurrence.rule_of(event) is not None:
+            self.series[str(event["id"])] = event
+        else:
+            self.by_start.add(_ts(event, "start_time"), event)
+
+    def remove(self, event):
+        if self.series.pop(str(event["id"]), None) is None:
+            self.by_start.remove(_ts(event, "start_time"), event["id"])
+
+
+class MessageView:
+    """Announcements by timestamp."""
+
+    def __init__(self):
+        self.announcements = SortedIndex()
+
+    def add(self, message):
+        if message.get("category") == ANNOUNCEMENT_CATEGORY:
+            self.announcements.add(_ts(message, "timestamp"), message)
+
+    def remove(self, message):
+        if message.get("category") == ANNOUNCEMENT_CATEGORY:
+            self.announcements.remove(_ts(message, "timestamp"), message["id"])
+
+
+VIEW_CLASSES = {
+    "tasks": TaskView,
+    "logs": LogView,
+    "events": EventView,
+    "messages": MessageView,
+}
+
+_lock = threading.Lock()
+
+# collection -> (collection version, view)
+_views = {}
+
+
+def _build(name):
+    # The version must be the one the records belong to, or a write landing
+    # in between would later be applied to the view a second time
+    while True:
+        version = storage.collection_version(name)
+        items = storage.load_collection_shared(name)
+        if storage.collection_version(name) == version:
+            break
+
+    view = VIEW_CLASSES[name]()
+    for item in items:
+        if item.get("id") is not None:
+            view.add({**item, **storage._parse_times(item)})
+    return version, view
+
+
+def _view(name):
+    version = storage.collection_version(name)
+    with _lock:
+        cached = _views.get(name)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+    # Rebuilt outside the lock; a concurrent rebuild of the same version is harmless
+    cached = _build(name)
+    with _lock:
+        _views[name] = cached
+    return cached[1]
+
+
+def _on_write(name, before, after, removed, added):
+    with _lock:
+        cached = _views.get(name)
+        if cached is None:
+            return
+        # Only a view at the version just before this write, with no other
+        # write in between, can take the change incrementally
+        if cached[0] != before or after != before + 1:
+            del _views[name]
+            return
+        view = cached[1]
+        try:
+            for record in removed:
+                view.remove(record)
+            for record in added:
+                view.add(record)
+        except Exception:
+            # A view that may be half updated is rebuilt instead
+            del _views[name]
+            raise
+        _views[name] = (after, view)
+
+
+storage.add_listener(VIEW_CLASSES, _on_write)
+
+
+def task_counts():
+    """Return (total, {status: count}) for the tasks."""
+    view = _view("tasks")
+    with _lock:
+        return view.total, dict(view.status_counts)
+
+
+def upcoming_events(now, limit=5):
+    """Return the next events (or occurrences of recurring events) starting after now (a datetime), soonest first."""
+    view = _view("events")
+    now_ts = int(now.timestamp())
+    with _lock:
+        events = view.by_start.first_after(now_ts, limit)
+        series = list(view.series.values())
+
+    # Only the first few occurrences of each series can be among the next events
+    for event in series:
+        upcoming = (occurrence for occurrence in recurrence.occurrences(event, now) if occurrence["start_time_ts"] > now_ts)
+        events.extend(islice(upcoming, limit))
+    if series:
+        events.sort(key=lambda event: event["start_time_ts"])
+    return events[:limit]
+
+
+def next_event(now):
+    """Return the next event starting after now, or None."""
+    events = upcoming_events(now, limit=1)
+    return events[0] if events else None
+
+
+def log_count_since(since):
+    """Return the number of build log entries dated after since (a datetime)."""
+    view = _view("logs")
+    with _lock:
+        return view.by_date.count_after(int(since.timestamp()))
+
+
+def log_summary():
+    """Return (total, {category: count}, (first, last) datetimes of the dated entries or None) for the build logs."""
+    view = _view("logs")
+    with _lock:
+        total = len(view.by_date)
+        category_counts = dict(view.category_counts)
+        # Entries without a date are indexed at timestamp 0
+        span = view.by_date.span(0)
+    if span is not None:
+        span = tuple(datetime.fromtimestamp(ts) for ts in span)
+    return total, category_counts, span
+
+
+def recent_logs(limit=3):
+    """Return the latest build log entries, newest first."""
+    view = _view("logs")
+    with _lock:
+        return view.by_date.newest(limit)
+
+
+def recent_announcements(limit=3):
+    """Return the latest announcements, newest first."""
+    view = _view("messages")
+    with _lock:
+        return view.announcements.newest(limit)
@@ -1,6 +1,4 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
 from datetime import datetime, timedelta
 import os
 import json
@@ -8,7 +6,14 @@ import sys
 
 # Add the parent directory to the path to import from the app root
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from util import load_tasks, load_logs, load_events, load_messages
+from auth import restore_session
+from config import bootstrap
+import activity
+import metrics
+from figures import cached_figure
+
+# One-time process setup (settings, database tables); a no-op on later reruns
+bootstrap()
 
 # Page configuration
 st.set_page_config(
@@ -17,34 +22,28 @@ st.set_page_config(
     layout="wide"
 )
 
+# Restore the login from the session token after a refresh or reconnect
+restore_session()
+
 # Check if user is authenticated
 if 'authenticated' not in st.session_state or not st.session_state.authenticated:
     st.warning("Please login to access this page.")
     st.stop()
 
-# Initialize demo data
-import data
-
 # Page title
 st.title("Team Dashboard")
 st.write("Overview of team progress, upcoming events, and important metrics")
 
-# Load data
-tasks = load_tasks()
-logs = load_logs()
-events = load_events()
-messages = load_messages()
-
-# Calculate metrics
-total_tasks = len(tasks)
-completed_tasks = sum(1 for task in tasks if task.get("status") == "Completed")
-in_progress_tasks = sum(1 for task in tasks if task.get("status") == "In Progress")
+# Metrics are kept up to date by metrics.py as records change, so the
+# dashboard never loads the full collections
+total_tasks, status_counts = metrics.task_counts()
+completed_tasks = status_counts.get("Completed", 0)
+in_progress_tasks = status_counts.get("In Progress", 0)
 pending_tasks = total_tasks - completed_tasks - in_progress_tasks
 
-# Filter upcoming events
+# Next upcoming events
 now = datetime.now()
-upcoming_events = [event for event in events if datetime.fromisoformat(event.get("start_time")) > now]
-upcoming_events.sort(key=lambda x: datetime.fromisoformat(x.get("start_time")))
+upcoming_events = metrics.upcoming_events(now, limit=5)
 
 # Create metrics row
 col1, col2, col3, col4 = st.columns(4)
@@ -62,14 +61,14 @@ with col3:
     
     if upcoming_events:
         next_event = upcoming_events[0]
-        next_event_date = datetime.fromisoformat(next_event.get("start_time"))
+        next_event_date = next_event["start_time_dt"]
         days_to_next_event = (next_event_date - now).days
         event_name = next_event.get("title")
     
     st.metric(label=f"Next Event: {event_name}", value=f"{days_to_next_event} days" if days_to_next_event is not None else "N/A")
 
 with col4:
-    recent_logs = len([log for log in logs if datetime.fromisoformat(log.get("date")) > (now - timedelta(days=7))])
+    recent_logs = metrics.log_count_since(now - timedelta(days=7))
     st.metric(label="Weekly Build Log Entries", value=recent_logs)
 
 # Create main dashboard layout
@@ -80,27 +79,33 @@ with left_col:
     st.subheader("Task Progress")
     
     if total_tasks > 0:
-        # Create data for pie chart
-        task_status = {
-            "Status": ["Completed", "In Progress", "Pending"],
-            "Count": [completed_tasks, in_progress_tasks, pending_tasks]
-        }
-        
-        df_status = pd.DataFrame(task_status)
-        
-        # Set colors for each status
-        colors = {"Completed": "#28a745", "In Progress": "#ffc107", "Pending": "#6c757d"}
-        
-        # Create pie chart
-        fig = px.pie(
-            df_status, 
-            names="Status", 
-            values="Count",
-            color="Status",
-            color_discrete_map=colors,
-            title="Task Status Distribution"
-        )
+        def build_status_chart():
+            import pandas as pd
+            import plotly.express as px
+            
+            # Create data for pie chart
+            task_status = {
+                "Status": ["Completed", "In Progress", "Pending"],
+                "Count": [completed_tasks, in_progress_tasks, pending_tasks]
+            }
+            
+            df_status = pd.DataFrame(task_status)
+            
+            # Set colors for each status
+            colors = {"Completed": "#28a745", "In Progress": "#ffc107", "Pending": "#6c757d"}
+            
+            # Create pie chart
+            return px.pie(
+                df_status, 
+                names="Status", 
+                values="Count",
+                color="Status",
+                color_discrete_map=colors,
+                title="Task Status Distribution"
+            )
         
+        # Cached until the tasks change, see figures.py
+        fig = cached_figure("dashboard_task_status", ["tasks"], build_status_chart)
         st.plotly_chart(fig, use_container_width=True)
     else:
         st.info("No tasks available. Create tasks in the Project Management section.")
@@ -108,14 +113,12 @@ with left_col:
     # Recent Build Log Entries
     st.subheader("Recent Build Log Entries")
     
-    if logs:
-        # Sort logs by date (newest first)
-        sorted_logs = sorted(logs, key=lambda x: datetime.fromisoformat(x.get("date")), reverse=True)
-        recent_logs = sorted_logs[:3]  # Get 3 most recent logs
-        
+    recent_logs = metrics.recent_logs(3)  # 3 most recent logs
+    
+    if recent_logs:
         for i, log in enumerate(recent_logs):
-            log_date = datetime.fromisoformat(log.get("date"))
-            formatted_date = log_date.strftime("%m/%d/%Y")
+            log_date = log["date_dt"]
+            formatted_date = log_date.strftime("%m/%d/%Y") if log_date else "No date"
             
             with st.expander(f"{log.get('title')} - {formatted_date}"):
                 st.write(f"**Category:** {log.get('category')}")
@@ -129,8 +132,8 @@ with right_col:
     st.subheader("Upcoming Events")
     
     if upcoming_events:
-        for i, event in enumerate(upcoming_events[:5]):  # Show next 5 events
-            event_start = datetime.fromisoformat(event.get("start_time"))
+        for i, event in enumerate(upcoming_events):  # Show next 5 events
+            event_start = event["start_time_dt"]
             formatted_date = event_start.strftime("%a, %b %d, %Y")
             formatted_time = event_start.strftime("%I:%M %p")
             
@@ -161,15 +164,12 @@ with right_col:
     # Recent Team Announcements
     st.subheader("Team Announcements")
     
-    # Filter announcements
-    announcements = [msg for msg in messages if msg.get("category") == "Announcement"]
+    # 3 most recent announcements
+    announcements = metrics.recent_announcements(3)
     
     if announcements:
-        # Sort by timestamp (newest first)
-        sorted_announcements = sorted(announcements, key=lambda x: datetime.fromisoformat(x.get("timestamp")), reverse=True)
-        
-        for i, announcement in enumerate(sorted_announcements[:3]):  # Show 3 most recent
-            announcement_date = datetime.fromisoformat(announcement.get("timestamp"))
+        for i, announcement in enumerate(announcements):
+            announcement_date = announcement["timestamp_dt"]
             formatted_date = announcement_date.strftime("%m/%d/%Y")
             
             with st.expander(f"{announcement.get('title')} - {formatted_date}"):
@@ -182,46 +182,8 @@ with right_col:
 st.markdown("---")
 st.subheader("Recent Team Activity")
 
-# Combine logs, tasks and messages for activity feed
-activities = []
-
-# Add log entries
-for log in logs:
-    activities.append({
-        "type": "Log Entry",
-        "description": f"Added build log: {log.get('title')}",
-        "user": log.get('author'),
-        "timestamp": log.get('date')
-    })
-
-# Add tasks with status changes
-for task in tasks:
-    if task.get("status") == "Completed":
-        activities.append({
-            "type": "Task",
-            "description": f"Completed task: {task.get('title')}",
-            "user": task.get('assigned_to'),
-            "timestamp": datetime.now().isoformat()  # This would normally come from task history
-        })
-    elif task.get("status") == "In Progress":
-        activities.append({
-            "type": "Task",
-            "description": f"Started task: {task.get('title')}",
-            "user": task.get('assigned_to'),
-            "timestamp": task.get('created_at')
-        })
-
-# Add messages
-for message in messages:
-    activities.append({
-        "type": "Message",
-        "description": f"Posted: {message.get('title', 'Response')}",
-        "user": message.get('author'),
-        "timestamp": message.get('timestamp')
-    })
-
-# Sort activities by timestamp (newest first)
-activities.sort(key=lambda x: datetime.fromisoformat(x.get("timestamp")), reverse=True)
+# Newest entries of the activity stream, read from its tail
+activities = activity.recent(10)
 
 # Display activities
 if activities:
@@ -232,14 +194,16 @@ if activities:
         "Type": []
     }
     
-    for activity in activities[:10]:  # Show 10 most recent activities
-        activity_date = datetime.fromisoformat(activity.get("timestamp"))
-        formatted_date = activity_date.strftime("%m/%d/%Y %I:%M %p")
+    for entry in activities:
+        activity_date = entry["timestamp_dt"]
+        formatted_date = activity_date.strftime("%m/%d/%Y %I:%M %p") if activity_date else ""
         
         activity_data["Date"].append(formatted_date)
-        activity_data["User"].append(activity.get("user"))
-        activity_data["Activity"].append(activity.get("description"))
-        activity_data["Type"].append(activity.get("type"))
+        activity_data["User"].append(entry.get("user"))
+        activity_data["Activity"].append(entry.get("description"))
+        activity_data["Type"].append(entry.get("type"))
+    
+    import pandas as pd
     
     activity_df = pd.DataFrame(activity_data)
     st.dataframe(activity_df, use_container_width=True)
@@ -1,14 +1,21 @@
 import streamlit as st
-import pandas as pd
 import json
 import os
 import sys
 from datetime import datetime, timedelta
-import plotly.graph_objects as go
 
 # Add the parent directory to the path to import from the app root
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from util import load_events, save_events, check_role_access
+from auth import restore_session
+from config import bootstrap
+from figures import cached_figure
+import intervals
+import recurrence
+import scheduling
+from util import load_events, check_role_access, generate_id, insert_record, patch_record, delete_record, record_activity
+
+# One-time process setup (settings, database tables); a no-op on later reruns
+bootstrap()
 
 # Page configuration
 st.set_page_config(
@@ -17,6 +24,9 @@ st.set_page_config(
     layout="wide"
 )
 
+# Restore the login from the session token after a refresh or reconnect
+restore_session()
+
 # Check if user is authenticated
 if 'authenticated' not in st.session_state or not st.session_state.authenticated:
     st.warning("Please login to access this page.")
@@ -31,6 +41,8 @@ if 'show_event_form' not in st.session_state:
     st.session_state.show_event_form = False
 if 'editing_event' not in st.session_state:
     st.session_state.editing_event = None
+if 'changing_occurrence' not in st.session_state:
+    st.session_state.changing_occurrence = None
 
 # Define event categories and colors
 EVENT_CATEGORIES = ["Meeting", "Competition", "Outreach", "Testing", "Workshop", "Other"]
@@ -43,13 +55,12 @@ EVENT_COLORS = {
     "Other": "#6c757d"
 }
 
+# Recurrence options of the event form
+REPEAT_OPTIONS = {"Does not repeat": None, "Daily": "DAILY", "Weekly": "WEEKLY", "Monthly": "MONTHLY"}
+
 # Load events
 events = load_events()
 
-# Helper function to parse datetime strings
-def parse_datetime(dt_str):
-    return datetime.fromisoformat(dt_str)
-
 # Function to toggle event form visibility
 def toggle_event_form():
     st.session_state.show_event_form = not st.session_state.show_event_form
@@ -60,20 +71,36 @@ def edit_event(event_id):
     st.session_state.editing_event = event_id
     st.session_state.show_event_form = True
 
+# Function to cancel one occurrence of a recurring event
+def skip_occurrence(event, occurrence):
+    exceptions = sorted(set(event.get('exceptions') or []) | {occurrence})
+    patch_record("events", event['id'], {'exceptions': exceptions})
+    st.success("Occurrence cancelled.")
+    st.rerun()
+
+# Function to change one occurrence of a recurring event (moved, another
+# room); no changes restores the occurrence to the series' time and place
+def change_occurrence(event, occurrence, changes):
+    overrides = dict(event.get('overrides') or {})
+    if changes:
+        overrides[occurrence] = changes
+    else:
+        overrides.pop(occurrence, None)
+    patch_record("events", event['id'], {'overrides': overrides})
+    st.session_state.changing_occurrence = None
+    st.success("Occurrence updated.")
+    st.rerun()
+
 # Function to delete an event
 def delete_event(event_id):
-    global events
-    events = [event for event in events if event['id'] != event_id]
-    save_events(events)
+    delete_record("events", event_id)
     st.success("Event deleted successfully!")
     st.rerun()
 
-# Create tabs for different calendar views
-tab1, tab2, tab3 = st.tabs(["Calendar View", "List View", "Add/Edit Event"])
-
-with tab1:
-    st.subheader("Calendar View")
-    
+# Month grid with its navigation. It is a fragment: moving to the previous or
+# next month reruns only the grid, not the event list, forms and timeline.
+@st.fragment
+def month_calendar():
     # Create month navigation
     if 'current_month' not in st.session_state:
         st.session_state.current_month = datetime.now().month
@@ -89,6 +116,7 @@ with tab1:
                 st.session_state.current_year -= 1
             else:
                 st.session_state.current_month -= 1
+            st.rerun(scope="fragment")
     
     with col2:
         st.subheader(f"{datetime(st.session_state.current_year, st.session_state.current_month, 1).strftime('%B %Y')}")
@@ -100,6 +128,7 @@ with tab1:
                 st.session_state.current_year += 1
             else:
                 st.session_state.current_month += 1
+            st.rerun(scope="fragment")
     
     # Create calendar view
     # Get first and last day of the current month
@@ -125,20 +154,9 @@ with tab1:
         with col:
             st.markdown(f"**{days_of_week[i]}**")
     
-    # Filter events for current month
-    month_events = [
-        event for event in events 
-        if parse_datetime(event['start_time']).month == st.session_state.current_month 
-        and parse_datetime(event['start_time']).year == st.session_state.current_year
-    ]
-    
-    # Group events by date
-    events_by_date = {}
-    for event in month_events:
-        event_date = parse_datetime(event['start_time']).date()
-        if event_date not in events_by_date:
-            events_by_date[event_date] = []
-        events_by_date[event_date].append(event)
+    # Events overlapping the month from the interval index, listed under
+    # every day they span (multi-day events appear on each of their days)
+    events_by_date = intervals.events_by_day(first_day, last_day + timedelta(days=1))
     
     # Display calendar days
     day_counter = 1 - first_weekday
@@ -162,20 +180,34 @@ with tab1:
                     # Display events for this day
                     if current_date in events_by_date:
                         for event in events_by_date[current_date]:
-                            event_start = parse_datetime(event['start_time'])
+                            event_start = event['start_time_dt']
                             event_category = event.get('category', 'Other')
                             event_color = EVENT_COLORS.get(event_category, "#6c757d")
                             
+                            # Later days of a multi-day event are marked as continuing
+                            if event_start.date() == current_date:
+                                event_label = f"{event_start.strftime('%H:%M')} {event['title']}"
+                            else:
+                                event_label = f"↳ {event['title']}"
+                            
                             st.markdown(
                                 f"""
                                 <div style="background-color:{event_color}; padding:2px 5px; border-radius:3px; margin:2px 0; color:white; font-size:0.8em">
-                                    {event_start.strftime('%H:%M')} {event['title']}
+                                    {event_label}
                                 </div>
                                 """, 
                                 unsafe_allow_html=True
                             )
                 day_counter += 1
 
+# Create tabs for different calendar views
+tab1, tab2, tab3 = st.tabs(["Calendar View", "List View", "Add/Edit Event"])
+
+with tab1:
+    st.subheader("Calendar View")
+    
+    month_calendar()
+
 with tab2:
     st.subheader("Event List")
     
@@ -192,63 +224,65 @@ with tab2:
     with col3:
         days_to_show = st.number_input("Days to show", min_value=7, max_value=365, value=30, step=1)
     
-    # Apply filters
-    filtered_events = events.copy()
-    
-    if filter_category != "All":
-        filtered_events = [event for event in filtered_events if event.get('category') == filter_category]
-    
+    # Apply filters; time windows are answered by the interval index
     now = datetime.now()
-    if filter_time == "Upcoming":
-        filtered_events = [event for event in filtered_events if parse_datetime(event['start_time']) > now]
-    elif filter_time == "Past":
-        filtered_events = [event for event in filtered_events if parse_datetime(event['start_time']) < now]
-    elif filter_time == "Today":
-        filtered_events = [
-            event for event in filtered_events 
-            if parse_datetime(event['start_time']).date() == now.date()
-        ]
-    
-    # Further filter by days to show
     if filter_time == "Upcoming":
         future_date = now + timedelta(days=days_to_show)
         filtered_events = [
-            event for event in filtered_events 
-            if parse_datetime(event['start_time']) < future_date
+            event for event in intervals.events_between(now, future_date)
+            if event['start_time_dt'] > now
         ]
     elif filter_time == "Past":
         past_date = now - timedelta(days=days_to_show)
         filtered_events = [
-            event for event in filtered_events 
-            if parse_datetime(event['start_time']) > past_date
+            event for event in intervals.events_between(past_date, now)
+            if past_date < event['start_time_dt'] < now
         ]
+    elif filter_time == "Today":
+        # Includes multi-day events that started before today
+        filtered_events = intervals.events_on(now.date())
+    else:
+        # Every event; repeating ones are expanded from their first date up
+        # to the shown number of days ahead, so an endless series stays finite
+        horizon = now + timedelta(days=days_to_show)
+        filtered_events = []
+        for event in events:
+            if recurrence.rule_of(event) is None or event.get('start_time_dt') is None:
+                filtered_events.append(event)
+            else:
+                filtered_events.extend(recurrence.occurrences(event, event['start_time_dt'], horizon))
+    
+    if filter_category != "All":
+        filtered_events = [event for event in filtered_events if event.get('category') == filter_category]
     
-    # Sort events by start time
-    filtered_events.sort(key=lambda x: parse_datetime(x['start_time']))
+    # Sort events by start time; events without a readable start go last
+    filtered_events.sort(key=lambda x: (x.get('start_time_ts') is None, x.get('start_time_ts') or 0))
     
     # Display events in a table or list
     if filtered_events:
-        # Create dataframe for display
+        # Rows for display
         event_data = []
         for event in filtered_events:
-            event_start = parse_datetime(event['start_time'])
-            event_end = parse_datetime(event['end_time'])
+            event_start = event.get('start_time_dt')
+            event_end = event.get('end_time_dt') or event_start
             
             event_data.append({
-                "Date": event_start.strftime("%a, %b %d, %Y"),
-                "Time": f"{event_start.strftime('%I:%M %p')} - {event_end.strftime('%I:%M %p')}",
+                "Date": event_start.strftime("%a, %b %d, %Y") if event_start else "No date",
+                "Time": f"{event_start.strftime('%I:%M %p')} - {event_end.strftime('%I:%M %p')}" if event_start else "",
                 "Title": event['title'],
                 "Location": event['location'],
                 "Category": event.get('category', 'Other'),
                 "ID": event['id']
             })
         
-        event_df = pd.DataFrame(event_data)
-        
         # Display each event as an expandable card
-        for i, row in event_df.iterrows():
+        for row, event in zip(event_data, filtered_events):
             event_id = row['ID']
-            event = next((e for e in events if e['id'] == event_id), None)
+            
+            # Occurrences of a recurring event share its id
+            occurrence = event.get('occurrence')
+            widget_key = f"{event_id}_{occurrence}" if occurrence else event_id
+            rule = recurrence.rule_of(event)
             
             if event:
                 event_category = event.get('category', 'Other')
@@ -261,16 +295,65 @@ with tab2:
                     st.markdown(f"**Description:** {event['description']}")
                     st.markdown(f"**Organizer:** {event['organizer']}")
                     st.markdown(f"**Participants:** {', '.join(event['participants'])}")
+                    if rule:
+                        st.markdown(f"**Repeats:** {recurrence.describe(rule)}")
                     
                     # Only admin and lead can edit/delete events
                     if st.session_state.role in ['admin', 'lead']:
-                        col1, col2 = st.columns(2)
+                        series = next((e for e in events if e['id'] == event_id), event)
+                        col1, col2, col3, col4 = st.columns(4)
                         with col1:
-                            if st.button("Edit Event", key=f"edit_{event_id}"):
+                            if st.button("Edit Series" if rule else "Edit Event", key=f"edit_{widget_key}"):
                                 edit_event(event_id)
                         with col2:
-                            if st.button("Delete Event", key=f"delete_{event_id}"):
+                            if st.button("Delete Series" if rule else "Delete Event", key=f"delete_{widget_key}"):
                                 delete_event(event_id)
+                        with col3:
+                            if occurrence and st.button("Change This Date", key=f"change_{widget_key}"):
+                                st.session_state.changing_occurrence = widget_key
+                        with col4:
+                            if occurrence and st.button("Cancel This Date", key=f"skip_{widget_key}"):
+                                skip_occurrence(series, occurrence)
+                        
+                        # Move this occurrence or change its location without touching the series
+                        if occurrence and st.session_state.changing_occurrence == widget_key:
+                            with st.form(f"occurrence_form_{widget_key}"):
+                                change_col1, change_col2, change_col3 = st.columns(3)
+                                with change_col1:
+                                    occurrence_date = st.date_input("Date", value=event['start_time_dt'].date())
+                                with change_col2:
+                                    occurrence_start = st.time_input("Start Time", value=event['start_time_dt'].time())
+                                with change_col3:
+                                    occurrence_end = st.time_input("End Time", value=event['end_time_dt'].time())
+                                occurrence_location = st.text_input("Location", value=event.get('location', ''))
+                                
+                                form_col1, form_col2, form_col3 = st.columns(3)
+                                with form_col1:
+                                    save_occurrence = st.form_submit_button("Save This Date")
+                                with form_col2:
+                                    restore_occurrence = st.form_submit_button(
+                                        "Restore Original",
+                                        disabled=occurrence not in (series.get('overrides') or {})
+                                    )
+                                with form_col3:
+                                    close_occurrence = st.form_submit_button("Close")
+                                
+                                if save_occurrence:
+                                    # A change ending before it starts runs past midnight
+                                    new_start = datetime.combine(occurrence_date, occurrence_start)
+                                    new_end = datetime.combine(occurrence_date, occurrence_end)
+                                    if new_end <= new_start:
+                                        new_end += timedelta(days=1)
+                                    change_occurrence(series, occurrence, {
+                                        'start_time': new_start.isoformat(),
+                                        'end_time': new_end.isoformat(),
+                                        'location': occurrence_location
+                                    })
+                                if restore_occurrence:
+                                    change_occurrence(series, occurrence, None)
+                                if close_occurrence:
+                                    st.session_state.changing_occurrence = None
+                                    st.rerun()
     else:
         st.info("No events found matching the selected filters.")
 
@@ -297,10 +380,13 @@ with tab3:
                 default_description = event_to_edit['description']
                 default_location = event_to_edit['location']
                 default_category = event_to_edit.get('category', 'Other')
-                default_start = parse_datetime(event_to_edit['start_time'])
-                default_end = parse_datetime(event_to_edit['end_time'])
+                default_start = event_to_edit['start_time_dt']
+                default_end = event_to_edit['end_time_dt']
                 default_organizer = event_to_edit['organizer']
                 default_participants = ", ".join(event_to_edit['participants'])
+                default_rule = recurrence.rule_of(event_to_edit)
+                default_exceptions = event_to_edit.get('exceptions') or []
+                default_overrides = event_to_edit.get('overrides') or {}
             else:
                 form_title = "Add New Event"
                 
@@ -313,9 +399,20 @@ with tab3:
                 default_end = default_start + timedelta(hours=1)
                 default_organizer = st.session_state.user
                 default_participants = ""
+                default_rule = None
+                default_exceptions = []
+                default_overrides = {}
             
             st.subheader(form_title)
             
+            # Cancelled and changed dates are keyed by the original date of the occurrence
+            if default_exceptions or default_overrides:
+                st.info(
+                    f"This series has {len(default_exceptions)} cancelled and {len(default_overrides)} changed "
+                    "dates. If you change its start date or how it repeats, those that no longer fall on a "
+                    "date of the series are removed."
+                )
+            
             with st.form("event_form"):
                 event_title = st.text_input("Event Title*", value=default_title)
                 event_description = st.text_area("Description", value=default_description)
@@ -333,12 +430,92 @@ with tab3:
                 event_organizer = st.text_input("Organizer*", value=default_organizer)
                 event_participants = st.text_input("Participants (comma separated)", value=default_participants)
                 
-                col1, col2 = st.columns(2)
+                # Recurrence is stored as one rule; occurrences are generated when shown
+                repeat_col1, repeat_col2, repeat_col3, repeat_col4 = st.columns(4)
+                with repeat_col1:
+                    repeat_options = list(REPEAT_OPTIONS)
+                    default_repeat = next((label for label, freq in REPEAT_OPTIONS.items() if default_rule and freq == default_rule.freq), repeat_options[0])
+                    repeat = st.selectbox("Repeats", repeat_options, index=repeat_options.index(default_repeat))
+                with repeat_col2:
+                    repeat_interval = st.number_input("Every (days/weeks/months)", min_value=1, max_value=52, value=default_rule.interval if default_rule else 1)
+                with repeat_col3:
+                    repeat_days = st.multiselect(
+                        "On (weekly)",
+                        recurrence.WEEKDAY_NAMES,
+                        default=[recurrence.WEEKDAY_NAMES[day] for day in default_rule.byday] if default_rule else []
+                    )
+                with repeat_col4:
+                    repeat_until = st.date_input("Until (optional)", value=default_rule.until if default_rule else None)
+                
+                col1, col2, col3 = st.columns(3)
                 with col1:
                     submit_button = st.form_submit_button("Save Event")
                 with col2:
+                    check_button = st.form_submit_button("Check Availability")
+                with col3:
                     cancel_button = st.form_submit_button("Cancel")
                 
+                # Build the recurrence rule, if any
+                repeat_freq = REPEAT_OPTIONS[repeat]
+                repeat_rule = None
+                if repeat_freq:
+                    repeat_rule = recurrence.format_rule(recurrence.Rule(
+                        repeat_freq,
+                        int(repeat_interval),
+                        tuple(sorted(recurrence.WEEKDAY_NAMES.index(day) for day in repeat_days)) if repeat_freq == "WEEKLY" else (),
+                        repeat_until,
+                        default_rule.count if default_rule and default_rule.freq == repeat_freq else None
+                    ))
+                
+                if check_button:
+                    # Who among the participants is already booked, and when they are all free
+                    check_start = datetime.combine(event_date, event_start_time)
+                    check_end = datetime.combine(end_date, event_end_time)
+                    check_participants = [p.strip() for p in event_participants.split(",") if p.strip()]
+                    
+                    if not check_participants:
+                        st.info("Enter participants to check their availability.")
+                    elif check_end <= check_start:
+                        st.error("End time must be after start time")
+                    else:
+                        # A repeating event is checked on each of its dates in the next 90 days;
+                        # dates of the series already cancelled are skipped
+                        proposal = {
+                            'start_time_dt': check_start,
+                            'end_time_dt': check_end,
+                            'recurrence': repeat_rule,
+                            'exceptions': default_exceptions,
+                            'overrides': default_overrides
+                        }
+                        if repeat_rule:
+                            proposal['exceptions'], proposal['overrides'] = recurrence.current_adjustments(proposal)
+                        busy_dates = scheduling.series_clashes(check_participants, proposal, exclude_id=st.session_state.editing_event)
+                        
+                        if repeat_rule:
+                            checked_dates = sum(1 for _ in recurrence.occurrences(proposal, check_start, check_start + scheduling.SERIES_WINDOW))
+                            st.caption(f"Checked {checked_dates} dates of the series in the next {scheduling.SERIES_WINDOW.days} days.")
+                        for occurrence, busy in busy_dates:
+                            if repeat_rule:
+                                st.markdown(f"**{occurrence['start_time_dt'].strftime('%a %b %d, %Y')}**")
+                            for name, clashing in busy.items():
+                                booked = "; ".join(
+                                    f"{event['title']} ({event['start_time_dt'].strftime('%a %b %d, %I:%M %p')} - {event['end_time_dt'].strftime('%I:%M %p')})"
+                                    for event in clashing
+                                )
+                                st.warning(f"**{name}** is already booked: {booked}")
+                        if not busy_dates:
+                            st.success("Everyone is free on every date." if repeat_rule else "Everyone is free at this time.")
+                        
+                        # Free slots of the same length in the week from the chosen date
+                        search_start = max(datetime.combine(event_date, datetime.min.time()), datetime.now())
+                        slots = scheduling.free_slots(check_participants, search_start, search_start + timedelta(days=7), check_end - check_start, exclude_id=st.session_state.editing_event)
+                        if slots:
+                            st.markdown("**Times everyone is free (next 7 days):**")
+                            for slot_start, slot_end in slots[:8]:
+                                st.markdown(f"- {slot_start.strftime('%a %b %d, %I:%M %p')} - {slot_end.strftime('%I:%M %p')}")
+                        else:
+                            st.info("No common free time of this length in the next 7 days.")
+                
                 if cancel_button:
                     st.session_state.show_event_form = False
                     st.session_state.editing_event = None
@@ -356,29 +533,41 @@ with tab3:
                         # Validate end time is after start time
                         if event_end_datetime <= event_start_datetime:
                             st.error("End time must be after start time")
+                        elif repeat_until and repeat_until < event_date:
+                            st.error("A repeating event must repeat until a date after it starts")
                         else:
                             # Process participant list
                             participants_list = [p.strip() for p in event_participants.split(",") if p.strip()]
                             
                             if editing:
-                                # Update existing event
-                                for event in events:
-                                    if event['id'] == st.session_state.editing_event:
-                                        event['title'] = event_title
-                                        event['description'] = event_description
-                                        event['start_time'] = event_start_datetime.isoformat()
-                                        event['end_time'] = event_end_datetime.isoformat()
-                                        event['location'] = event_location
-                                        event['organizer'] = event_organizer
-                                        event['participants'] = participants_list
-                                        event['category'] = event_category
-                                        break
+                                # Update only the edited event
+                                changes = {
+                                    'title': event_title,
+                                    'description': event_description,
+                                    'start_time': event_start_datetime.isoformat(),
+                                    'end_time': event_end_datetime.isoformat(),
+                                    'location': event_location,
+                                    'organizer': event_organizer,
+                                    'participants': participants_list,
+                                    'category': event_category,
+                                    'recurrence': repeat_rule
+                                }
+                                
+                                # Drop cancelled and changed dates the edited series no longer has
+                                if default_exceptions or default_overrides:
+                                    if repeat_rule:
+                                        edited_event = {**event_to_edit, 'start_time_dt': event_start_datetime, 'recurrence': repeat_rule}
+                                        changes['exceptions'], changes['overrides'] = recurrence.current_adjustments(edited_event)
+                                    else:
+                                        changes['exceptions'], changes['overrides'] = [], {}
+                                
+                                patch_record("events", st.session_state.editing_event, changes)
                                 
                                 success_message = "Event updated successfully!"
                             else:
                                 # Create new event
                                 new_event = {
-                                    'id': f"event{len(events) + 1:03d}",
+                                    'id': f"event{generate_id()}",
                                     'title': event_title,
                                     'description': event_description,
                                     'start_time': event_start_datetime.isoformat(),
@@ -388,13 +577,13 @@ with tab3:
                                     'participants': participants_list,
                                     'category': event_category
                                 }
+                                if repeat_rule:
+                                    new_event['recurrence'] = repeat_rule
                                 
-                                events.append(new_event)
+                                insert_record("events", new_event)
+                                record_activity("Event", f"Scheduled event: {event_title}")
                                 success_message = "Event created successfully!"
                             
-                            # Save events to file
-                            save_events(events)
-                            
                             # Reset form state
                             st.session_state.show_event_form = False
                             st.session_state.editing_event = None
@@ -410,66 +599,75 @@ st.subheader("Upcoming Events Timeline")
 now = datetime.now()
 future_date = now + timedelta(days=30)  # Show next 30 days
 upcoming_events = [
-    event for event in events 
-    if parse_datetime(event['start_time']) > now and parse_datetime(event['start_time']) < future_date
+    event for event in intervals.events_between(now, future_date)
+    if event['start_time_dt'] > now
 ]
-upcoming_events.sort(key=lambda x: parse_datetime(x['start_time']))
 
 if upcoming_events:
-    # Create timeline data
-    timeline_data = []
-    for event in upcoming_events:
-        event_start = parse_datetime(event['start_time'])
-        event_end = parse_datetime(event['end_time'])
-        event_category = event.get('category', 'Other')
+    def build_timeline_chart():
+        # Create timeline data
+        timeline_data = []
+        for event in upcoming_events:
+            event_start = event['start_time_dt']
+            event_end = event['end_time_dt']
+            event_category = event.get('category', 'Other')
+            
+            # Create timeline entry
+            timeline_data.append({
+                "Task": event['title'],
+                "Start": event_start,
+                "Finish": event_end,
+                "Category": event_category
+            })
         
-        # Create timeline entry
-        timeline_data.append({
-            "Task": event['title'],
-            "Start": event_start,
-            "Finish": event_end,
-            "Category": event_category
-        })
-    
-    # Create Gantt chart
-    df = pd.DataFrame(timeline_data)
-    
-    fig = go.Figure()
-    
-    for i, task in enumerate(df["Task"]):
-        task_start = df.Start[i]
-        task_end = df.Finish[i]
-        task_category = df.Category[i]
-        task_color = EVENT_COLORS.get(task_category, "#6c757d")
+        # Create Gantt chart
+        import pandas as pd
+        import plotly.graph_objects as go
         
-        # Add task to Gantt chart
-        fig.add_trace(go.Bar(
-            x=[task_end - task_start],
-            y=[task],
-            orientation='h',
-            base=task_start,
-            marker_color=task_color,
-            text=task_category,
-            hoverinfo="text",
-            showlegend=False
-        ))
-    
-    # Update layout
-    fig.update_layout(
-        title="Team Events Timeline (Next 30 Days)",
-        xaxis_title="Date",
-        yaxis_title="Event",
-        height=400,
-        xaxis=dict(
-            type='date',
-            tickformat='%d %b',
-            tickangle=-45
-        ),
-        yaxis=dict(
-            autorange="reversed"
+        df = pd.DataFrame(timeline_data)
+        
+        fig = go.Figure()
+        
+        for i, task in enumerate(df["Task"]):
+            task_start = df.Start[i]
+            task_end = df.Finish[i]
+            task_category = df.Category[i]
+            task_color = EVENT_COLORS.get(task_category, "#6c757d")
+            
+            # Add task to Gantt chart
+            fig.add_trace(go.Bar(
+                x=[task_end - task_start],
+                y=[task],
+                orientation='h',
+                base=task_start,
+                marker_color=task_color,
+                text=task_category,
+                hoverinfo="text",
+                showlegend=False
+            ))
+        
+        # Update layout
+        fig.update_layout(
+            title="Team Events Timeline (Next 30 Days)",
+            xaxis_title="Date",
+            yaxis_title="Event",
+            height=400,
+            xaxis=dict(
+                type='date',
+                tickformat='%d %b',
+                tickangle=-45
+            ),
+            yaxis=dict(
+                autorange="reversed"
+            )
         )
-    )
+        return fig
     
+    # Cached until the events or the set of upcoming events change, see figures.py
+    fig = cached_figure(
+        "calendar_timeline", ["events"], build_timeline_chart,
+        params={"events": [[event.get("id"), event.get("occurrence")] for event in upcoming_events]}
+    )
     st.plotly_chart(fig, use_container_width=True)
     
     # Create legend
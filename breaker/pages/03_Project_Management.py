@@ -1,14 +1,20 @@
 import streamlit as st
-import pandas as pd
 import json
 import os
 import sys
 from datetime import datetime, timedelta
-import plotly.express as px
 
 # Add the parent directory to the path to import from the app root
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from util import load_tasks, save_tasks, check_role_access, generate_id
+import archive
+import metrics
+from auth import restore_session
+from config import bootstrap
+from figures import cached_figure
+from util import load_tasks, generate_id, insert_record, patch_record, delete_record, collection_frame, record_activity, unit_of_work
+
+# One-time process setup (settings, database tables); a no-op on later reruns
+bootstrap()
 
 # Page configuration
 st.set_page_config(
@@ -17,6 +23,9 @@ st.set_page_config(
     layout="wide"
 )
 
+# Restore the login from the session token after a refresh or reconnect
+restore_session()
+
 # Check if user is authenticated
 if 'authenticated' not in st.session_state or not st.session_state.authenticated:
     st.warning("Please login to access this page.")
@@ -51,16 +60,12 @@ team_member_names = [member["name"] for member in team_members]
 # View selector
 view_col1, view_col2, view_col3 = st.columns([1, 2, 1])
 with view_col1:
-    view_options = ["Kanban Board", "List View", "Analytics"]
-    selected_view = st.radio("View Mode", view_options, horizontal=True, index=view_options.index("Kanban Board") if st.session_state.view_mode == "kanban" else (view_options.index("List View") if st.session_state.view_mode == "list" else view_options.index("Analytics")))
+    view_modes = {"Kanban Board": "kanban", "List View": "list", "Analytics": "analytics", "Archive": "archive"}
+    view_options = list(view_modes)
+    selected_view = st.radio("View Mode", view_options, horizontal=True, index=list(view_modes.values()).index(st.session_state.view_mode))
     
     # Update view mode in session state
-    if selected_view == "Kanban Board":
-        st.session_state.view_mode = "kanban"
-    elif selected_view == "List View":
-        st.session_state.view_mode = "list"
-    else:
-        st.session_state.view_mode = "analytics"
+    st.session_state.view_mode = view_modes[selected_view]
 
 with view_col3:
     # Only admin and lead can add tasks
@@ -69,14 +74,26 @@ with view_col3:
             st.session_state.new_task = True
             st.session_state.edit_task_id = None
 
-# Function to handle task status change
-def change_task_status(task_id, new_status):
-    for task in tasks:
-        if task["id"] == task_id:
-            task["status"] = new_status
-            save_tasks(tasks)
-            break
-    st.rerun()
+# Function to handle task status change; the change and its activity entry
+# are flushed together when the rerun starts
+def change_task_status(task, new_status, rerun_scope="app"):
+    with unit_of_work():
+        # Completion time decides when a task is archived
+        patch_record("tasks", task["id"], {
+            "status": new_status,
+            "completed_at": datetime.now().isoformat() if new_status == "Completed" else None
+        })
+        record_task_status(task.get("title"), new_status)
+        st.rerun(scope=rerun_scope)
+
+# Record a task status change in the team activity stream
+def record_task_status(title, new_status):
+    if new_status == "Completed":
+        record_activity("Task", f"Completed task: {title}")
+    elif new_status == "In Progress":
+        record_activity("Task", f"Started task: {title}")
+    else:
+        record_activity("Task", f"Moved task to {new_status}: {title}")
 
 # Function to edit task
 def edit_task(task_id):
@@ -84,15 +101,19 @@ def edit_task(task_id):
     st.session_state.new_task = True
 
 # Function to delete task
-def delete_task(task_id):
-    global tasks
-    tasks = [task for task in tasks if task["id"] != task_id]
-    save_tasks(tasks)
+def delete_task(task_id, rerun_scope="app"):
+    delete_record("tasks", task_id)
     st.success("Task deleted successfully!")
-    st.rerun()
+    st.rerun(scope=rerun_scope)
 
-# Kanban board view
-if st.session_state.view_mode == "kanban":
+# Kanban board. It is a fragment: changing a task's status, deleting it or
+# opening its details reruns only the board, not the page's other views and
+# forms. Tasks are loaded here (from the shared cache) so a board rerun sees
+# its own changes.
+@st.fragment
+def kanban_board():
+    tasks = load_tasks()
+    
     # Create columns for each status
     status_cols = st.columns(len(TASK_STATUSES))
     
@@ -144,7 +165,7 @@ if st.session_state.view_mode == "kanban":
                     st.write(f"**Category:** {task.get('category', 'Other')}")
                     
                     # Display due date with color coding
-                    due_date = datetime.fromisoformat(task.get("due_date", datetime.now().isoformat()))
+                    due_date = task.get("due_date_dt") or datetime.now()
                     days_remaining = (due_date - datetime.now()).days
                     
                     if days_remaining < 0:
@@ -169,18 +190,24 @@ if st.session_state.view_mode == "kanban":
                                 key=f"status_change_{task['id']}"
                             )
                             if st.button("Update Status", key=f"update_status_{task['id']}"):
-                                change_task_status(task["id"], new_status)
+                                change_task_status(task, new_status, rerun_scope="fragment")
                         
                         # Edit/Delete actions (admin/lead only)
                         with action_col2:
                             if st.session_state.role in ['admin', 'lead'] or task.get('assigned_to') == st.session_state.user or task.get('created_by') == st.session_state.user:
                                 if st.button("Edit Task", key=f"edit_{task['id']}"):
+                                    # The task form is outside the board, so the whole page reruns
                                     edit_task(task["id"])
+                                    st.rerun()
                                 if st.button("Delete Task", key=f"delete_{task['id']}"):
-                                    delete_task(task["id"])
+                                    delete_task(task["id"], rerun_scope="fragment")
                     
                     st.markdown("</div>", unsafe_allow_html=True)
 
+# Kanban board view
+if st.session_state.view_mode == "kanban":
+    kanban_board()
+
 # List view
 elif st.session_state.view_mode == "list":
     # Create filters
@@ -218,7 +245,7 @@ elif st.session_state.view_mode == "list":
     
     # Sort tasks
     if sort_by == "Due Date":
-        filtered_tasks.sort(key=lambda x: datetime.fromisoformat(x.get("due_date", datetime.now().isoformat())), reverse=(sort_order == "Descending"))
+        filtered_tasks.sort(key=lambda x: x.get("due_date_ts") or int(datetime.now().timestamp()), reverse=(sort_order == "Descending"))
     elif sort_by == "Priority":
         # Custom priority sorting order
         priority_order = {"Critical": 3, "High": 2, "Medium": 1, "Low": 0}
@@ -236,7 +263,7 @@ elif st.session_state.view_mode == "list":
         # Create DataFrame for display
         task_data = []
         for task in filtered_tasks:
-            due_date = datetime.fromisoformat(task.get("due_date", datetime.now().isoformat()))
+            due_date = task.get("due_date_dt") or datetime.now()
             days_remaining = (due_date - datetime.now()).days
             
             task_data.append({
@@ -250,6 +277,8 @@ elif st.session_state.view_mode == "list":
                 "Category": task.get("category", "Other")
             })
         
+        import pandas as pd
+        
         task_df = pd.DataFrame(task_data)
         
         # Apply styling (highlighting)
@@ -310,14 +339,14 @@ elif st.session_state.view_mode == "list":
                 st.markdown(f"**Description:** {selected_task.get('description', 'No description provided.')}")
                 st.markdown(f"**Category:** {selected_task.get('category', 'Other')}")
                 st.markdown(f"**Created by:** {selected_task.get('created_by', 'Unknown')}")
-                created_date = datetime.fromisoformat(selected_task.get("created_at", datetime.now().isoformat()))
+                created_date = selected_task.get("created_at_dt") or datetime.now()
                 st.markdown(f"**Created on:** {created_date.strftime('%m/%d/%Y')}")
             
             with task_col2:
                 st.markdown(f"**Status:** {selected_task.get('status', 'To Do')}")
                 st.markdown(f"**Priority:** {selected_task.get('priority', 'Medium')}")
                 st.markdown(f"**Assigned to:** {selected_task.get('assigned_to', 'Unassigned')}")
-                due_date = datetime.fromisoformat(selected_task.get("due_date", datetime.now().isoformat()))
+                due_date = selected_task.get("due_date_dt") or datetime.now()
                 st.markdown(f"**Due Date:** {due_date.strftime('%m/%d/%Y')}")
                 days_remaining = (due_date - datetime.now()).days
                 if days_remaining < 0:
@@ -334,7 +363,7 @@ elif st.session_state.view_mode == "list":
             with action_col1:
                 new_status = st.selectbox("Change Status", TASK_STATUSES, index=TASK_STATUSES.index(selected_task.get("status", "To Do")))
                 if st.button("Update Status"):
-                    change_task_status(selected_task["id"], new_status)
+                    change_task_status(selected_task, new_status)
             
             with action_col2:
                 if st.session_state.role in ['admin', 'lead'] or selected_task.get('assigned_to') == st.session_state.user or selected_task.get('created_by') == st.session_state.user:
@@ -350,22 +379,21 @@ elif st.session_state.view_mode == "list":
 
 # Analytics view
 elif st.session_state.view_mode == "analytics":
-    st.subheader("Task Analytics")
-    
-    # Tasks by status
-    status_counts = {}
-    for status in TASK_STATUSES:
-        status_counts[status] = len([task for task in tasks if task.get("status", "To Do") == status])
+    import pandas as pd
+    import plotly.express as px
     
-    status_df = pd.DataFrame({
-        "Status": list(status_counts.keys()),
-        "Count": list(status_counts.values())
-    })
-    
-    col1, col2 = st.columns(2)
+    st.subheader("Task Analytics")
     
-    with col1:
-        st.subheader("Tasks by Status")
+    # Each chart is built from the typed task table (all counts are single
+    # vectorized passes) and cached until the tasks change, see figures.py
+    def build_status_chart():
+        task_frame = collection_frame("tasks")
+        
+        # Tasks by status (tasks without a status count as "To Do")
+        status_counts = task_frame["status"].value_counts().reindex(TASK_STATUSES, fill_value=0)
+        status_counts["To Do"] += task_frame["status"].isna().sum()
+        
+        status_df = status_counts.rename_axis("Status").reset_index(name="Count")
         
         # Set colors for status chart
         status_colors = {
@@ -375,9 +403,7 @@ elif st.session_state.view_mode == "analytics":
             "Completed": "#28a745"  # Green
         }
         
-        color_map = [status_colors[status] for status in status_df["Status"]]
-        
-        fig = px.pie(
+        return px.pie(
             status_df,
             values="Count",
             names="Status",
@@ -385,21 +411,15 @@ elif st.session_state.view_mode == "analytics":
             color="Status",
             color_discrete_map={status: status_colors[status] for status in TASK_STATUSES}
         )
-        
-        st.plotly_chart(fig, use_container_width=True)
-    
-    # Tasks by priority
-    priority_counts = {}
-    for priority in TASK_PRIORITIES:
-        priority_counts[priority] = len([task for task in tasks if task.get("priority", "Medium") == priority])
     
-    priority_df = pd.DataFrame({
-        "Priority": list(priority_counts.keys()),
-        "Count": list(priority_counts.values())
-    })
-    
-    with col2:
-        st.subheader("Tasks by Priority")
+    def build_priority_chart():
+        task_frame = collection_frame("tasks")
+        
+        # Tasks by priority (tasks without a priority count as "Medium")
+        priority_counts = task_frame["priority"].value_counts().reindex(TASK_PRIORITIES, fill_value=0)
+        priority_counts["Medium"] += task_frame["priority"].isna().sum()
+        
+        priority_df = priority_counts.rename_axis("Priority").reset_index(name="Count")
         
         # Set colors for priority chart
         priority_colors = {
@@ -409,7 +429,7 @@ elif st.session_state.view_mode == "analytics":
             "Critical": "#dc3545"  # Red
         }
         
-        fig = px.pie(
+        return px.pie(
             priority_df,
             values="Count",
             names="Priority",
@@ -417,28 +437,20 @@ elif st.session_state.view_mode == "analytics":
             color="Priority",
             color_discrete_map={priority: priority_colors[priority] for priority in TASK_PRIORITIES}
         )
-        
-        st.plotly_chart(fig, use_container_width=True)
-    
-    # Tasks by category
-    category_counts = {}
-    for category in TASK_CATEGORIES:
-        category_counts[category] = len([task for task in tasks if task.get("category", "Other") == category])
     
-    category_df = pd.DataFrame({
-        "Category": list(category_counts.keys()),
-        "Count": list(category_counts.values())
-    })
-    
-    # Sort by count, descending
-    category_df = category_df.sort_values("Count", ascending=False)
-    
-    col3, col4 = st.columns(2)
-    
-    with col3:
-        st.subheader("Tasks by Category")
+    def build_category_chart():
+        task_frame = collection_frame("tasks")
         
-        fig = px.bar(
+        # Tasks by category (tasks without a category count as "Other")
+        category_counts = task_frame["category"].value_counts().reindex(TASK_CATEGORIES, fill_value=0)
+        category_counts["Other"] += task_frame["category"].isna().sum()
+        
+        category_df = category_counts.rename_axis("Category").reset_index(name="Count")
+        
+        # Sort by count, descending
+        category_df = category_df.sort_values("Count", ascending=False)
+        
+        return px.bar(
             category_df,
             x="Category",
             y="Count",
@@ -446,27 +458,20 @@ elif st.session_state.view_mode == "analytics":
             color="Count",
             color_continuous_scale=px.colors.sequential.Blues
         )
-        
-        st.plotly_chart(fig, use_container_width=True)
-    
-    # Tasks by assignee
-    assignee_counts = {}
-    for member in team_member_names:
-        assignee_counts[member] = len([task for task in tasks if task.get("assigned_to") == member])
     
-    # Add unassigned tasks
-    assignee_counts["Unassigned"] = len([task for task in tasks if not task.get("assigned_to")])
-    
-    assignee_df = pd.DataFrame({
-        "Assignee": list(assignee_counts.keys()),
-        "Count": list(assignee_counts.values())
-    })
-    
-    # Sort by count, descending
-    assignee_df = assignee_df.sort_values("Count", ascending=False)
-    
-    with col4:
-        st.subheader("Tasks by Assignee")
+    def build_assignee_chart():
+        task_frame = collection_frame("tasks")
+        
+        # Tasks by assignee
+        assignee_counts = task_frame["assigned_to"].value_counts().reindex(team_member_names, fill_value=0)
+        
+        # Add unassigned tasks
+        assignee_counts["Unassigned"] = task_frame["assigned_to"].isna().sum() + (task_frame["assigned_to"] == "").sum()
+        
+        assignee_df = assignee_counts.rename_axis("Assignee").reset_index(name="Count")
+        
+        # Sort by count, descending
+        assignee_df = assignee_df.sort_values("Count", ascending=False)
         
         fig = px.bar(
             assignee_df,
@@ -479,51 +484,40 @@ elif st.session_state.view_mode == "analytics":
         
         # Rotate x-axis labels for better readability
         fig.update_layout(xaxis_tickangle=-45)
+        return fig
+    
+    # Days until each open task is due; tasks without a due date count as due now
+    def open_task_timeline(now):
+        task_frame = collection_frame("tasks")
+        
+        # Exclude completed tasks
+        open_tasks = task_frame[task_frame["status"] != "Completed"]
+        days_remaining = (open_tasks["due_date"].fillna(now) - now).dt.days
+        
+        return pd.DataFrame({
+            "Task": open_tasks["title"] if "title" in open_tasks else pd.Series(dtype=object),
+            "Days Remaining": days_remaining,
+            "Status": open_tasks["status"].astype(object).fillna("To Do"),
+            "Priority": open_tasks["priority"].astype(object).fillna("Medium")
+        })
+    
+    def build_due_date_chart(now):
+        days_remaining = open_task_timeline(now)["Days Remaining"]
+        
+        overdue_count = int((days_remaining < 0).sum())
+        due_soon_count = int(((days_remaining >= 0) & (days_remaining <= 7)).sum())
+        future_count = int((days_remaining > 7).sum())
+        
+        # Create bar chart for due date distribution
+        due_date_data = {
+            "Timeframe": ["Overdue", "Due within a week", "Due later"],
+            "Count": [overdue_count, due_soon_count, future_count],
+            "Color": ["#dc3545", "#ffc107", "#28a745"]
+        }
         
-        st.plotly_chart(fig, use_container_width=True)
-    
-    # Task due date analysis
-    st.subheader("Due Date Analysis")
-    
-    task_timeline = []
-    overdue_count = 0
-    due_soon_count = 0
-    future_count = 0
-    
-    now = datetime.now()
-    
-    for task in tasks:
-        if task.get("status") != "Completed":  # Exclude completed tasks
-            due_date = datetime.fromisoformat(task.get("due_date", now.isoformat()))
-            days_remaining = (due_date - now).days
-            
-            task_timeline.append({
-                "Task": task["title"],
-                "Days Remaining": days_remaining,
-                "Status": task.get("status", "To Do"),
-                "Priority": task.get("priority", "Medium")
-            })
-            
-            if days_remaining < 0:
-                overdue_count += 1
-            elif days_remaining <= 7:
-                due_soon_count += 1
-            else:
-                future_count += 1
-    
-    # Create bar chart for due date distribution
-    due_date_data = {
-        "Timeframe": ["Overdue", "Due within a week", "Due later"],
-        "Count": [overdue_count, due_soon_count, future_count],
-        "Color": ["#dc3545", "#ffc107", "#28a745"]
-    }
-    
-    due_date_df = pd.DataFrame(due_date_data)
-    
-    col5, col6 = st.columns(2)
-    
-    with col5:
-        fig = px.bar(
+        due_date_df = pd.DataFrame(due_date_data)
+        
+        return px.bar(
             due_date_df,
             x="Timeframe",
             y="Count",
@@ -535,48 +529,136 @@ elif st.session_state.view_mode == "analytics":
                 "Due later": "#28a745"
             }
         )
+    
+    def build_timeline_chart(now):
+        # Sort by days remaining
+        timeline_df = open_task_timeline(now).sort_values("Days Remaining")
+        
+        # Create horizontal bar chart for tasks due timeline
+        fig = px.bar(
+            timeline_df,
+            y="Task",
+            x="Days Remaining",
+            title="Upcoming Task Timeline",
+            color="Priority",
+            orientation="h",
+            color_discrete_map={
+                "Critical": "#dc3545",
+                "High": "#fd7e14",
+                "Medium": "#17a2b8",
+                "Low": "#6c757d"
+            }
+        )
         
+        # Add a vertical line at x=0 (today)
+        fig.add_vline(x=0, line_width=2, line_dash="dash", line_color="black")
+        
+        # Add annotation for today
+        fig.add_annotation(
+            x=0,
+            y=0,
+            text="Today",
+            showarrow=False,
+            yshift=10
+        )
+        return fig
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.subheader("Tasks by Status")
+        st.plotly_chart(cached_figure("tasks_by_status", ["tasks"], build_status_chart), use_container_width=True)
+    
+    with col2:
+        st.subheader("Tasks by Priority")
+        st.plotly_chart(cached_figure("tasks_by_priority", ["tasks"], build_priority_chart), use_container_width=True)
+    
+    col3, col4 = st.columns(2)
+    
+    with col3:
+        st.subheader("Tasks by Category")
+        st.plotly_chart(cached_figure("tasks_by_category", ["tasks"], build_category_chart), use_container_width=True)
+    
+    with col4:
+        st.subheader("Tasks by Assignee")
+        # The assignee axis lists every team member, so it also depends on the users
+        st.plotly_chart(cached_figure("tasks_by_assignee", ["tasks", "users"], build_assignee_chart), use_container_width=True)
+    
+    # Task due date analysis
+    st.subheader("Due Date Analysis")
+    
+    # Days remaining are counted from the current hour, so the due date
+    # charts are rebuilt at most once an hour while the tasks don't change
+    now = pd.Timestamp(datetime.now()).floor("h")
+    
+    col5, col6 = st.columns(2)
+    
+    with col5:
+        fig = cached_figure("tasks_by_due_date", ["tasks"], lambda: build_due_date_chart(now), {"now": now.isoformat()})
         st.plotly_chart(fig, use_container_width=True)
     
     with col6:
-        if task_timeline:
-            # Create a dataframe
-            timeline_df = pd.DataFrame(task_timeline)
-            
-            # Sort by days remaining
-            timeline_df = timeline_df.sort_values("Days Remaining")
-            
-            # Create horizontal bar chart for tasks due timeline
-            fig = px.bar(
-                timeline_df,
-                y="Task",
-                x="Days Remaining",
-                title="Upcoming Task Timeline",
-                color="Priority",
-                orientation="h",
-                color_discrete_map={
-                    "Critical": "#dc3545",
-                    "High": "#fd7e14",
-                    "Medium": "#17a2b8",
-                    "Low": "#6c757d"
-                }
+        total_tasks, status_counts = metrics.task_counts()
+        if total_tasks > status_counts.get("Completed", 0):
+            fig = cached_figure("task_timeline", ["tasks"], lambda: build_timeline_chart(now), {"now": now.isoformat()})
+            st.plotly_chart(fig, use_container_width=True)
+        else:
+            st.info("No incomplete tasks to display.")
+
+# Archived tasks view; archive files are only read while this view is open
+elif st.session_state.view_mode == "archive":
+    st.subheader("Archived Tasks")
+    st.caption(f"Tasks completed more than {archive.TASK_ARCHIVE_DAYS} days ago are moved here by the Admin Panel cleanup.")
+    
+    archived_months = archive.partitions("tasks")
+    
+    if archived_months:
+        if len(archived_months) > 1:
+            start_month, end_month = st.select_slider(
+                "Months",
+                options=archived_months,
+                value=(archived_months[max(len(archived_months) - 3, 0)], archived_months[-1])
             )
+        else:
+            start_month = end_month = archived_months[0]
+        
+        archive_search = st.text_input("Search archived tasks", placeholder="Title or description")
+        
+        archived_tasks = archive.load_archive("tasks", start_month, end_month)
+        if archive_search:
+            search_lower = archive_search.lower()
+            archived_tasks = [
+                task for task in archived_tasks
+                if search_lower in task.get("title", "").lower() or search_lower in (task.get("description") or "").lower()
+            ]
+        archived_tasks.sort(key=lambda x: x.get("completed_at_ts") or x.get("due_date_ts") or 0, reverse=True)
+        
+        if archived_tasks:
+            archived_data = []
+            for task in archived_tasks:
+                completed = task.get("completed_at_dt") or task.get("due_date_dt")
+                archived_data.append({
+                    "ID": task["id"],
+                    "Title": task.get("title", ""),
+                    "Category": task.get("category", "Other"),
+                    "Assigned To": task.get("assigned_to") or "Unassigned",
+                    "Completed": completed.strftime("%Y-%m-%d") if completed else ""
+                })
+            import pandas as pd
             
-            # Add a vertical line at x=0 (today)
-            fig.add_vline(x=0, line_width=2, line_dash="dash", line_color="black")
-            
-            # Add annotation for today
-            fig.add_annotation(
-                x=0,
-                y=0,
-                text="Today",
-                showarrow=False,
-                yshift=10
-            )
+            st.dataframe(pd.DataFrame(archived_data), use_container_width=True, hide_index=True)
             
-            st.plotly_chart(fig, use_container_width=True)
+            if st.session_state.role in ['admin', 'lead']:
+                titles = {task["id"]: task.get("title", task["id"]) for task in archived_tasks}
+                restore_ids = st.multiselect("Restore to the board", list(titles), format_func=lambda x: titles[x])
+                if st.button("Restore Selected") and restore_ids:
+                    restored = archive.restore_records("tasks", restore_ids)
+                    st.success(f"Restored {restored} task(s).")
+                    st.rerun()
         else:
-            st.info("No incomplete tasks to display.")
+            st.info("No archived tasks match your search.")
+    else:
+        st.info("No tasks have been archived yet.")
 
 # Task form (add/edit)
 if st.session_state.new_task:
@@ -601,7 +683,7 @@ if st.session_state.new_task:
             priority_index = TASK_PRIORITIES.index(task_to_edit.get("priority", "Medium")) if task_to_edit.get("priority") in TASK_PRIORITIES else 1
             category_index = TASK_CATEGORIES.index(task_to_edit.get("category", "Other")) if task_to_edit.get("category") in TASK_CATEGORIES else -1
             assigned_to_index = team_member_names.index(task_to_edit.get("assigned_to")) if task_to_edit.get("assigned_to") in team_member_names else -1
-            due_date_value = datetime.fromisoformat(task_to_edit.get("due_date", datetime.now().isoformat())).date()
+            due_date_value = (task_to_edit.get("due_date_dt") or datetime.now()).date()
         else:
             title_value = ""
             description_value = ""
@@ -646,53 +728,59 @@ if st.session_state.new_task:
             if not task_title:
                 st.error("Task title is required!")
             else:
-                # Process form submission
-                due_date_datetime = datetime.combine(task_due_date, datetime.min.time())
-                
-                # Format assigned_to
-                assigned_to = None if task_assigned_to == "--Select--" else task_assigned_to
-                
-                if editing:
-                    # Update existing task
-                    for task in tasks:
-                        if task["id"] == st.session_state.edit_task_id:
-                            task["title"] = task_title
-                            task["description"] = task_description
-                            task["status"] = task_status
-                            task["priority"] = task_priority
-                            task["category"] = task_category
-                            task["assigned_to"] = assigned_to
-                            task["due_date"] = due_date_datetime.isoformat()
-                            break
+                # The task write and its activity entries are flushed together
+                with unit_of_work():
+                    # Process form submission
+                    due_date_datetime = datetime.combine(task_due_date, datetime.min.time())
                     
-                    success_message = "Task updated successfully!"
-                else:
-                    # Create new task
-                    new_task = {
-                        "id": generate_id(),
-                        "title": task_title,
-                        "description": task_description,
-                        "status": task_status,
-                        "priority": task_priority,
-                        "category": task_category,
-                        "assigned_to": assigned_to,
-                        "created_by": st.session_state.user,
-                        "created_at": datetime.now().isoformat(),
-                        "due_date": due_date_datetime.isoformat()
-                    }
+                    # Format assigned_to
+                    assigned_to = None if task_assigned_to == "--Select--" else task_assigned_to
                     
-                    tasks.append(new_task)
-                    success_message = "Task created successfully!"
-                
-                # Save tasks to file
-                save_tasks(tasks)
-                
-                # Reset form
-                st.session_state.new_task = False
-                st.session_state.edit_task_id = None
-                
-                st.success(success_message)
-                st.rerun()
+                    if editing:
+                        # Update only the edited task
+                        changes = {
+                            "title": task_title,
+                            "description": task_description,
+                            "status": task_status,
+                            "priority": task_priority,
+                            "category": task_category,
+                            "assigned_to": assigned_to,
+                            "due_date": due_date_datetime.isoformat()
+                        }
+                        if task_status != task_to_edit.get("status"):
+                            changes["completed_at"] = datetime.now().isoformat() if task_status == "Completed" else None
+                        patch_record("tasks", st.session_state.edit_task_id, changes)
+                        if task_status != task_to_edit.get("status"):
+                            record_task_status(task_title, task_status)
+                    
+                        success_message = "Task updated successfully!"
+                    else:
+                        # Create new task
+                        new_task = {
+                            "id": generate_id(),
+                            "title": task_title,
+                            "description": task_description,
+                            "status": task_status,
+                            "priority": task_priority,
+                            "category": task_category,
+                            "assigned_to": assigned_to,
+                            "created_by": st.session_state.user,
+                            "created_at": datetime.now().isoformat(),
+                            "due_date": due_date_datetime.isoformat()
+                        }
+                        if task_status == "Completed":
+                            new_task["completed_at"] = new_task["created_at"]
+                    
+                        insert_record("tasks", new_task)
+                        record_activity("Task", f"Created task: {task_title}")
+                        success_message = "Task created successfully!"
+                    
+                    # Reset form
+                    st.session_state.new_task = False
+                    st.session_state.edit_task_id = None
+                    
+                    st.success(success_message)
+                    st.rerun()
 
 st.markdown("---")
 st.caption("Circuit Breakers Team Hub - Project Management")
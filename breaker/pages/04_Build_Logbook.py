@@ -1,17 +1,20 @@
 import streamlit as st
-import pandas as pd
 import json
 import os
 import sys
 from datetime import datetime, timedelta
 import base64
-from io import BytesIO
-from PIL import Image
-import plotly.express as px
 
 # Add the parent directory to the path to import from the app root
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from util import load_logs, save_logs, generate_id
+from auth import restore_session
+from config import bootstrap
+from figures import cached_figure
+import metrics
+from util import load_logs, generate_id, insert_record, patch_record, delete_record, collection_frame, record_activity
+
+# One-time process setup (settings, database tables); a no-op on later reruns
+bootstrap()
 
 # Page configuration
 st.set_page_config(
@@ -20,6 +23,9 @@ st.set_page_config(
     layout="wide"
 )
 
+# Restore the login from the session token after a refresh or reconnect
+restore_session()
+
 # Check if user is authenticated
 if 'authenticated' not in st.session_state or not st.session_state.authenticated:
     st.warning("Please login to access this page.")
@@ -55,9 +61,7 @@ def edit_log(log_id):
 
 # Function to delete a log
 def delete_log(log_id):
-    global logs
-    logs = [log for log in logs if log['id'] != log_id]
-    save_logs(logs)
+    delete_record("logs", log_id)
     st.success("Log entry deleted successfully!")
     st.rerun()
 
@@ -113,30 +117,31 @@ with tab1:
         filtered_logs = [log for log in filtered_logs if log.get("category", "Other") in filter_category]
     
     # Date filter
+    # Entries without a date only match "All Time"
     now = datetime.now()
     if date_range == "Past Week":
         filtered_logs = [
             log for log in filtered_logs 
-            if datetime.fromisoformat(log.get("date")) > (now - timedelta(days=7))
+            if log["date_dt"] and log["date_dt"] > (now - timedelta(days=7))
         ]
     elif date_range == "Past Month":
         filtered_logs = [
             log for log in filtered_logs 
-            if datetime.fromisoformat(log.get("date")) > (now - timedelta(days=30))
+            if log["date_dt"] and log["date_dt"] > (now - timedelta(days=30))
         ]
     elif date_range == "Custom":
         start_datetime = datetime.combine(start_date, datetime.min.time())
         end_datetime = datetime.combine(end_date, datetime.max.time())
         filtered_logs = [
             log for log in filtered_logs 
-            if start_datetime <= datetime.fromisoformat(log.get("date")) <= end_datetime
+            if log["date_dt"] and start_datetime <= log["date_dt"] <= end_datetime
         ]
     
-    # Apply sorting
+    # Apply sorting; entries without a date count as the oldest
     if sort_by == "Newest First":
-        filtered_logs.sort(key=lambda x: datetime.fromisoformat(x.get("date")), reverse=True)
+        filtered_logs.sort(key=lambda x: x["date_ts"] or 0, reverse=True)
     elif sort_by == "Oldest First":
-        filtered_logs.sort(key=lambda x: datetime.fromisoformat(x.get("date")))
+        filtered_logs.sort(key=lambda x: x["date_ts"] or 0)
     elif sort_by == "Category":
         filtered_logs.sort(key=lambda x: x.get("category", "Other"))
     elif sort_by == "Author":
@@ -145,8 +150,8 @@ with tab1:
     # Display logs
     if filtered_logs:
         for log in filtered_logs:
-            log_date = datetime.fromisoformat(log.get("date"))
-            formatted_date = log_date.strftime("%A, %B %d, %Y %I:%M %p")
+            log_date = log["date_dt"]
+            formatted_date = log_date.strftime("%A, %B %d, %Y %I:%M %p") if log_date else "No date"
             
             with st.expander(f"{log.get('title')} - {formatted_date}"):
                 # Display log content
@@ -192,7 +197,7 @@ if st.session_state.show_log_form:
             title_value = log_to_edit["title"]
             description_value = log_to_edit.get("description", "")
             category_index = LOG_CATEGORIES.index(log_to_edit.get("category")) if log_to_edit.get("category") in LOG_CATEGORIES else -1
-            log_date_value = datetime.fromisoformat(log_to_edit.get("date"))
+            log_date_value = log_to_edit["date_dt"] or datetime.now()
             image_desc_value = log_to_edit.get("image_description", "")
         else:
             title_value = ""
@@ -243,15 +248,14 @@ if st.session_state.show_log_form:
                 log_datetime = datetime.combine(log_date, log_time)
                 
                 if editing:
-                    # Update existing log
-                    for log in logs:
-                        if log["id"] == st.session_state.editing_log:
-                            log["title"] = log_title
-                            log["description"] = log_description
-                            log["category"] = log_category
-                            log["date"] = log_datetime.isoformat()
-                            log["image_description"] = image_description
-                            break
+                    # Update only the edited log
+                    patch_record("logs", st.session_state.editing_log, {
+                        "title": log_title,
+                        "description": log_description,
+                        "category": log_category,
+                        "date": log_datetime.isoformat(),
+                        "image_description": image_description
+                    })
                     
                     success_message = "Log entry updated successfully!"
                 else:
@@ -266,12 +270,10 @@ if st.session_state.show_log_form:
                         "image_description": image_description
                     }
                     
-                    logs.append(new_log)
+                    insert_record("logs", new_log)
+                    record_activity("Log Entry", f"Added build log: {log_title}")
                     success_message = "Log entry created successfully!"
                 
-                # Save logs to file
-                save_logs(logs)
-                
                 # Reset form
                 st.session_state.show_log_form = False
                 st.session_state.editing_log = None
@@ -280,41 +282,19 @@ if st.session_state.show_log_form:
                 st.rerun()
 
 with tab2:
+    import pandas as pd
+    import plotly.express as px
+    
     st.subheader("Build Log Analytics")
     
     if logs:
-        # Calculate log statistics
-        total_logs = len(logs)
+        # The metrics come from the materialized log view (see metrics.py);
+        # the charts are built from the typed log table only when the logs
+        # changed, inside their cached builders
+        total_logs, category_counts, date_span = metrics.log_summary()
         
         # Get date range of logs
-        log_dates = [datetime.fromisoformat(log.get("date")) for log in logs]
-        earliest_date = min(log_dates)
-        latest_date = max(log_dates)
-        date_range = (latest_date - earliest_date).days + 1
-        
-        # Calculate logs per category
-        category_counts = {}
-        for category in LOG_CATEGORIES:
-            category_counts[category] = len([log for log in logs if log.get("category") == category])
-        
-        # Calculate logs by author
-        author_counts = {}
-        for log in logs:
-            author = log.get("author", "Unknown")
-            if author in author_counts:
-                author_counts[author] += 1
-            else:
-                author_counts[author] = 1
-        
-        # Calculate logs over time
-        logs_by_date = {}
-        for log in logs:
-            log_date = datetime.fromisoformat(log.get("date")).date()
-            date_str = log_date.isoformat()
-            if date_str in logs_by_date:
-                logs_by_date[date_str] += 1
-            else:
-                logs_by_date[date_str] = 1
+        date_range = (date_span[1] - date_span[0]).days + 1 if date_span else 0
         
         # Create metrics
         col1, col2, col3, col4 = st.columns(4)
@@ -323,7 +303,7 @@ with tab2:
             st.metric("Total Log Entries", total_logs)
         
         with col2:
-            logs_last_week = len([log for log in logs if datetime.fromisoformat(log.get("date")) > (datetime.now() - timedelta(days=7))])
+            logs_last_week = metrics.log_count_since(datetime.now() - timedelta(days=7))
             st.metric("Entries Last 7 Days", logs_last_week)
         
         with col3:
@@ -334,7 +314,7 @@ with tab2:
             st.metric("Avg. Entries Per Week", avg_logs_per_week)
         
         with col4:
-            most_common_category = max(category_counts.items(), key=lambda x: x[1])[0]
+            most_common_category = max(LOG_CATEGORIES, key=lambda category: category_counts.get(category, 0))
             st.metric("Most Active Category", most_common_category)
         
         # Create visualizations
@@ -344,18 +324,20 @@ with tab2:
             # Category distribution
             st.subheader("Log Distribution by Category")
             
-            category_data = pd.DataFrame({
-                "Category": list(category_counts.keys()),
-                "Count": list(category_counts.values())
-            })
+            # Charts are cached until the logs change, see figures.py
+            def build_category_chart():
+                log_frame = collection_frame("logs")
+                category_counts = log_frame["category"].value_counts().reindex(LOG_CATEGORIES, fill_value=0)
+                
+                return px.pie(
+                    category_counts.rename_axis("Category").reset_index(name="Count"),
+                    values="Count",
+                    names="Category",
+                    title="Log Distribution by Category",
+                    color_discrete_sequence=px.colors.qualitative.Safe
+                )
             
-            fig = px.pie(
-                category_data,
-                values="Count",
-                names="Category",
-                title="Log Distribution by Category",
-                color_discrete_sequence=px.colors.qualitative.Safe
-            )
+            fig = cached_figure("logs_by_category", ["logs"], build_category_chart)
             
             st.plotly_chart(fig, use_container_width=True)
         
@@ -363,22 +345,24 @@ with tab2:
             # Author distribution
             st.subheader("Log Distribution by Author")
             
-            author_data = pd.DataFrame({
-                "Author": list(author_counts.keys()),
-                "Count": list(author_counts.values())
-            })
-            
-            # Sort by count descending
-            author_data = author_data.sort_values("Count", ascending=False)
+            def build_author_chart():
+                log_frame = collection_frame("logs")
+                author_counts = log_frame["author"].astype(object).fillna("Unknown").value_counts()
+                author_data = author_counts.rename_axis("Author").reset_index(name="Count")
+                
+                # Sort by count descending
+                author_data = author_data.sort_values("Count", ascending=False)
+                
+                return px.bar(
+                    author_data,
+                    x="Author",
+                    y="Count",
+                    title="Log Entries by Author",
+                    color="Count",
+                    color_continuous_scale=px.colors.sequential.Viridis
+                )
             
-            fig = px.bar(
-                author_data,
-                x="Author",
-                y="Count",
-                title="Log Entries by Author",
-                color="Count",
-                color_continuous_scale=px.colors.sequential.Viridis
-            )
+            fig = cached_figure("logs_by_author", ["logs"], build_author_chart)
             
             st.plotly_chart(fig, use_container_width=True)
         
@@ -387,98 +371,82 @@ with tab2:
         
         # Create date range for all days
         if date_range > 0:
-            date_range_list = [earliest_date.date() + timedelta(days=x) for x in range(date_range)]
-            date_range_strs = [date.isoformat() for date in date_range_list]
-            
-            # Create counts for each date (filling in zeros for dates with no logs)
-            timeline_counts = [logs_by_date.get(date_str, 0) for date_str in date_range_strs]
-            
-            # Create formatted date strings for display
-            display_dates = [date.strftime("%b %d") for date in date_range_list]
+            def build_daily_chart():
+                # Count logs per day (resampling fills in zeros for days with no logs)
+                dated_logs = collection_frame("logs").dropna(subset=["date"])
+                daily_counts = dated_logs.set_index("date").resample("D").size()
+                
+                # Create timeline data
+                timeline_data = pd.DataFrame({
+                    "Date": daily_counts.index.strftime("%b %d"),
+                    "Log Entries": daily_counts.values
+                })
+                
+                # Only include up to the last 60 days if the range is larger
+                if len(timeline_data) > 60:
+                    timeline_data = timeline_data.iloc[-60:]
+                
+                fig = px.line(
+                    timeline_data,
+                    x="Date",
+                    y="Log Entries",
+                    title="Build Log Activity Over Time",
+                    markers=True
+                )
+                
+                # Improve layout
+                fig.update_layout(
+                    xaxis_title="Date",
+                    yaxis_title="Number of Log Entries",
+                    xaxis=dict(
+                        tickmode="auto",
+                        nticks=20,
+                        tickangle=45
+                    )
+                )
+                return fig
             
-            # Create timeline data
-            timeline_data = pd.DataFrame({
-                "Date": display_dates,
-                "Log Entries": timeline_counts
-            })
+            fig = cached_figure("logs_per_day", ["logs"], build_daily_chart)
+            st.plotly_chart(fig, use_container_width=True)
+        
+        # Category log trends over time
+        st.subheader("Category Trends Over Time")
+        
+        def build_category_trend_chart():
+            # Count logs per month and category (months in chronological order)
+            dated_logs = collection_frame("logs").dropna(subset=["date"])
+            month_counts = pd.crosstab(
+                dated_logs["date"].dt.to_period("M"),
+                dated_logs["category"].astype(object).fillna("Other")
+            ).reindex(columns=LOG_CATEGORIES, fill_value=0)
             
-            # Only include up to the last 60 days if the range is larger
-            if len(timeline_data) > 60:
-                timeline_data = timeline_data.iloc[-60:]
+            # Create a dataframe for visualization
+            category_trend_df = month_counts.stack().reset_index()
+            category_trend_df.columns = ["Month", "Category", "Count"]
+            category_trend_df["Month"] = category_trend_df["Month"].dt.strftime("%b %Y")
             
-            fig = px.line(
-                timeline_data,
-                x="Date",
-                y="Log Entries",
-                title="Build Log Activity Over Time",
-                markers=True
+            # Create stacked bar chart
+            fig = px.bar(
+                category_trend_df,
+                x="Month",
+                y="Count",
+                color="Category",
+                title="Log Entries by Category Over Time",
+                color_discrete_sequence=px.colors.qualitative.Safe
             )
             
             # Improve layout
             fig.update_layout(
-                xaxis_title="Date",
+                xaxis_title="Month",
                 yaxis_title="Number of Log Entries",
                 xaxis=dict(
-                    tickmode="auto",
-                    nticks=20,
                     tickangle=45
-                )
+                ),
+                barmode="stack"
             )
-            
-            st.plotly_chart(fig, use_container_width=True)
-        
-        # Category log trends over time
-        st.subheader("Category Trends Over Time")
-        
-        # Group logs by month and category
-        logs_by_month_category = {}
-        for log in logs:
-            log_date = datetime.fromisoformat(log.get("date"))
-            month_year = log_date.strftime("%b %Y")
-            category = log.get("category", "Other")
-            
-            key = (month_year, category)
-            if key in logs_by_month_category:
-                logs_by_month_category[key] += 1
-            else:
-                logs_by_month_category[key] = 1
-        
-        # Create a list of all month-years
-        all_months = sorted(list(set([k[0] for k in logs_by_month_category.keys()])), key=lambda x: datetime.strptime(x, "%b %Y"))
-        
-        # Create a dataframe for visualization
-        category_trend_data = []
-        for month in all_months:
-            for category in LOG_CATEGORIES:
-                count = logs_by_month_category.get((month, category), 0)
-                category_trend_data.append({
-                    "Month": month,
-                    "Category": category,
-                    "Count": count
-                })
-        
-        category_trend_df = pd.DataFrame(category_trend_data)
-        
-        # Create stacked bar chart
-        fig = px.bar(
-            category_trend_df,
-            x="Month",
-            y="Count",
-            color="Category",
-            title="Log Entries by Category Over Time",
-            color_discrete_sequence=px.colors.qualitative.Safe
-        )
-        
-        # Improve layout
-        fig.update_layout(
-            xaxis_title="Month",
-            yaxis_title="Number of Log Entries",
-            xaxis=dict(
-                tickangle=45
-            ),
-            barmode="stack"
-        )
+            return fig
         
+        fig = cached_figure("logs_category_trend", ["logs"], build_category_trend_chart)
         st.plotly_chart(fig, use_container_width=True)
         
         # Export options
@@ -491,8 +459,8 @@ with tab2:
                 # Create dataframe of logs
                 export_data = []
                 for log in logs:
-                    log_date = datetime.fromisoformat(log.get("date"))
-                    formatted_date = log_date.strftime("%Y-%m-%d %H:%M:%S")
+                    log_date = log["date_dt"]
+                    formatted_date = log_date.strftime("%Y-%m-%d %H:%M:%S") if log_date else ""
                     
                     export_data.append({
                         "ID": log.get("id", ""),
@@ -518,21 +486,22 @@ with tab2:
                 st.markdown("### Build Log Summary Report")
                 st.markdown(f"**Report Date:** {datetime.now().strftime('%B %d, %Y')}")
                 st.markdown(f"**Total Entries:** {total_logs}")
-                st.markdown(f"**Date Range:** {earliest_date.strftime('%B %d, %Y')} to {latest_date.strftime('%B %d, %Y')}")
+                if date_span:
+                    st.markdown(f"**Date Range:** {date_span[0].strftime('%B %d, %Y')} to {date_span[1].strftime('%B %d, %Y')}")
                 st.markdown(f"**Most Active Category:** {most_common_category}")
                 
                 # Most active team members
                 st.markdown("#### Most Active Team Members")
-                active_members = sorted(author_counts.items(), key=lambda x: x[1], reverse=True)
-                for author, count in active_members[:3]:
+                author_counts = collection_frame("logs")["author"].astype(object).fillna("Unknown").value_counts()
+                for author, count in author_counts.head(3).items():
                     st.markdown(f"- **{author}:** {count} entries")
                 
                 # Recent entries
                 st.markdown("#### Recent Log Entries")
-                recent_logs = sorted(logs, key=lambda x: datetime.fromisoformat(x.get("date")), reverse=True)[:5]
+                recent_logs = sorted(logs, key=lambda x: x["date_ts"] or 0, reverse=True)[:5]
                 for log in recent_logs:
-                    log_date = datetime.fromisoformat(log.get("date"))
-                    formatted_date = log_date.strftime("%B %d, %Y")
+                    log_date = log["date_dt"]
+                    formatted_date = log_date.strftime("%B %d, %Y") if log_date else "No date"
                     st.markdown(f"- **{log.get('title')}** - {formatted_date} ({log.get('category')})")
     else:
         st.info("No log entries available for analysis. Add some using the 'Add New Log Entry' button.")
@@ -1,15 +1,19 @@
 import streamlit as st
-import pandas as pd
 import json
 import os
 import sys
 from datetime import datetime, timedelta
 import base64
-from io import BytesIO
 
 # Add the parent directory to the path to import from the app root
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from util import load_resources, save_resources, check_role_access, generate_id
+import archive
+from auth import restore_session
+from config import bootstrap
+from util import load_resources, generate_id, get_record, insert_record, patch_record, delete_record, record_activity
+
+# One-time process setup (settings, database tables); a no-op on later reruns
+bootstrap()
 
 # Page configuration
 st.set_page_config(
@@ -18,6 +22,9 @@ st.set_page_config(
     layout="wide"
 )
 
+# Restore the login from the session token after a refresh or reconnect
+restore_session()
+
 # Check if user is authenticated
 if 'authenticated' not in st.session_state or not st.session_state.authenticated:
     st.warning("Please login to access this page.")
@@ -58,10 +65,8 @@ def edit_resource(resource_id):
 
 # Function to delete a resource
 def delete_resource(resource_id):
-    global resources
-
     # Find the resource to delete
-    resource_to_delete = next((r for r in resources if r['id'] == resource_id), None)
+    resource_to_delete = get_record("resources", resource_id)
 
     if resource_to_delete:
         # Delete the file from disk if it exists
@@ -73,9 +78,8 @@ def delete_resource(resource_id):
             except Exception as e:
                 st.warning(f"Could not delete file from disk: {str(e)}")
 
-    # Remove the resource from the list
-    resources = [resource for resource in resources if resource['id'] != resource_id]
-    save_resources(resources)
+    # Remove the resource record
+    delete_record("resources", resource_id)
     st.success("Resource deleted successfully!")
     st.rerun()
 
@@ -91,7 +95,7 @@ with col3:
     st.session_state.resource_search = st.text_input("Search resources...", value=st.session_state.resource_search)
 
 # Create tabs
-tab1, tab2 = st.tabs(["Resource Library", "Recent Uploads"])
+tab1, tab2, tab3 = st.tabs(["Resource Library", "Recent Uploads", "Archive"])
 
 with tab1:
     # Filter resources based on search term
@@ -132,9 +136,9 @@ with tab1:
 
     # Apply sorting
     if sort_by == "Newest First":
-        filtered_resources.sort(key=lambda x: datetime.fromisoformat(x.get("upload_date")), reverse=True)
+        filtered_resources.sort(key=lambda x: x["upload_date_ts"], reverse=True)
     elif sort_by == "Oldest First":
-        filtered_resources.sort(key=lambda x: datetime.fromisoformat(x.get("upload_date")))
+        filtered_resources.sort(key=lambda x: x["upload_date_ts"])
     elif sort_by == "Title (A-Z)":
         filtered_resources.sort(key=lambda x: x.get("title", "").lower())
     elif sort_by == "Category":
@@ -145,7 +149,7 @@ with tab1:
         # Create a dataframe for display
         resource_data = []
         for resource in filtered_resources:
-            upload_date = datetime.fromisoformat(resource.get("upload_date"))
+            upload_date = resource["upload_date_dt"]
             formatted_date = upload_date.strftime("%m/%d/%Y")
 
             resource_data.append({
@@ -193,7 +197,7 @@ with tab1:
                                         Category: {resource.get('category', 'Other')}<br/>
                                         Type: {resource.get('file_type', 'Other')}<br/>
                                         Size: {resource.get('file_size', 'Unknown')}<br/>
-                                        Uploaded: {datetime.fromisoformat(resource.get('upload_date')).strftime('%m/%d/%Y')}
+                                        Uploaded: {resource['upload_date_dt'].strftime('%m/%d/%Y')}
                                     </p>
                                 </div>
                                 """,
@@ -222,7 +226,7 @@ with tab1:
 
                 with col2:
                     st.markdown(f"**Uploaded By:** {selected.get('uploaded_by', 'Unknown')}")
-                    upload_date = datetime.fromisoformat(selected.get('upload_date'))
+                    upload_date = selected['upload_date_dt']
                     st.markdown(f"**Upload Date:** {upload_date.strftime('%m/%d/%Y')}")
 
                     # Add tags if available
@@ -273,18 +277,18 @@ with tab2:
     now = datetime.now()
     recent_resources = [
         resource for resource in resources
-        if datetime.fromisoformat(resource.get("upload_date")) > (now - timedelta(days=30))
+        if resource["upload_date_dt"] > (now - timedelta(days=30))
     ]
 
     # Sort by upload date (newest first)
-    recent_resources.sort(key=lambda x: datetime.fromisoformat(x.get("upload_date")), reverse=True)
+    recent_resources.sort(key=lambda x: x["upload_date_ts"], reverse=True)
 
     if recent_resources:
         # Create a table for recent uploads
         recent_data = []
 
         for resource in recent_resources:
-            upload_date = datetime.fromisoformat(resource.get("upload_date"))
+            upload_date = resource["upload_date_dt"]
             days_ago = (now - upload_date).days
 
             if days_ago == 0:
@@ -304,6 +308,8 @@ with tab2:
             })
 
         # Create DataFrame
+        import pandas as pd
+        
         recent_df = pd.DataFrame(recent_data)
 
         # Display as table
@@ -322,6 +328,65 @@ with tab2:
     else:
         st.info("No resources have been uploaded in the last 30 days.")
 
+with tab3:
+    st.subheader("Season Archive")
+    st.write("Completed tasks, old message threads and past sponsors moved out of the live data.")
+
+    # Archived collection -> (label, title field, date field)
+    archive_sections = {
+        "tasks": ("Tasks", "title", "completed_at"),
+        "messages": ("Messages", "title", "timestamp"),
+        "sponsors": ("Sponsors", "name", "end_date"),
+    }
+
+    archive_col1, archive_col2 = st.columns(2)
+    with archive_col1:
+        archive_collection = st.selectbox("Archive", list(archive_sections), format_func=lambda x: archive_sections[x][0])
+    with archive_col2:
+        archive_search = st.text_input("Search the archive")
+
+    archived_months = archive.partitions(archive_collection)
+
+    # Nothing is read until a month range is chosen
+    if archived_months:
+        if len(archived_months) > 1:
+            archive_start, archive_end = st.select_slider(
+                "Months",
+                options=archived_months,
+                value=(archived_months[-1], archived_months[-1])
+            )
+        else:
+            archive_start = archive_end = archived_months[0]
+
+        label, title_field, date_field = archive_sections[archive_collection]
+        archived = archive.load_archive(archive_collection, archive_start, archive_end)
+        if archive_search:
+            search_lower = archive_search.lower()
+            archived = [
+                record for record in archived
+                if any(search_lower in str(value).lower() for value in record.values() if isinstance(value, str))
+            ]
+        archived.sort(key=lambda x: x.get(f"{date_field}_ts") or 0, reverse=True)
+
+        if archived:
+            archived_data = []
+            for record in archived:
+                record_date = record.get(f"{date_field}_dt")
+                archived_data.append({
+                    "Title": record.get(title_field) or record.get("content", "")[:60],
+                    "Date": record_date.strftime("%Y-%m-%d") if record_date else "",
+                    "Category": record.get("category") or record.get("level") or "",
+                    "By": record.get("author") or record.get("assigned_to") or record.get("contact_name") or ""
+                })
+            import pandas as pd
+            
+            st.dataframe(pd.DataFrame(archived_data), use_container_width=True, hide_index=True)
+            st.caption(f"{len(archived)} archived {label.lower()}")
+        else:
+            st.info("No archived records match your search.")
+    else:
+        st.info("Nothing has been archived yet.")
+
 # Resource upload/edit form
 if st.session_state.show_resource_form:
     st.markdown("---")
@@ -420,23 +485,15 @@ if st.session_state.show_resource_form:
                 tags_list = [tag.strip() for tag in resource_tags.split(",") if tag.strip()]
 
                 if editing:
-                    # Update existing resource
-                    for resource in resources:
-                        if resource["id"] == st.session_state.editing_resource:
-                            # Keep the existing file_path
-                            original_file_path = resource.get("file_path")
-
-                            resource["title"] = resource_title
-                            resource["description"] = resource_description
-                            resource["category"] = resource_category
-                            resource["file_type"] = resource_file_type
-                            resource["file_size"] = resource_file_size
-                            resource["tags"] = tags_list
-
-                            # Make sure we preserve the file path
-                            if original_file_path:
-                                resource["file_path"] = original_file_path
-                            break
+                    # Update only the edited fields; the existing file_path is kept
+                    patch_record("resources", st.session_state.editing_resource, {
+                        "title": resource_title,
+                        "description": resource_description,
+                        "category": resource_category,
+                        "file_type": resource_file_type,
+                        "file_size": resource_file_size,
+                        "tags": tags_list
+                    })
 
                     success_message = "Resource updated successfully!"
                 else:
@@ -500,12 +557,10 @@ if st.session_state.show_resource_form:
                             "tags": tags_list
                         }
 
-                        resources.append(new_resource)
+                        insert_record("resources", new_resource)
+                        record_activity("Resource", f"Uploaded resource: {resource_title}")
                         success_message = "Resource uploaded successfully!"
 
-                # Save resources to file
-                save_resources(resources)
-
                 # Reset form
                 st.session_state.show_resource_form = False
                 st.session_state.editing_resource = None
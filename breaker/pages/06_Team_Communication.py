@@ -1,13 +1,18 @@
 import streamlit as st
-import pandas as pd
 import json
 import os
 import sys
+from collections import Counter
 from datetime import datetime, timedelta
 
 # Add the parent directory to the path to import from the app root
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from util import load_messages, save_messages, load_team_members, generate_id
+from auth import restore_session
+from config import bootstrap
+from util import load_team_members, generate_id, get_record, insert_record, patch_record, delete_records, iter_recent, partition_counts, record_activity, unit_of_work
+
+# One-time process setup (settings, database tables); a no-op on later reruns
+bootstrap()
 
 # Page configuration
 st.set_page_config(
@@ -16,6 +21,9 @@ st.set_page_config(
     layout="wide"
 )
 
+# Restore the login from the session token after a refresh or reconnect
+restore_session()
+
 # Check if user is authenticated
 if 'authenticated' not in st.session_state or not st.session_state.authenticated:
     st.warning("Please login to access this page.")
@@ -29,6 +37,9 @@ st.write("Group discussions, announcements, and team message board")
 MESSAGE_CATEGORIES = ["Announcement", "Question", "Discussion", "Response", "Alert", "Update", "Other"]
 MESSAGE_PRIORITIES = ["Low", "Normal", "High", "Urgent"]
 
+# Posts shown per channel page; "Show older messages" loads this many more
+MESSAGE_PAGE_SIZE = 25
+
 # Initialize session state
 if 'selected_channel' not in st.session_state:
     st.session_state.selected_channel = "General"
@@ -42,9 +53,8 @@ if 'new_post' not in st.session_state:
     st.session_state.new_post = False
 if 'show_new_post_form' not in st.session_state:
     st.session_state.show_new_post_form = False
-
-# Load messages
-messages = load_messages()
+if 'message_limit' not in st.session_state:
+    st.session_state.message_limit = MESSAGE_PAGE_SIZE
 
 # Load team members for mentions
 team_members = load_team_members()
@@ -54,6 +64,23 @@ team_member_names = [member["name"] for member in team_members]
 CHANNELS = ["General", "Engineering", "Design", "Competition", "Outreach", "Admin"]
 
 
+# Load a post and its replies (oldest first). Replies are newer than their
+# post, so the channel is only read back to the post's time.
+def load_thread(message_id):
+    parent = get_record("messages", message_id)
+    if parent is None:
+        return None, []
+
+    replies = []
+    for msg in iter_recent("messages", parent.get('channel')):
+        if msg.get('parent_id') == message_id:
+            replies.append(msg)
+        elif msg['timestamp_ts'] is not None and parent['timestamp_ts'] is not None and msg['timestamp_ts'] < parent['timestamp_ts']:
+            break
+    replies.reverse()
+    return parent, replies
+
+
 # Function to toggle reply mode
 def toggle_reply(message_id):
     if st.session_state.reply_to == message_id:
@@ -78,9 +105,8 @@ def edit_message(message_id):
 # Function to delete message
 def delete_message(message_id):
     # Also delete all replies to this message
-    global messages
-    messages = [msg for msg in messages if msg['id'] != message_id and msg.get('parent_id') != message_id]
-    save_messages(messages)
+    _, replies = load_thread(message_id)
+    delete_records("messages", [message_id] + [reply['id'] for reply in replies])
 
     # Reset thread view if we're deleting the thread parent
     if st.session_state.view_thread == message_id:
@@ -94,13 +120,15 @@ def delete_message(message_id):
 with st.sidebar:
     st.header("Channels")
 
+    # Message counts per channel, kept in the partition manifest
+    channel_counts = partition_counts("messages")
+
     for channel in CHANNELS:
         # Count unread messages (would be implemented in a real app)
-        channel_messages = [msg for msg in messages if msg.get('channel') == channel]
-
-        if st.button(f"{channel} ({len(channel_messages)})", key=f"channel_{channel}"):
+        if st.button(f"{channel} ({channel_counts.get(channel, 0)})", key=f"channel_{channel}"):
             st.session_state.selected_channel = channel
             st.session_state.view_thread = None
+            st.session_state.message_limit = MESSAGE_PAGE_SIZE
             st.rerun()
 
     # Display online team members (simulated in this example)
@@ -117,7 +145,7 @@ with st.sidebar:
 # Main communication area
 if st.session_state.view_thread:
     # Show thread view
-    thread_parent = next((msg for msg in messages if msg['id'] == st.session_state.view_thread), None)
+    thread_parent, replies = load_thread(st.session_state.view_thread)
 
     if thread_parent:
         # Show back button
@@ -134,7 +162,7 @@ if st.session_state.view_thread:
             with col1:
                 st.markdown(f"**{thread_parent.get('author')}**")
             with col2:
-                timestamp = datetime.fromisoformat(thread_parent.get('timestamp'))
+                timestamp = thread_parent['timestamp_dt']
                 st.markdown(f"*{timestamp.strftime('%m/%d/%Y %I:%M %p')}*")
 
             if st.session_state.edit_message == thread_parent['id']:
@@ -156,19 +184,17 @@ if st.session_state.view_thread:
                         cancel_edit = st.form_submit_button("Cancel")
 
                     if save_edit:
-                        # Update message
-                        for msg in messages:
-                            if msg['id'] == thread_parent['id']:
-                                msg['title'] = edit_title
-                                msg['content'] = edit_content
-                                msg['category'] = edit_category
-                                msg['priority'] = edit_priority
-                                break
-
-                        save_messages(messages)
-                        st.session_state.edit_message = None
-                        st.success("Message updated successfully!")
-                        st.rerun()
+                        with unit_of_work():
+                            # Update message
+                            patch_record("messages", thread_parent['id'], {
+                                'title': edit_title,
+                                'content': edit_content,
+                                'category': edit_category,
+                                'priority': edit_priority
+                            })
+                            st.session_state.edit_message = None
+                            st.success("Message updated successfully!")
+                            st.rerun()
 
                     if cancel_edit:
                         st.session_state.edit_message = None
@@ -231,9 +257,6 @@ if st.session_state.view_thread:
         st.markdown("---")
 
         # Display replies
-        replies = [msg for msg in messages if msg.get('parent_id') == thread_parent['id']]
-        replies.sort(key=lambda x: datetime.fromisoformat(x.get('timestamp')))
-
         if replies:
             st.subheader(f"Replies ({len(replies)})")
 
@@ -243,7 +266,7 @@ if st.session_state.view_thread:
                     with col1:
                         st.markdown(f"**{reply.get('author')}**")
                     with col2:
-                        timestamp = datetime.fromisoformat(reply.get('timestamp'))
+                        timestamp = reply['timestamp_dt']
                         st.markdown(f"*{timestamp.strftime('%m/%d/%Y %I:%M %p')}*")
 
                     if st.session_state.edit_message == reply['id']:
@@ -258,16 +281,12 @@ if st.session_state.view_thread:
                                 cancel_edit = st.form_submit_button("Cancel")
 
                             if save_edit:
-                                # Update message
-                                for msg in messages:
-                                    if msg['id'] == reply['id']:
-                                        msg['content'] = edit_content
-                                        break
-
-                                save_messages(messages)
-                                st.session_state.edit_message = None
-                                st.success("Reply updated successfully!")
-                                st.rerun()
+                                with unit_of_work():
+                                    # Update message
+                                    patch_record("messages", reply['id'], {'content': edit_content})
+                                    st.session_state.edit_message = None
+                                    st.success("Reply updated successfully!")
+                                    st.rerun()
 
                             if cancel_edit:
                                 st.session_state.edit_message = None
@@ -303,23 +322,25 @@ if st.session_state.view_thread:
 
                 if submit_reply:
                     if reply_content:
-                        # Create new reply
-                        new_reply = {
-                            "id": generate_id(),
-                            "content": reply_content,
-                            "author": st.session_state.user,
-                            "timestamp": datetime.now().isoformat(),
-                            "parent_id": thread_parent['id'],
-                            "channel": thread_parent.get('channel', 'General'),
-                            "category": "Response"
-                        }
+                        # The reply and its activity entry are flushed together
+                        with unit_of_work():
+                            # Create new reply
+                            new_reply = {
+                                "id": generate_id(),
+                                "content": reply_content,
+                                "author": st.session_state.user,
+                                "timestamp": datetime.now().isoformat(),
+                                "parent_id": thread_parent['id'],
+                                "channel": thread_parent.get('channel', 'General'),
+                                "category": "Response"
+                            }
+
+                            insert_record("messages", new_reply)
+                            record_activity("Message", f"Replied to: {thread_parent.get('title') or 'a post'}")
 
-                        messages.append(new_reply)
-                        save_messages(messages)
-
-                        st.session_state.reply_to = None
-                        st.success("Reply posted successfully!")
-                        st.rerun()
+                            st.session_state.reply_to = None
+                            st.success("Reply posted successfully!")
+                            st.rerun()
                     else:
                         st.error("Reply content cannot be empty!")
 
@@ -361,24 +382,26 @@ else:
 
             if submit_post:
                 if post_content:
-                    # Create new post
-                    new_post = {
-                        "id": generate_id(),
-                        "title": post_title,
-                        "content": post_content,
-                        "author": st.session_state.user,
-                        "timestamp": datetime.now().isoformat(),
-                        "channel": st.session_state.selected_channel,
-                        "category": post_category,
-                        "priority": post_priority
-                    }
+                    # The post and its activity entry are flushed together
+                    with unit_of_work():
+                        # Create new post
+                        new_post = {
+                            "id": generate_id(),
+                            "title": post_title,
+                            "content": post_content,
+                            "author": st.session_state.user,
+                            "timestamp": datetime.now().isoformat(),
+                            "channel": st.session_state.selected_channel,
+                            "category": post_category,
+                            "priority": post_priority
+                        }
 
-                    messages.append(new_post)
-                    save_messages(messages)
+                        insert_record("messages", new_post)
+                        record_activity("Message", f"Posted: {post_title or 'Untitled post'}")
 
-                    st.session_state.show_new_post_form = False
-                    st.success("Message posted successfully!")
-                    st.rerun()
+                        st.session_state.show_new_post_form = False
+                        st.success("Message posted successfully!")
+                        st.rerun()
                 else:
                     st.error("Message content cannot be empty!")
 
@@ -386,13 +409,6 @@ else:
                 st.session_state.show_new_post_form = False
                 st.rerun()
 
-    # Filter messages for current channel
-    channel_messages = [msg for msg in messages if
-                        msg.get('channel') == st.session_state.selected_channel and not msg.get('parent_id')]
-
-    # Sort by timestamp (newest first)
-    channel_messages.sort(key=lambda x: datetime.fromisoformat(x.get('timestamp')), reverse=True)
-
     # Add filtering options
     col1, col2, col3 = st.columns(3)
 
@@ -405,34 +421,42 @@ else:
     with col3:
         search_messages = st.text_input("Search in messages", key="search_messages")
 
-    # Apply filters
-    filtered_messages = channel_messages
-
-    # Category filter
-    if not ("All" in filter_category or len(filter_category) == 0):
-        filtered_messages = [msg for msg in filtered_messages if msg.get('category') in filter_category]
-
-    # Time filter
+    # Oldest time shown by the time filter
     now = datetime.now()
-    if filter_time == "Today":
-        filtered_messages = [msg for msg in filtered_messages if
-                             datetime.fromisoformat(msg.get('timestamp')).date() == now.date()]
-    elif filter_time == "Past Week":
-        filtered_messages = [msg for msg in filtered_messages if
-                             datetime.fromisoformat(msg.get('timestamp')) > (now - timedelta(days=7))]
-    elif filter_time == "Past Month":
-        filtered_messages = [msg for msg in filtered_messages if
-                             datetime.fromisoformat(msg.get('timestamp')) > (now - timedelta(days=30))]
-
-    # Search filter
-    if search_messages:
-        search_term = search_messages.lower()
-        filtered_messages = [
-            msg for msg in filtered_messages
-            if (search_term in msg.get('title', '').lower() or
-                search_term in msg.get('content', '').lower() or
-                search_term in msg.get('author', '').lower())
-        ]
+    since = {
+        "Today": datetime.combine(now.date(), datetime.min.time()),
+        "Past Week": now - timedelta(days=7),
+        "Past Month": now - timedelta(days=30)
+    }.get(filter_time)
+    search_term = search_messages.lower()
+
+    # Walk the channel newest first and stop once this page's posts are found.
+    # Replies are newer than their post, so every reply of a shown post has
+    # been counted by the time the post itself is reached.
+    filtered_messages = []
+    reply_counts = Counter()
+    has_older = False
+    for msg in iter_recent("messages", st.session_state.selected_channel):
+        if since and (msg['timestamp_dt'] is None or msg['timestamp_dt'] < since):
+            break
+        if msg.get('parent_id'):
+            reply_counts[msg['parent_id']] += 1
+            continue
+
+        # Category filter
+        if not ("All" in filter_category or len(filter_category) == 0) and msg.get('category') not in filter_category:
+            continue
+
+        # Search filter
+        if search_term and not (search_term in msg.get('title', '').lower() or
+                                search_term in msg.get('content', '').lower() or
+                                search_term in msg.get('author', '').lower()):
+            continue
+
+        if len(filtered_messages) == st.session_state.message_limit:
+            has_older = True
+            break
+        filtered_messages.append(msg)
 
     # Display messages
     if filtered_messages:
@@ -442,7 +466,7 @@ else:
                 with col1:
                     st.markdown(f"**{message.get('author')}**")
                 with col2:
-                    timestamp = datetime.fromisoformat(message.get('timestamp'))
+                    timestamp = message['timestamp_dt']
                     st.markdown(f"*{timestamp.strftime('%m/%d/%Y %I:%M %p')}*")
 
                 # Display message content
@@ -483,13 +507,10 @@ else:
                         unsafe_allow_html=True
                     )
 
-                # Count replies
-                replies = [msg for msg in messages if msg.get('parent_id') == message['id']]
-
                 # Message actions
                 col1, col2, col3 = st.columns(3)
                 with col1:
-                    if st.button(f"View Thread ({len(replies)})", key=f"view_{message['id']}"):
+                    if st.button(f"View Thread ({reply_counts[message['id']]})", key=f"view_{message['id']}"):
                         view_thread(message['id'])
                 with col2:
                     if st.button("Reply", key=f"reply_{message['id']}"):
@@ -521,23 +542,25 @@ else:
 
                         if submit_reply:
                             if reply_content:
-                                # Create new reply
-                                new_reply = {
-                                    "id": generate_id(),
-                                    "content": reply_content,
-                                    "author": st.session_state.user,
-                                    "timestamp": datetime.now().isoformat(),
-                                    "parent_id": message['id'],
-                                    "channel": message.get('channel', 'General'),
-                                    "category": "Response"
-                                }
-
-                                messages.append(new_reply)
-                                save_messages(messages)
-
-                                st.session_state.reply_to = None
-                                st.success("Reply posted successfully!")
-                                st.rerun()
+                                # The reply and its activity entry are flushed together
+                                with unit_of_work():
+                                    # Create new reply
+                                    new_reply = {
+                                        "id": generate_id(),
+                                        "content": reply_content,
+                                        "author": st.session_state.user,
+                                        "timestamp": datetime.now().isoformat(),
+                                        "parent_id": message['id'],
+                                        "channel": message.get('channel', 'General'),
+                                        "category": "Response"
+                                    }
+
+                                    insert_record("messages", new_reply)
+                                    record_activity("Message", f"Replied to: {message.get('title') or 'a post'}")
+
+                                    st.session_state.reply_to = None
+                                    st.success("Reply posted successfully!")
+                                    st.rerun()
                             else:
                                 st.error("Reply content cannot be empty!")
 
@@ -546,6 +569,10 @@ else:
                             st.rerun()
 
                 st.markdown("---")
+
+        if has_older and st.button("Show older messages"):
+            st.session_state.message_limit += MESSAGE_PAGE_SIZE
+            st.rerun()
     else:
         st.info("No messages found in this channel. Be the first to post!")
 
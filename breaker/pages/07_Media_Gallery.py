@@ -1,15 +1,18 @@
 import streamlit as st
-import pandas as pd
 import json
 import os
 import sys
 from datetime import datetime, timedelta
 import base64
-from io import BytesIO
 
 # Add the parent directory to the path to import from the app root
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from util import load_media, save_media, check_role_access, generate_id
+from auth import restore_session
+from config import bootstrap
+from util import load_media, generate_id, get_record, insert_record, patch_record, delete_record, record_activity
+
+# One-time process setup (settings, database tables); a no-op on later reruns
+bootstrap()
 
 # Page configuration
 st.set_page_config(
@@ -18,6 +21,9 @@ st.set_page_config(
     layout="wide"
 )
 
+# Restore the login from the session token after a refresh or reconnect
+restore_session()
+
 # Check if user is authenticated
 if 'authenticated' not in st.session_state or not st.session_state.authenticated:
     st.warning("Please login to access this page.")
@@ -61,10 +67,8 @@ def edit_media(media_id):
 
 # Function to delete a media item
 def delete_media(media_id):
-    global media_items
-
     # Find the media item first to get file path
-    media_to_delete = next((item for item in media_items if item['id'] == media_id), None)
+    media_to_delete = get_record("media", media_id)
 
     if media_to_delete:
         # Delete the actual file if it exists
@@ -76,9 +80,8 @@ def delete_media(media_id):
             except Exception as e:
                 st.warning(f"Could not delete file from disk: {str(e)}")
 
-    # Remove from the list
-    media_items = [item for item in media_items if item['id'] != media_id]
-    save_media(media_items)
+    # Remove the media record
+    delete_record("media", media_id)
 
     # Reset selected media if we're deleting it
     if st.session_state.selected_media == media_id:
@@ -98,54 +101,12 @@ with col1:
 with col3:
     st.session_state.media_search = st.text_input("Search media...", value=st.session_state.media_search)
 
-# Create tabs
-tab1, tab2, tab3 = st.tabs(["Gallery View", "List View", "Albums"])
-
-with tab1:
-    # Filter media based on search term
-    filtered_media = media_items
-    if st.session_state.media_search:
-        search_term = st.session_state.media_search.lower()
-        filtered_media = [
-            item for item in media_items
-            if (search_term in item.get("title", "").lower() or
-                search_term in item.get("description", "").lower() or
-                search_term in item.get("category", "").lower() or
-                any(search_term in tag.lower() for tag in item.get("tags", [])))
-        ]
-
-    # Add filtering options
-    filter_col1, filter_col2, filter_col3 = st.columns(3)
-
-    with filter_col1:
-        filter_category = st.multiselect("Filter by Category", ["All"] + MEDIA_CATEGORIES, default=["All"])
-
-    with filter_col2:
-        filter_type = st.multiselect("Filter by Media Type", ["All"] + MEDIA_TYPES, default=["All"])
-
-    with filter_col3:
-        sort_options = ["Newest First", "Oldest First", "Title (A-Z)", "Category"]
-        sort_by = st.selectbox("Sort by", sort_options)
-
-    # Apply filters
-    # Category filter
-    if not ("All" in filter_category or len(filter_category) == 0):
-        filtered_media = [item for item in filtered_media if item.get("category", "Other") in filter_category]
-
-    # Media type filter
-    if not ("All" in filter_type or len(filter_type) == 0):
-        filtered_media = [item for item in filtered_media if item.get("media_type", "Other") in filter_type]
-
-    # Apply sorting
-    if sort_by == "Newest First":
-        filtered_media.sort(key=lambda x: datetime.fromisoformat(x.get("upload_date")), reverse=True)
-    elif sort_by == "Oldest First":
-        filtered_media.sort(key=lambda x: datetime.fromisoformat(x.get("upload_date")))
-    elif sort_by == "Title (A-Z)":
-        filtered_media.sort(key=lambda x: x.get("title", "").lower())
-    elif sort_by == "Category":
-        filtered_media.sort(key=lambda x: x.get("category", "Other"))
-
+# Media grid and the selected item's details. It is a fragment: opening and
+# closing details reruns only the gallery, with the filtered items from the
+# last full run, instead of reloading and refiltering the whole page. Deleting
+# or editing an item still reruns the page.
+@st.fragment
+def media_gallery(filtered_media):
     # Display media in a grid layout
     if filtered_media:
         # Create a grid of media items
@@ -205,7 +166,7 @@ with tab1:
                             # Add button to view details
                             if st.button("View Details", key=f"view_{item['id']}"):
                                 st.session_state.selected_media = item["id"]
-                                st.rerun()
+                                st.rerun(scope="fragment")
 
         # Display full details if an item is selected
         if st.session_state.selected_media:
@@ -283,7 +244,7 @@ with tab1:
                     st.markdown(f"**Category:** {selected_item.get('category', 'Other')}")
                     st.markdown(f"**Media Type:** {selected_item.get('media_type', 'Photo')}")
                     st.markdown(f"**Uploaded By:** {selected_item.get('uploaded_by', 'Unknown')}")
-                    upload_date = datetime.fromisoformat(selected_item.get('upload_date'))
+                    upload_date = selected_item['upload_date_dt']
                     st.markdown(f"**Upload Date:** {upload_date.strftime('%m/%d/%Y')}")
 
                     # Add tags if available
@@ -316,6 +277,8 @@ with tab1:
                         with action_col2:
                             if st.button("Edit Media"):
                                 edit_media(selected_item["id"])
+                                # The media form is outside the gallery, so the whole page reruns
+                                st.rerun()
 
                         with action_col3:
                             if st.button("Delete Media"):
@@ -324,10 +287,61 @@ with tab1:
                 # Close detail view
                 if st.button("Close"):
                     st.session_state.selected_media = None
-                    st.rerun()
+                    st.rerun(scope="fragment")
     else:
         st.info("No media items found matching your filters. Try adjusting your search criteria or upload new media.")
 
+
+# Create tabs
+tab1, tab2, tab3 = st.tabs(["Gallery View", "List View", "Albums"])
+
+with tab1:
+    # Filter media based on search term
+    filtered_media = media_items
+    if st.session_state.media_search:
+        search_term = st.session_state.media_search.lower()
+        filtered_media = [
+            item for item in media_items
+            if (search_term in item.get("title", "").lower() or
+                search_term in item.get("description", "").lower() or
+                search_term in item.get("category", "").lower() or
+                any(search_term in tag.lower() for tag in item.get("tags", [])))
+        ]
+
+    # Add filtering options
+    filter_col1, filter_col2, filter_col3 = st.columns(3)
+
+    with filter_col1:
+        filter_category = st.multiselect("Filter by Category", ["All"] + MEDIA_CATEGORIES, default=["All"])
+
+    with filter_col2:
+        filter_type = st.multiselect("Filter by Media Type", ["All"] + MEDIA_TYPES, default=["All"])
+
+    with filter_col3:
+        sort_options = ["Newest First", "Oldest First", "Title (A-Z)", "Category"]
+        sort_by = st.selectbox("Sort by", sort_options)
+
+    # Apply filters
+    # Category filter
+    if not ("All" in filter_category or len(filter_category) == 0):
+        filtered_media = [item for item in filtered_media if item.get("category", "Other") in filter_category]
+
+    # Media type filter
+    if not ("All" in filter_type or len(filter_type) == 0):
+        filtered_media = [item for item in filtered_media if item.get("media_type", "Other") in filter_type]
+
+    # Apply sorting
+    if sort_by == "Newest First":
+        filtered_media.sort(key=lambda x: x["upload_date_ts"], reverse=True)
+    elif sort_by == "Oldest First":
+        filtered_media.sort(key=lambda x: x["upload_date_ts"])
+    elif sort_by == "Title (A-Z)":
+        filtered_media.sort(key=lambda x: x.get("title", "").lower())
+    elif sort_by == "Category":
+        filtered_media.sort(key=lambda x: x.get("category", "Other"))
+
+    media_gallery(filtered_media)
+
 with tab2:
     # List view for media items
     st.subheader("Media List View")
@@ -336,7 +350,7 @@ with tab2:
     if media_items:
         media_data = []
         for item in media_items:
-            upload_date = datetime.fromisoformat(item.get("upload_date"))
+            upload_date = item["upload_date_dt"]
             formatted_date = upload_date.strftime("%m/%d/%Y")
 
             media_data.append({
@@ -348,6 +362,8 @@ with tab2:
                 "Upload Date": formatted_date
             })
 
+        import pandas as pd
+        
         media_df = pd.DataFrame(media_data)
 
         # Display as a table
@@ -564,15 +580,14 @@ if st.session_state.show_media_form:
                 success_message = ""
 
                 if editing:
-                    # Update existing media item
-                    for item in media_items:
-                        if item["id"] == st.session_state.editing_media:
-                            item["title"] = media_title
-                            item["description"] = media_description
-                            item["category"] = media_category
-                            item["media_type"] = media_type
-                            item["tags"] = tags_list
-                            break
+                    # Update only the edited media item
+                    patch_record("media", st.session_state.editing_media, {
+                        "title": media_title,
+                        "description": media_description,
+                        "category": media_category,
+                        "media_type": media_type,
+                        "tags": tags_list
+                    })
 
                     success_message = "Media item updated successfully!"
                 else:
@@ -619,12 +634,10 @@ if st.session_state.show_media_form:
                             "file_path": file_path
                         }
 
-                        media_items.append(new_media)
+                        insert_record("media", new_media)
+                        record_activity("Media", f"Uploaded media: {media_title}")
                         success_message = "Media uploaded successfully!"
 
-                # Save media items to file
-                save_media(media_items)
-
                 # Reset form
                 st.session_state.show_media_form = False
                 st.session_state.editing_media = None
@@ -678,7 +691,7 @@ if media_items:
         now = datetime.now()
         recent_count = len([
             item for item in media_items
-            if datetime.fromisoformat(item.get("upload_date")) > (now - timedelta(days=30))
+            if item["upload_date_dt"] > (now - timedelta(days=30))
         ])
 
         # Calculate percentage
@@ -722,7 +735,7 @@ if media_items:
             # Create DataFrame for export
             export_data = []
             for item in media_items:
-                upload_date = datetime.fromisoformat(item.get("upload_date"))
+                upload_date = item["upload_date_dt"]
                 formatted_date = upload_date.strftime("%Y-%m-%d")
 
                 export_data.append({
@@ -735,6 +748,8 @@ if media_items:
                     "Tags": ", ".join(item.get("tags", []))
                 })
 
+            import pandas as pd
+            
             export_df = pd.DataFrame(export_data)
 
             # Create download link
@@ -1,14 +1,18 @@
 import streamlit as st
-import pandas as pd
 import json
 import os
 import sys
 from datetime import datetime, timedelta
-import plotly.express as px
 
 # Add the parent directory to the path to import from the app root
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from util import load_sponsors, save_sponsors, check_role_access, generate_id
+from auth import restore_session
+from config import bootstrap
+from figures import cached_figure
+from util import load_sponsors, check_role_access, generate_id, insert_record, patch_record, delete_record, record_activity
+
+# One-time process setup (settings, database tables); a no-op on later reruns
+bootstrap()
 
 # Page configuration
 st.set_page_config(
@@ -17,6 +21,9 @@ st.set_page_config(
     layout="wide"
 )
 
+# Restore the login from the session token after a refresh or reconnect
+restore_session()
+
 # Check if user is authenticated
 if 'authenticated' not in st.session_state or not st.session_state.authenticated:
     st.warning("Please login to access this page.")
@@ -62,9 +69,7 @@ def edit_sponsor(sponsor_id):
 
 # Function to delete a sponsor
 def delete_sponsor(sponsor_id):
-    global sponsors
-    sponsors = [sponsor for sponsor in sponsors if sponsor['id'] != sponsor_id]
-    save_sponsors(sponsors)
+    delete_record("sponsors", sponsor_id)
     st.success("Sponsor deleted successfully!")
     st.rerun()
 
@@ -134,12 +139,12 @@ if st.session_state.current_view == "Sponsors":
         if filter_status == "Active":
             filtered_sponsors = [
                 sponsor for sponsor in filtered_sponsors 
-                if datetime.fromisoformat(sponsor.get("end_date", now.isoformat())) > now
+                if (sponsor.get("end_date_dt") or now) > now
             ]
         elif filter_status == "Expired":
             filtered_sponsors = [
                 sponsor for sponsor in filtered_sponsors 
-                if datetime.fromisoformat(sponsor.get("end_date", now.isoformat())) <= now
+                if (sponsor.get("end_date_dt") or now) <= now
             ]
         
         # Apply sorting
@@ -162,7 +167,7 @@ if st.session_state.current_view == "Sponsors":
             
             filtered_sponsors.sort(key=extract_amount, reverse=True)
         elif sort_by == "Start Date":
-            filtered_sponsors.sort(key=lambda x: datetime.fromisoformat(x.get("start_date", "2000-01-01T00:00:00")))
+            filtered_sponsors.sort(key=lambda x: x.get("start_date_ts") or 0)
         
         # Display sponsors in a list
         if filtered_sponsors:
@@ -174,7 +179,7 @@ if st.session_state.current_view == "Sponsors":
                     
                     # Calculate status
                     now = datetime.now()
-                    end_date = datetime.fromisoformat(sponsor.get("end_date", now.isoformat()))
+                    end_date = sponsor.get("end_date_dt") or now
                     is_active = end_date > now
                     status_color = "#28a745" if is_active else "#dc3545"  # Green if active, red if expired
                     status_text = "Active" if is_active else "Expired"
@@ -215,8 +220,8 @@ if st.session_state.current_view == "Sponsors":
                     
                     with col2:
                         # Date information
-                        start_date = datetime.fromisoformat(sponsor.get("start_date"))
-                        end_date = datetime.fromisoformat(sponsor.get("end_date"))
+                        start_date = sponsor["start_date_dt"]
+                        end_date = sponsor["end_date_dt"]
                         
                         st.markdown(f"**Start Date:** {start_date.strftime('%m/%d/%Y')}")
                         st.markdown(f"**End Date:** {end_date.strftime('%m/%d/%Y')}")
@@ -234,6 +239,9 @@ if st.session_state.current_view == "Sponsors":
             st.info("No sponsors found matching your filters. Add some using the 'Add New Sponsor' button.")
     
     with tab2:
+        import pandas as pd
+        import plotly.express as px
+        
         st.subheader("Sponsor Dashboard")
         
         if sponsors:
@@ -242,7 +250,7 @@ if st.session_state.current_view == "Sponsors":
             
             # Calculate active sponsors
             now = datetime.now()
-            active_sponsors = [sponsor for sponsor in sponsors if datetime.fromisoformat(sponsor.get("end_date", now.isoformat())) > now]
+            active_sponsors = [sponsor for sponsor in sponsors if (sponsor.get("end_date_dt") or now) > now]
             active_count = len(active_sponsors)
             
             # Calculate total sponsorship value (approximate)
@@ -272,7 +280,8 @@ if st.session_state.current_view == "Sponsors":
             # Create visualizations
             col1, col2 = st.columns(2)
             
-            with col1:
+            # Charts are cached until the sponsors change, see figures.py
+            def build_level_chart():
                 # Sponsors by level
                 level_counts = {}
                 for level in SPONSOR_LEVELS:
@@ -288,7 +297,7 @@ if st.session_state.current_view == "Sponsors":
                 })
                 
                 # Create pie chart
-                fig = px.pie(
+                return px.pie(
                     level_df,
                     values="Count",
                     names="Level",
@@ -296,16 +305,13 @@ if st.session_state.current_view == "Sponsors":
                     color="Level",
                     color_discrete_map={level: SPONSOR_COLORS.get(level, "#00B4D8") for level in level_counts.keys()}
                 )
-                
-                st.plotly_chart(fig, use_container_width=True)
             
-            with col2:
-                # Sponsorship timeline
+            def build_timeline_chart(today_line):
                 # Create a list of sponsors with their start and end dates
                 timeline_data = []
                 for sponsor in sponsors:
-                    start_date = datetime.fromisoformat(sponsor.get("start_date"))
-                    end_date = datetime.fromisoformat(sponsor.get("end_date"))
+                    start_date = sponsor["start_date_dt"]
+                    end_date = sponsor["end_date_dt"]
                     
                     timeline_data.append({
                         "Sponsor": sponsor.get("name"),
@@ -332,7 +338,7 @@ if st.session_state.current_view == "Sponsors":
                 )
                 
                 # Add a vertical line for today
-                fig.add_vline(x=datetime.now(), line_width=2, line_dash="dash", line_color="red")
+                fig.add_vline(x=today_line, line_width=2, line_dash="dash", line_color="red")
                 
                 # Update layout
                 fig.update_layout(
@@ -341,6 +347,20 @@ if st.session_state.current_view == "Sponsors":
                     legend_title="Level"
                 )
                 
+                return fig
+            
+            with col1:
+                fig = cached_figure("sponsors_by_level", ["sponsors"], build_level_chart)
+                st.plotly_chart(fig, use_container_width=True)
+            
+            with col2:
+                # Sponsorship timeline; the line for today moves once an hour
+                today_line = now.replace(minute=0, second=0, microsecond=0)
+                fig = cached_figure(
+                    "sponsorship_timeline", ["sponsors"],
+                    lambda: build_timeline_chart(today_line),
+                    params={"now": today_line.isoformat()}
+                )
                 st.plotly_chart(fig, use_container_width=True)
             
             # Upcoming renewals
@@ -349,17 +369,17 @@ if st.session_state.current_view == "Sponsors":
             # Get sponsors with end dates in the next 90 days
             upcoming_end = [
                 sponsor for sponsor in sponsors 
-                if now < datetime.fromisoformat(sponsor.get("end_date")) < (now + timedelta(days=90))
+                if now < sponsor["end_date_dt"] < (now + timedelta(days=90))
             ]
             
             # Sort by end date
-            upcoming_end.sort(key=lambda x: datetime.fromisoformat(x.get("end_date")))
+            upcoming_end.sort(key=lambda x: x["end_date_ts"])
             
             if upcoming_end:
                 # Create table data
                 renewal_data = []
                 for sponsor in upcoming_end:
-                    end_date = datetime.fromisoformat(sponsor.get("end_date"))
+                    end_date = sponsor["end_date_dt"]
                     days_left = (end_date - now).days
                     
                     renewal_data.append({
@@ -510,6 +530,10 @@ if st.session_state.current_view == "Sponsors":
 
 # Outreach view
 else:  # st.session_state.current_view == "Outreach"
+    # Charts of the Past Events and Community Impact tabs
+    import pandas as pd
+    import plotly.express as px
+    
     st.subheader("Team Outreach")
     
     # Create tabs for different outreach activities
@@ -718,18 +742,16 @@ else:  # st.session_state.current_view == "Outreach"
                 "Count": [12, 8, 3, 1, 0]
             }
             
-            feedback_df = pd.DataFrame(feedback_data)
-            
-            # Create a simple horizontal bar chart
-            fig = px.bar(
-                feedback_df,
+            # Sample data never changes, so the chart is built once
+            fig = cached_figure("outreach_feedback", [], lambda: px.bar(
+                pd.DataFrame(feedback_data),
                 x="Count",
                 y="Rating",
                 orientation="h",
                 title="Participant Satisfaction",
                 color="Count",
                 color_continuous_scale=px.colors.sequential.Viridis
-            )
+            ))
             
             st.plotly_chart(fig, use_container_width=True)
     
@@ -763,15 +785,13 @@ else:  # st.session_state.current_view == "Outreach"
                 "Percentage": [35, 25, 20, 10, 10]
             }
             
-            age_df = pd.DataFrame(age_data)
-            
-            fig = px.pie(
-                age_df,
+            fig = cached_figure("outreach_age_groups", [], lambda: px.pie(
+                pd.DataFrame(age_data),
                 values="Percentage",
                 names="Age Group",
                 title="Audience by Age Group",
                 color_discrete_sequence=px.colors.qualitative.Vivid
-            )
+            ))
             
             st.plotly_chart(fig, use_container_width=True)
         
@@ -782,16 +802,14 @@ else:  # st.session_state.current_view == "Outreach"
                 "Hours": [12, 10, 8, 5, 5, 5]
             }
             
-            topic_df = pd.DataFrame(topic_data)
-            
-            fig = px.bar(
-                topic_df,
+            fig = cached_figure("outreach_topics", [], lambda: px.bar(
+                pd.DataFrame(topic_data),
                 x="Topic",
                 y="Hours",
                 title="Educational Hours by Topic",
                 color="Hours",
                 color_continuous_scale=px.colors.sequential.Viridis
-            )
+            ))
             
             st.plotly_chart(fig, use_container_width=True)
         
@@ -806,11 +824,9 @@ else:  # st.session_state.current_view == "Outreach"
             "Events": [2, 1, 3, 2, 1, 3, 2, 1]
         }
         
-        location_df = pd.DataFrame(location_data)
-        
         # Create a scatter mapbox
-        fig = px.scatter_mapbox(
-            location_df,
+        fig = cached_figure("outreach_locations", [], lambda: px.scatter_mapbox(
+            pd.DataFrame(location_data),
             lat="lat",
             lon="lon",
             hover_name="Location",
@@ -820,7 +836,7 @@ else:  # st.session_state.current_view == "Outreach"
             size_max=15,
             zoom=10,
             mapbox_style="carto-positron"
-        )
+        ))
         
         st.plotly_chart(fig, use_container_width=True)
         
@@ -998,8 +1014,8 @@ if st.session_state.show_sponsor_form and st.session_state.current_view == "Spon
             contact_email_value = sponsor_to_edit.get("contact_email", "")
             website_value = sponsor_to_edit.get("website", "")
             description_value = sponsor_to_edit.get("description", "")
-            start_date_value = datetime.fromisoformat(sponsor_to_edit.get("start_date")).date()
-            end_date_value = datetime.fromisoformat(sponsor_to_edit.get("end_date")).date()
+            start_date_value = sponsor_to_edit["start_date_dt"].date()
+            end_date_value = sponsor_to_edit["end_date_dt"].date()
         else:
             name_value = ""
             level_index = 0
@@ -1065,19 +1081,18 @@ if st.session_state.show_sponsor_form and st.session_state.current_view == "Spon
                 end_datetime = datetime.combine(end_date, datetime.max.time())
                 
                 if editing:
-                    # Update existing sponsor
-                    for sponsor in sponsors:
-                        if sponsor["id"] == st.session_state.editing_sponsor:
-                            sponsor["name"] = sponsor_name
-                            sponsor["level"] = sponsor_level
-                            sponsor["contribution"] = sponsor_contribution
-                            sponsor["contact_name"] = contact_name
-                            sponsor["contact_email"] = contact_email
-                            sponsor["website"] = website
-                            sponsor["description"] = sponsor_description
-                            sponsor["start_date"] = start_datetime.isoformat()
-                            sponsor["end_date"] = end_datetime.isoformat()
-                            break
+                    # Update only the edited sponsor
+                    patch_record("sponsors", st.session_state.editing_sponsor, {
+                        "name": sponsor_name,
+                        "level": sponsor_level,
+                        "contribution": sponsor_contribution,
+                        "contact_name": contact_name,
+                        "contact_email": contact_email,
+                        "website": website,
+                        "description": sponsor_description,
+                        "start_date": start_datetime.isoformat(),
+                        "end_date": end_datetime.isoformat()
+                    })
                     
                     success_message = "Sponsor updated successfully!"
                 else:
@@ -1095,12 +1110,10 @@ if st.session_state.show_sponsor_form and st.session_state.current_view == "Spon
                         "end_date": end_datetime.isoformat()
                     }
                     
-                    sponsors.append(new_sponsor)
+                    insert_record("sponsors", new_sponsor)
+                    record_activity("Sponsor", f"Added sponsor: {sponsor_name}")
                     success_message = "Sponsor added successfully!"
                 
-                # Save sponsors to file
-                save_sponsors(sponsors)
-                
                 # Reset form
                 st.session_state.show_sponsor_form = False
                 st.session_state.editing_sponsor = None
@@ -1,14 +1,16 @@
 import streamlit as st
-import pandas as pd
 import json
 import os
 import sys
 from datetime import datetime
-import hashlib
 
 # Add the parent directory to the path to import from the app root
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from auth import hash_password, restore_session
+from config import bootstrap
 from util import check_role_access, generate_id
+import directory
+import sessions
 
 # Global variable to store users data
 users = {}
@@ -23,6 +25,9 @@ try:
 except Exception as e:
     st.warning(f"Database connection not available: {str(e)}")
 
+# One-time process setup (settings, database tables); a no-op on later reruns
+bootstrap()
+
 # Page configuration
 st.set_page_config(
     page_title="Team Profiles - Circuit Breakers",
@@ -30,6 +35,9 @@ st.set_page_config(
     layout="wide"
 )
 
+# Restore the login from the session token after a refresh or reconnect
+restore_session()
+
 # Check if user is authenticated
 if 'authenticated' not in st.session_state or not st.session_state.authenticated:
     st.warning("Please login to access this page.")
@@ -55,13 +63,6 @@ if 'view_mode' not in st.session_state:
 
 
 # Load team members
-def get_user_data_file():
-    data_dir = "breaker/data"  # Explicitly set the data directory
-    if not os.path.exists(data_dir):
-        os.makedirs(data_dir)
-    return os.path.join(data_dir, "users.json")
-
-
 def load_users():
     global users
 
@@ -96,41 +97,38 @@ def load_users():
         except:
             pass
 
-    # As fallback, load from JSON file
-    user_data_file = get_user_data_file()
-    if not os.path.exists(user_data_file):
-        # If file doesn't exist, return default admin user
+    # As fallback, load from the configured store
+    try:
+        stored_users = directory.load_users()
+    except Exception as e:
+        st.error(f"Error loading user data: {str(e)}")
+        return {}
+
+    if not stored_users:
+        # If no users are stored yet, return default admin user
         default_users = {
             "admin": {
                 "name": "Administrator",
                 "email": "admin@example.com",
                 "role": "admin",
-                "password": hashlib.sha256("admin123".encode()).hexdigest(),
+                "password": hash_password("admin123"),
                 "department": "Management",
                 "created_at": datetime.now().isoformat()
             }
         }
-        # Save default users to file
-        with open(user_data_file, 'w') as f:
-            json.dump(default_users, f, indent=4)
+        # Save default users to the store
+        directory.save_users(default_users)
         return default_users
 
-    try:
-        with open(user_data_file, 'r') as f:
-            return json.load(f)
-    except Exception as e:
-        st.error(f"Error loading user data: {str(e)}")
-        return {}
+    return stored_users
 
 
 def save_users(user_data):
     global users
     users = user_data
 
-    # Save to JSON file (for backward compatibility)
-    user_data_file = get_user_data_file()
-    with open(user_data_file, 'w') as f:
-        json.dump(user_data, f, indent=4)
+    # Save to the configured store (JSON file, journal or SQLite)
+    directory.save_users(user_data)
 
     # Only try database if available
     if database_available:
@@ -174,10 +172,6 @@ def save_users(user_data):
             st.warning("Changes saved to JSON file only. Database not available.")
 
 
-def hash_password(password):
-    return hashlib.sha256(password.encode()).hexdigest()
-
-
 # Load users data
 users = load_users()
 
@@ -232,6 +226,7 @@ def delete_member(username):
 
         # Save updated JSON
         save_users(users)
+        sessions.revoke_user(username)
         st.success(f"User {username} deleted successfully!")
         st.rerun()
     else:
@@ -385,6 +380,7 @@ with tab1:
         # Table view
         if filtered_members:
             # Convert to DataFrame
+            import pandas as pd
             members_df = pd.DataFrame(filtered_members)
 
             # Format columns for display
@@ -611,6 +607,10 @@ if st.session_state.show_member_form:
                 # Get existing user data
                 user_data = updated_users[username_to_edit].copy() if username_to_edit in updated_users else {}
 
+                # Sessions carry the username and role; changing them (or the password) logs the user out
+                if username_to_edit != username or role != user_data.get('role') or password_to_save:
+                    sessions.revoke_user(username_to_edit)
+
                 # Update fields
                 user_data['name'] = name
                 user_data['email'] = email
@@ -1,16 +1,25 @@
 import streamlit as st
-import pandas as pd
 import json
 import os
 import sys
 import random
 from datetime import datetime, timedelta
-import hashlib
-import plotly.express as px
 
 # Add the parent directory to the path to import from the app root
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from auth import hash_password, restore_session
+from config import bootstrap
 from util import check_role_access, generate_id
+import directory
+import figures
+import passwords
+import sessions
+import storage
+import backup
+import archive
+
+# One-time process setup (settings, database tables); a no-op on later reruns
+bootstrap()
 
 # Page configuration
 st.set_page_config(
@@ -19,6 +28,9 @@ st.set_page_config(
     layout="wide"
 )
 
+# Restore the login from the session token after a refresh or reconnect
+restore_session()
+
 # Check if user is authenticated and has admin role
 if 'authenticated' not in st.session_state or not st.session_state.authenticated:
     st.warning("Please login to access this page.")
@@ -32,26 +44,22 @@ if not check_role_access(['admin']):
 st.title("Admin Panel")
 st.write("System administration, user management, and application settings")
 
-# File paths
-USER_DATA_FILE = "breaker/data/users.json"
-APP_SETTINGS_FILE = "breaker/data/settings.json"
+# Every tab below tabulates with pandas; it is only loaded once the visitor
+# passed the admin check
+import pandas as pd
 
 # Helper functions
 def load_users():
-    if not os.path.exists(USER_DATA_FILE):
-        return {}
-    
-    with open(USER_DATA_FILE, 'r') as f:
-        return json.load(f)
+    return directory.load_users()
 
 def save_users(users):
-    with open(USER_DATA_FILE, 'w') as f:
-        json.dump(users, f, indent=4)
+    directory.save_users(users)
 
 def load_settings():
-    if not os.path.exists(APP_SETTINGS_FILE):
+    settings = storage.load_document("settings")
+    if not settings:
         # Create default settings
-        default_settings = {
+        settings = {
             "app_name": "Circuit Breakers Team Hub",
             "team_logo": "assets/logo.svg",
             "primary_color": "#00B4D8",  # Electric Blue
@@ -62,24 +70,16 @@ def load_settings():
             "message_retention_days": 180,
             "last_backup": None
         }
-        
-        # Ensure directory exists
-        os.makedirs(os.path.dirname(APP_SETTINGS_FILE), exist_ok=True)
-        
-        with open(APP_SETTINGS_FILE, 'w') as f:
-            json.dump(default_settings, f, indent=4)
-        
-        return default_settings
+        storage.save_document("settings", settings)
     
-    with open(APP_SETTINGS_FILE, 'r') as f:
-        return json.load(f)
+    return settings
 
 def save_settings(settings):
-    with open(APP_SETTINGS_FILE, 'w') as f:
-        json.dump(settings, f, indent=4)
+    storage.save_document("settings", settings)
 
-def hash_password(password):
-    return hashlib.sha256(password.encode()).hexdigest()
+def optimize_storage():
+    storage.optimize()
+    return f"{storage.storage_mode()} storage optimized"
 
 # Load data
 users = load_users()
@@ -327,6 +327,10 @@ with tab2:
                     elif reset_password and new_password != confirm_new_password:
                         st.error("Passwords do not match!")
                     else:
+                        # Sessions carry the role, so changing it (or the password) logs the user out
+                        if edit_role != users[edit_username].get('role') or reset_password:
+                            sessions.revoke_user(edit_username)
+                        
                         # Update user
                         users[edit_username]['name'] = edit_name
                         users[edit_username]['email'] = edit_email
@@ -365,6 +369,7 @@ with tab2:
                     if st.button("Confirm Delete"):
                         del users[delete_username]
                         save_users(users)
+                        sessions.revoke_user(delete_username)
                         
                         st.success(f"User '{delete_username}' deleted successfully!")
                         st.rerun()
@@ -589,58 +594,106 @@ with tab4:
             include_media = st.checkbox("Include Media Files", value=True)
             
             if st.button("Create Backup"):
-                # In a real application, this would create an actual backup
-                st.info("Creating backup... (This is a simulation)")
-                
-                # Update last backup time
-                settings['last_backup'] = datetime.now().isoformat()
-                save_settings(settings)
-                
-                # Show success message
-                st.success("Backup created successfully!")
-                st.markdown(f"Backup saved as: {backup_name}.zip (simulated)")
+                try:
+                    with st.spinner("Creating backup..."):
+                        manifest = backup.create_backup(backup_name, include_media=include_media)
+                    
+                    # Update last backup time
+                    settings['last_backup'] = manifest['created_at']
+                    save_settings(settings)
+                    
+                    st.success("Backup created successfully!")
+                    st.markdown(
+                        f"Backup saved as: {manifest['id']} "
+                        f"({len(manifest['files'])} files, {manifest['total_bytes'] / 1024 / 1024:.1f} MB, "
+                        f"{manifest['new_bytes'] / 1024 / 1024:.1f} MB new)"
+                    )
+                except Exception as e:
+                    st.error(f"Error creating backup: {str(e)}")
         
         with col2:
             st.markdown("### Restore from Backup")
             
-            # In a real app, this would show actual backups
-            backup_options = [
-                f"circuit_breakers_backup_{(datetime.now() - timedelta(days=i)).strftime('%Y%m%d')}" 
-                for i in range(5)
-            ]
-            
-            selected_backup = st.selectbox("Select Backup", backup_options)
-            
-            st.warning("Restoring from backup will overwrite current data. This cannot be undone!")
+            backups = {manifest['id']: manifest for manifest in backup.list_backups()}
             
-            if st.button("Restore Backup"):
-                # In a real application, this would restore from the backup
-                st.info("Restoring from backup... (This is a simulation)")
+            if backups:
+                selected_backup = st.selectbox(
+                    "Select Backup",
+                    list(backups.keys()),
+                    format_func=lambda x: f"{backups[x]['name']} ({datetime.fromisoformat(backups[x]['created_at']).strftime('%Y-%m-%d %H:%M')})"
+                )
                 
-                # Show success message after a short delay
-                st.success("Restore completed successfully! (simulated)")
+                st.warning("Restoring from backup will overwrite current data. The current data is backed up first.")
+                
+                col_a, col_b, col_c = st.columns(3)
+                
+                with col_a:
+                    if st.button("Verify Backup"):
+                        problems = backup.verify_backup(selected_backup)
+                        if problems:
+                            st.error(f"Backup is damaged: {len(problems)} problem(s)")
+                            for problem in problems[:10]:
+                                st.write(problem)
+                        else:
+                            st.success("Backup verified: all files intact.")
+                
+                with col_b:
+                    if st.button("Restore Backup"):
+                        try:
+                            with st.spinner("Restoring backup..."):
+                                safety = backup.restore_backup(selected_backup)
+                            st.success(f"Restore completed successfully! Previous data saved as {safety['id']}.")
+                        except Exception as e:
+                            st.error(f"Error restoring backup: {str(e)}")
+                
+                with col_c:
+                    if st.button("Delete Backup"):
+                        st.session_state.delete_backup_id = selected_backup
+                
+                # Deleting asks for a confirmation first
+                if st.session_state.get("delete_backup_id") == selected_backup:
+                    st.warning(f"Are you sure you want to delete backup '{backups[selected_backup]['name']}'? This cannot be undone!")
+                    
+                    col_d, col_e = st.columns(2)
+                    with col_d:
+                        if st.button("Confirm Delete", key="confirm_delete_backup"):
+                            st.session_state.delete_backup_id = None
+                            freed = backup.delete_backup(selected_backup)
+                            st.success(f"Backup deleted ({freed / 1024 / 1024:.1f} MB freed).")
+                            st.rerun()
+                    with col_e:
+                        if st.button("Cancel", key="cancel_delete_backup"):
+                            st.session_state.delete_backup_id = None
+                            st.rerun()
+            else:
+                st.info("No backups yet.")
     
     # Data Management
     with st.expander("Data Management"):
         st.markdown("### Data Cleanup")
         
-        cleanup_options = [
-            "Remove expired sponsors",
-            "Archive completed tasks older than 90 days",
-            "Delete temporary files",
-            "Optimize database"
-        ]
+        retention_days = settings.get('message_retention_days', archive.DEFAULT_MESSAGE_RETENTION_DAYS)
         
-        selected_cleanup = st.multiselect("Select Cleanup Operations", cleanup_options)
+        # Operation -> function returning a short result description.
+        # Archived records stay browsable from the Resources and Project pages.
+        cleanup_operations = {
+            "Remove expired sponsors": lambda: f"{archive.archive_expired_sponsors()} sponsor(s) archived",
+            f"Archive completed tasks older than {archive.TASK_ARCHIVE_DAYS} days": lambda: f"{archive.archive_completed_tasks()} task(s) archived",
+            f"Archive messages older than {retention_days} days": lambda: f"{archive.archive_old_messages(retention_days)} message(s) archived",
+            "Delete temporary files": lambda: f"{storage.remove_temp_files()} file(s) deleted",
+            "Optimize database": optimize_storage
+        }
+        
+        selected_cleanup = st.multiselect("Select Cleanup Operations", list(cleanup_operations))
         
         if st.button("Run Cleanup") and selected_cleanup:
-            # In a real application, this would perform the selected cleanup operations
-            st.info("Running cleanup operations... (This is a simulation)")
-            
-            for operation in selected_cleanup:
-                st.write(f"Completed: {operation}")
-            
-            st.success("Cleanup operations completed successfully! (simulated)")
+            try:
+                for operation in selected_cleanup:
+                    st.write(f"Completed: {operation} ({cleanup_operations[operation]()})")
+                
+                st.success("Cleanup operations completed successfully!")
+            except Exception as e:
+                st.error(f"Error running cleanup: {str(e)}")
         
         st.markdown("### Reset Application")
         
@@ -696,6 +749,25 @@ with tab4:
         })
         
         st.dataframe(system_df, use_container_width=True)
+        
+        # Password hashing runs in a bounded pool; queue depth and latency show whether it needs more workers
+        st.markdown("### Password Hashing")
+        hash_stats = passwords.pool_stats()
+        
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Workers", hash_stats["workers"])
+        col2.metric("Queued / Running", f"{hash_stats['queued']} / {hash_stats['running']}")
+        col3.metric("Avg Wait", f"{hash_stats['avg_wait_ms']:.0f} ms", help=f"p95: {hash_stats['p95_wait_ms']:.0f} ms")
+        col4.metric("Avg Hash Time", f"{hash_stats['avg_hash_ms']:.0f} ms", help=f"p95: {hash_stats['p95_hash_ms']:.0f} ms")
+        
+        # Charts are cached across sessions until their data changes
+        st.markdown("### Chart Cache")
+        figure_stats = figures.cache_info()
+        
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Cached Charts", f"{figure_stats['figures']} / {figures.MAX_FIGURES}")
+        col2.metric("Hits", figure_stats["hits"])
+        col3.metric("Misses", figure_stats["misses"])
 
 with tab5:
     st.subheader("System Logs & Activity")
@@ -0,0 +1,212 @@
+"""
+Password hashing for the Circuit Breakers Team Hub.
+
+Passwords are stored as "<scheme>$<parameters>$<salt>$<hash>" strings
+produced by a pluggable hasher; new hashes use DEFAULT_SCHEME (salted
+scrypt). Hashes from older versions of the app, a bare unsalted SHA-256 hex
+digest, are still accepted, and needs_rehash() tells the caller to replace
+them (or hashes with outdated parameters) after a successful login.
+
+scrypt is deliberately slow and memory-hard, so hashing runs in a bounded
+thread pool: hashlib releases the GIL while it works, so a burst of logins
+does not hold up other sessions' script threads, and at most HASH_WORKERS
+hashes (HASH_WORKERS * 16 MB) run at once. pool_stats() reports the queue
+depth and wait/run latency for sizing the pool.
+"""
+
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_SCHEME = os.environ.get("CIRCUIT_BREAKERS_PASSWORD_HASHER", "scrypt")
+
+HASH_WORKERS = int(os.environ.get("CIRCUIT_BREAKERS_HASH_WORKERS", min(4, os.cpu_count() or 1)))
+
+# Number of recent hashes the latency figures are computed from
+LATENCY_WINDOW = 200
+
+
+def _b64encode(data):
+    return base64.b64encode(data).decode().rstrip("=")
+
+
+def _b64decode(text):
+    return base64.b64decode(text + "=" * (-len(text) % 4))
+
+
+class ScryptHasher:
+    """Salted scrypt; "scrypt$<n>,<r>,<p>$<salt>$<hash>"."""
+
+    scheme = "scrypt"
+
+    def __init__(self, n=2 ** 14, r=8, p=1, salt_bytes=16, key_bytes=32):
+        self.n = n
+        self.r = r
+        self.p = p
+        self.salt_bytes = salt_bytes
+        self.key_bytes = key_bytes
+
+    def _derive(self, password, salt, n, r, p, key_bytes):
+        return hashlib.scrypt(
+            password.encode(), salt=salt, n=n, r=r, p=p,
+            maxmem=2 * 128 * n * r * p, dklen=key_bytes,
+        )
+
+    def hash(self, password):
+        salt = secrets.token_bytes(self.salt_bytes)
+        key = self._derive(password, salt, self.n, self.r, self.p, self.key_bytes)
+        return f"{self.scheme}${self.n},{self.r},{self.p}${_b64encode(salt)}${_b64encode(key)}"
+
+    def _parse(self, encoded):
+        _, params, salt, key = encoded.split("$")
+        n, r, p = (int(value) for value in params.split(","))
+        return n, r, p, _b64decode(salt), _b64decode(key)
+
+    def verify(self, password, encoded):
+        n, r, p, salt, key = self._parse(encoded)
+        return hmac.compare_digest(self._derive(password, salt, n, r, p, len(key)), key)
+
+    def needs_rehash(self, encoded):
+        n, r, p, salt, key = self._parse(encoded)
+        return (n, r, p, len(salt), len(key)) != (self.n, self.r, self.p, self.salt_bytes, self.key_bytes)
+
+
+class LegacySha256Hasher:
+    """Unsalted SHA-256 hex digests written by earlier versions; verify only."""
+
+    scheme = "sha256"
+
+    def hash(self, password):
+        raise ValueError("New passwords are never hashed with unsalted SHA-256")
+
+    def verify(self, password, encoded):
+        return hmac.compare_digest(hashlib.sha256(password.encode()).hexdigest(), encoded)
+
+    def needs_rehash(self, encoded):
+        return True
+
+
+HASHERS = {}
+
+
+def register_hasher(hasher):
+    """Make a hasher (an object with scheme, hash, verify and needs_rehash) available by its scheme."""
+    HASHERS[hasher.scheme] = hasher
+
+
+register_hasher(ScryptHasher())
+register_hasher(LegacySha256Hasher())
+
+
+def _hasher_for(encoded):
+    if not isinstance(encoded, str) or not encoded:
+        return None
+    scheme, sep, _ = encoded.partition("$")
+    if not sep:
+        # Legacy hashes are bare 64-character hex digests
+        return HASHERS["sha256"] if len(encoded) == 64 else None
+    return HASHERS.get(scheme)
+
+
+class HashPool:
+    """A fixed-size thread pool that records queue depth and latency."""
+
+    def __init__(self, workers):
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._completed = 0
+        self._waits = deque(maxlen=LATENCY_WINDOW)
+        self._runs = deque(maxlen=LATENCY_WINDOW)
+
+    def _run(self, submitted, fn, args):
+        started = time.perf_counter()
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+            self._waits.append(started - submitted)
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._completed += 1
+                self._runs.append(time.perf_counter() - started)
+
+    def run(self, fn, *args):
+        """Run fn(*args) on a pool thread and wait for its result."""
+        with self._lock:
+            self._queued += 1
+        return self._executor.submit(self._run, time.perf_counter(), fn, args).result()
+
+    def stats(self):
+        with self._lock:
+            waits = sorted(self._waits)
+            runs = sorted(self._runs)
+            stats = {
+                "workers": self.workers,
+                "queued": self._queued,
+                "running": self._running,
+                "completed": self._completed,
+            }
+        for label, samples in (("wait", waits), ("hash", runs)):
+            stats[f"avg_{label}_ms"] = 1000 * sum(samples) / len(samples) if samples else 0.0
+            stats[f"p95_{label}_ms"] = 1000 * samples[int(0.95 * (len(samples) - 1))] if samples else 0.0
+        return stats
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = HashPool(HASH_WORKERS)
+    return _pool
+
+
+def hash_password(password, scheme=None):
+    """Return a new salted hash of a password (in the hash pool)."""
+    hasher = HASHERS[scheme or DEFAULT_SCHEME]
+    return _get_pool().run(hasher.hash, password)
+
+
+def verify_password(password, encoded):
+    """Return whether a password matches a stored hash of any known scheme (in the hash pool)."""
+    hasher = _hasher_for(encoded)
+    if hasher is None:
+        return False
+    try:
+        return _get_pool().run(hasher.verify, password, encoded)
+    except ValueError:
+        # Malformed stored hash
+        return False
+
+
+def needs_rehash(encoded):
+    """Return whether a stored hash should be replaced by one from the default hasher."""
+    hasher = _hasher_for(encoded)
+    if hasher is None:
+        return False
+    if hasher.scheme != DEFAULT_SCHEME:
+        return True
+    try:
+        return hasher.needs_rehash(encoded)
+    except ValueError:
+        return True
+
+
+def pool_stats():
+    """Return the hash pool's size, queue depth, completed count and wait/hash latency (ms)."""
+    return _get_pool().stats()
@@ -0,0 +1,278 @@
+"""
+Recurring events for the Circuit Breakers Team Hub.
+
+A recurring event is stored once: its start_time/end_time are the first
+occurrence, and "recurrence" holds an RRULE-style rule such as
+"FREQ=WEEKLY;INTERVAL=1;BYDAY=TU,TH;UNTIL=20251219". Supported parts are
+FREQ (DAILY, WEEKLY or MONTHLY), INTERVAL, BYDAY (weekly rules), UNTIL (a
+date, inclusive) and COUNT. Two optional fields adjust single occurrences,
+both keyed by the ISO date the occurrence would originally start on:
+
+    "exceptions": ["2025-11-27"]                      cancelled occurrences
+    "overrides": {"2025-12-02": {"start_time": ...}}  changed fields (moved,
+                                                      another room, ...)
+
+Occurrences are never stored. occurrences() generates them only for the
+window being shown, jumping straight to the first period that can reach it,
+so storage and query cost depend on the rules and the window, not on how
+many times a series repeats over a season. Each occurrence is a copy of the
+event with its own start/end (and derived "_dt"/"_ts" keys), the same "id"
+as the series and its original date in "occurrence".
+"""
+
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from itertools import islice
+
+import storage
+
+FREQUENCIES = ("DAILY", "WEEKLY", "MONTHLY")
+WEEKDAYS = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+WEEKDAY_NAMES = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+
+
+@dataclass(frozen=True, slots=True)
+class Rule:
+    freq: str
+    interval: int = 1
+    # Weekday numbers (0 = Monday) of a weekly rule; empty means the first occurrence's weekday
+    byday: tuple = ()
+    until: date = None
+    count: int = None
+
+
+@lru_cache(maxsize=256)
+def parse_rule(text):
+    """Parse an RRULE-style string into a Rule; raises ValueError if it is malformed."""
+    parts = {}
+    for part in text.strip().split(";"):
+        key, sep, value = part.partition("=")
+        if not sep:
+            raise ValueError(f"Malformed recurrence part '{part}'")
+        parts[key.strip().upper()] = value.strip().upper()
+
+    freq = parts.pop("FREQ", None)
+    if freq not in FREQUENCIES:
+        raise ValueError(f"Recurrence FREQ must be one of {', '.join(FREQUENCIES)}")
+    try:
+        interval = int(parts.pop("INTERVAL", 1))
+        count = int(parts.pop("COUNT")) if "COUNT" in parts else None
+        byday = tuple(sorted({WEEKDAYS.index(day) for day in parts.pop("BYDAY", "").split(",") if day}))
+        until = parts.pop("UNTIL", None)
+        until = datetime.strptime(until[:8], "%Y%m%d").date() if until else None
+    except ValueError:
+        raise ValueError(f"Malformed recurrence rule '{text}'")
+    if interval < 1 or (count is not None and count < 1):
+        raise ValueError("Recurrence INTERVAL and COUNT must be positive")
+    if parts:
+        raise ValueError(f"Unsupported recurrence parts: {', '.join(parts)}")
+    return Rule(freq, interval, byday, until, count)
+
+
+def format_rule(rule):
+    """Return the stored string form of a Rule."""
+    parts = [f"FREQ={rule.freq}", f"INTERVAL={rule.interval}"]
+    if rule.byday:
+        parts.append("BYDAY=" + ",".join(WEEKDAYS[day] for day in rule.byday))
+    if rule.until:
+        parts.append(f"UNTIL={rule.until.strftime('%Y%m%d')}")
+    if rule.count:
+        parts.append(f"COUNT={rule.count}")
+    return ";".join(parts)
+
+
+def describe(rule):
+    """Return a short description of a Rule, e.g. "Every 2 weeks on Tue, Thu until Dec 19, 2025"."""
+    unit = {"DAILY": "day", "WEEKLY": "week", "MONTHLY": "month"}[rule.freq]
+    text = f"Every {unit}" if rule.interval == 1 else f"Every {rule.interval} {unit}s"
+    if rule.byday:
+        text += " on " + ", ".join(WEEKDAY_NAMES[day] for day in rule.byday)
+    if rule.until:
+        text += f" until {rule.until.strftime('%b %d, %Y')}"
+    if rule.count:
+        text += f", {rule.count} times"
+    return text
+
+
+def _starts(rule, first, not_before):
+    """Yield the rule's occurrence starts from first on, in order, up to UNTIL.
+
+    Whole periods ending before not_before are skipped arithmetically rather
+    than generated. COUNT is not applied here.
+    """
+    if rule.freq == "DAILY":
+        step = timedelta(days=rule.interval)
+        start = first + step * max(0, (not_before - first) // step)
+        while not (rule.until and start.date() > rule.until):
+            if start >= not_before:
+                yield start
+            start += step
+
+    elif rule.freq == "WEEKLY":
+        days = rule.byday or (first.weekday(),)
+        first_monday = first.date() - timedelta(days=first.weekday())
+        period = max(0, (not_before.date() - first_monday).days // 7 // rule.interval)
+        while True:
+            monday = first_monday + timedelta(weeks=period * rule.interval)
+            for day in days:
+                start = datetime.combine(monday + timedelta(days=day), first.time())
+                if rule.until and start.date() > rule.until:
+                    return
+                if start >= first and start >= not_before:
+                    yield start
+            period += 1
+
+    else:
+        first_month = first.year * 12 + first.month - 1
+        target_month = not_before.year * 12 + not_before.month - 1
+        period = max(0, (target_month - first_month) // rule.interval)
+        while True:
+            year, month = divmod(first_month + period * rule.interval, 12)
+            period += 1
+            try:
+                start = first.replace(year=year, month=month + 1)
+            except ValueError:
+                # Months without this day (the 31st, Feb 29) are skipped
+                continue
+            if rule.until and start.date() > rule.until:
+                return
+            if start >= not_before:
+                yield start
+
+
+@lru_cache(maxsize=256)
+def _last_start(rule, first):
+    """The start of the last occurrence of a rule with a COUNT."""
+    last = None
+    for last in islice(_starts(rule, first, first), rule.count):
+        pass
+    return last
+
+
+def _duration(event):
+    start = event["start_time_dt"]
+    end = event.get("end_time_dt") or start
+    return max(end - start, timedelta(0))
+
+
+def _override_times(original, duration, override):
+    start = storage.parse_timestamp(override.get("start_time")) or original
+    end = storage.parse_timestamp(override.get("end_time")) or start + duration
+    return start, end
+
+
+def _max_shift(event, duration):
+    """How far any override moves an occurrence's start or end."""
+    shift = timedelta(0)
+    first = event["start_time_dt"]
+    for key, override in (event.get("overrides") or {}).items():
+        try:
+            original = datetime.combine(date.fromisoformat(key), first.time())
+        except ValueError:
+            continue
+        start, end = _override_times(original, duration, override)
+        shift = max(shift, abs(start - original), abs(end - (original + duration)))
+    return shift
+
+
+def rule_of(event):
+    """Return the parsed Rule of an event, or None for a one-off (or unparseable) event."""
+    text = event.get("recurrence")
+    if not text or not event.get("start_time_dt"):
+        return None
+    try:
+        return parse_rule(text)
+    except ValueError as e:
+        print(f"Error in recurrence of event '{event.get('id')}': {str(e)}")
+        return None
+
+
+def series_span(event):
+    """Return (start, end) datetimes covering every occurrence of a recurring event; end is None if it never ends."""
+    rule = rule_of(event)
+    first = event["start_time_dt"]
+    duration = _duration(event)
+    shift = _max_shift(event, duration)
+
+    last = first
+    if rule is not None:
+        if rule.count:
+            last = _last_start(rule, first) or first
+        elif rule.until:
+            last = datetime.combine(rule.until, first.time())
+        else:
+            return first - shift, None
+    return first - shift, last + duration + shift
+
+
+def is_occurrence_date(event, day):
+    """Return whether a recurring event has an occurrence originally starting on a date."""
+    first = event["start_time_dt"]
+    original = datetime.combine(day, first.time())
+    rule = rule_of(event)
+    if rule is None:
+        return original == first
+    if next(_starts(rule, first, original), None) != original:
+        return False
+    return not rule.count or original <= _last_start(rule, first)
+
+
+def current_adjustments(event):
+    """Return (exceptions, overrides) of an event without the dates that are no longer occurrences.
+
+    Exceptions and overrides are keyed by original dates, so after the
+    series' start or rule changes some of them may belong to no occurrence.
+    """
+    def still_occurs(key):
+        try:
+            return is_occurrence_date(event, date.fromisoformat(key))
+        except ValueError:
+            return False
+
+    exceptions = [key for key in event.get("exceptions") or [] if still_occurs(key)]
+    overrides = {key: override for key, override in (event.get("overrides") or {}).items() if still_occurs(key)}
+    return exceptions, overrides
+
+
+def occurrences(event, start, end=None):
+    """Yield the occurrences of a recurring event overlapping [start, end) (end None: no limit).
+
+    Occurrences come in the order of their original dates; an override that
+    moves one does not reorder it. Cancelled dates are left out.
+    """
+    rule = rule_of(event)
+    first = event["start_time_dt"]
+    duration = _duration(event)
+    if rule is None:
+        if (end is None or first < end) and first + max(duration, timedelta(seconds=1)) > start:
+            yield event
+        return
+
+    exceptions = set(event.get("exceptions") or ())
+    overrides = event.get("overrides") or {}
+    shift = _max_shift(event, duration)
+    last = _last_start(rule, first) if rule.count else None
+
+    for original in _starts(rule, first, start - duration - shift):
+        if (last and original > last) or (end is not None and original >= end + shift):
+            return
+        key = original.date().isoformat()
+        if key in exceptions:
+            continue
+
+        override = overrides.get(key) or {}
+        occurrence_start, occurrence_end = _override_times(original, duration, override)
+        if (end is not None and occurrence_start >= end) or max(occurrence_end, occurrence_start + timedelta(seconds=1)) <= start:
+            continue
+
+        occurrence = {**event, **override, "occurrence": key}
+        occurrence.update({
+            "start_time": occurrence_start.isoformat(),
+            "start_time_dt": occurrence_start,
+            "start_time_ts": int(occurrence_start.timestamp()),
+            "end_time": occurrence_end.isoformat(),
+            "end_time_dt": occurrence_end,
+            "end_time_ts": int(occurrence_end.timestamp()),
+        })
+        yield occurrence
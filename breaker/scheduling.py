@@ -0,0 +1,189 @@
+"""
+Participant scheduling for the Circuit Breakers Team Hub.
+
+Events list their participants by name (or "All team members"). For a set
+of participants and a date range this module finds:
+
+- busy_intervals(): each participant's busy time, merged into disjoint
+  blocks;
+- clashes(): the existing events a proposed time would double-book;
+- series_clashes(): the same for every occurrence of a proposed repeating
+  event within a window;
+- conflicts(): existing events that already double-book someone;
+- free_slots(): the times within working hours when all the participants
+  are free for a given duration.
+
+The events come from the interval index (intervals.events_between(), which
+also expands recurring events), so only the events in the range are read.
+Busy time is computed with a sweep over interval starts in time order,
+which keeps a query over a season of events and a full roster well under a
+second, fast enough to run from the event form.
+"""
+
+import heapq
+from dataclasses import dataclass
+from datetime import datetime, time, timedelta
+
+import intervals
+import recurrence
+
+# Participant entries that mean the whole team
+ALL_MEMBERS = {"all team members", "all members", "everyone", "all"}
+
+# Working hours searched by free_slots()
+DAY_START = time(8, 0)
+DAY_END = time(21, 0)
+
+# How far ahead series_clashes() checks a repeating event by default
+SERIES_WINDOW = timedelta(days=90)
+
+
+@dataclass(frozen=True, slots=True)
+class Conflict:
+    participant: str
+    first: dict
+    second: dict
+    start: datetime
+    end: datetime
+
+
+def _key(name):
+    return name.strip().casefold()
+
+
+def _span(event):
+    start = event["start_time_dt"]
+    return start, max(event.get("end_time_dt") or start, start)
+
+
+def participant_events(participants, start, end, exclude_id=None):
+    """Return {participant: [events]} for the events overlapping [start, end) each participant takes part in.
+
+    participants None means everyone named in those events. Events with
+    exclude_id (the event being edited, all occurrences) are left out.
+    """
+    events = [
+        event for event in intervals.events_between(start, end)
+        if exclude_id is None or event.get("id") != exclude_id
+    ]
+
+    if participants is None:
+        names = {}
+        for event in events:
+            for name in event.get("participants") or []:
+                if name.strip() and _key(name) not in ALL_MEMBERS:
+                    names.setdefault(_key(name), name.strip())
+    else:
+        names = {_key(name): name.strip() for name in participants if name.strip()}
+
+    by_participant = {name: [] for name in names.values()}
+    # A whole-team entry among the participants asked about is busy whenever anyone is
+    team_entries = [name for key, name in names.items() if key in ALL_MEMBERS]
+    for event in events:
+        keys = {_key(name) for name in event.get("participants") or []}
+        if keys & ALL_MEMBERS:
+            involved = list(names.values())
+        else:
+            involved = [names[key] for key in keys if key in names and key not in ALL_MEMBERS]
+            if keys:
+                involved += team_entries
+        for name in involved:
+            by_participant[name].append(event)
+    return by_participant
+
+
+def _merge(spans):
+    """Merge (start, end) spans, sorted by start, into disjoint blocks."""
+    merged = []
+    for start, end in spans:
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def busy_intervals(participants, start, end, exclude_id=None):
+    """Return {participant: [(start, end)]}: each participant's busy blocks in [start, end), merged and clipped."""
+    busy = {}
+    for name, events in participant_events(participants, start, end, exclude_id).items():
+        spans = sorted((max(s, start), min(e, end)) for s, e in map(_span, events))
+        busy[name] = _merge(spans)
+    return busy
+
+
+def clashes(participants, start, end, exclude_id=None):
+    """Return {participant: [events]} for the existing events a proposed [start, end) would double-book."""
+    return {
+        name: events
+        for name, events in participant_events(participants, start, end, exclude_id).items()
+        if events
+    }
+
+
+def series_clashes(participants, event, window=SERIES_WINDOW, exclude_id=None):
+    """Return [(occurrence, {participant: [events]})] for the occurrences of a proposed event that double-book someone.
+
+    event is the proposal with parsed "_dt" times and an optional
+    "recurrence" rule; its occurrences starting within window of its first
+    one are checked, so a one-off event is checked once.
+    """
+    first = event["start_time_dt"]
+    found = []
+    for occurrence in recurrence.occurrences(event, first, first + window):
+        busy = clashes(participants, occurrence["start_time_dt"], occurrence["end_time_dt"], exclude_id)
+        if busy:
+            found.append((occurrence, busy))
+    return found
+
+
+def conflicts(participants, start, end):
+    """Return the Conflicts (pairs of overlapping events of one participant) in [start, end)."""
+    found = []
+    for name, events in participant_events(participants, start, end).items():
+        # Sweep the events in start order, keeping the ones still running in a heap by end
+        running = []
+        for event in sorted(events, key=lambda event: event["start_time_ts"]):
+            event_start, event_end = _span(event)
+            while running and running[0][0] <= event_start:
+                heapq.heappop(running)
+            for other_end, _, other in running:
+                found.append(Conflict(name, other, event, event_start, min(event_end, other_end)))
+            heapq.heappush(running, (event_end, id(event), event))
+    found.sort(key=lambda conflict: (conflict.start, conflict.participant))
+    return found
+
+
+def free_slots(participants, start, end, duration, day_start=DAY_START, day_end=DAY_END, exclude_id=None):
+    """Return the (start, end) gaps of at least duration in [start, end), within working hours, when all participants are free."""
+    busy = _merge(sorted(
+        span
+        for spans in busy_intervals(participants, start, end, exclude_id).values()
+        for span in spans
+    ))
+
+    slots = []
+    position = 0
+    day = start.date()
+    while day <= end.date():
+        window_start = max(start, datetime.combine(day, day_start))
+        window_end = min(end, datetime.combine(day, day_end))
+        cursor = window_start
+        # Busy blocks are disjoint and sorted, so a single pointer sweeps them all
+        while position < len(busy) and busy[position][1] <= window_start:
+            position += 1
+        index = position
+        while cursor < window_end:
+            if index < len(busy) and busy[index][0] < window_end:
+                block_start, block_end = busy[index]
+                if block_start - cursor >= duration:
+                    slots.append((cursor, block_start))
+                cursor = max(cursor, block_end)
+                index += 1
+            else:
+                if window_end - cursor >= duration:
+                    slots.append((cursor, window_end))
+                break
+        day += timedelta(days=1)
+    return slots
@@ -0,0 +1,298 @@
+"""
+Server-side login sessions for the Circuit Breakers Team Hub.
+
+A successful login creates a session and hands the browser a signed token
+("<session id>.<signature>"), which auth.py keeps in a cookie. When a
+refresh or websocket reconnect starts a fresh Streamlit session, app.py and
+the pages validate that token instead of asking for the password again: the
+signature is checked with one HMAC and the session is found with one dict
+lookup, without reading the users file.
+
+A token only works from the browser it was issued to (sessions are bound to
+a fingerprint of the client's User-Agent) and is replaced every time it is
+used to restore a login, so a copied token stops working once the owner's
+browser has reconnected. The replaced token stays valid for ROTATION_GRACE
+seconds, so tabs reconnecting at the same time are not logged out; they all
+get the same successor, so a replaced token never mints a second session.
+
+These bindings do not protect against script injection: auth.py has to
+write the cookie from JavaScript, so it cannot be HttpOnly, and a User-Agent
+is easy to copy. Any script running in the page can read the token and
+replay it until it is replaced or expires.
+
+Sessions expire SESSION_TTL seconds after they were last used. The table is
+kept in least-recently-used order, which for a sliding expiry is also expiry
+order, so expired sessions are dropped from its front and, once it holds
+MAX_SESSIONS, the least recently used session is evicted.
+
+The table is saved to SESSIONS_FILE, keyed by a hash of each session id (the
+file holds no usable tokens), and the signing key to SECRET_FILE, so logins
+survive a server restart. Both live outside the data directory, so they are
+not copied into backups. They are read (and the key created) on first use,
+not at import.
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+import storage
+
+SESSION_TTL = int(os.environ.get("CIRCUIT_BREAKERS_SESSION_TTL", 12 * 60 * 60))
+MAX_SESSIONS = 1000
+
+# How long a token keeps working after it was replaced by a newer one
+ROTATION_GRACE = 60
+
+# Expiry extensions are saved at most this often per session (seconds)
+SAVE_INTERVAL = 5 * 60
+
+SESSIONS_DIR = os.path.join(os.path.dirname(storage.DATA_DIR), ".sessions")
+SESSIONS_FILE = os.path.join(SESSIONS_DIR, "sessions.json")
+SECRET_FILE = os.path.join(SESSIONS_DIR, "secret")
+
+
+def _load_secret():
+    """The signing key: CIRCUIT_BREAKERS_SESSION_SECRET, else one kept in SECRET_FILE."""
+    secret = os.environ.get("CIRCUIT_BREAKERS_SESSION_SECRET", "").encode()
+    if secret:
+        return secret
+    os.makedirs(SESSIONS_DIR, exist_ok=True)
+    try:
+        fd = os.open(SECRET_FILE, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        with open(SECRET_FILE, "rb") as f:
+            return f.read()
+    secret = secrets.token_bytes(32)
+    with os.fdopen(fd, "wb") as f:
+        f.write(secret)
+    return secret
+
+
+_lock = threading.Lock()
+_secret_lock = threading.Lock()
+
+# Loaded on first use, see _signing_key() and _table()
+_secret = None
+_sessions = None
+
+
+@dataclass(slots=True)
+class Session:
+    username: str
+    name: Optional[str]
+    role: Optional[str]
+    user_id: Optional[int]
+    expires_at: float
+    # Fingerprint of the browser the session was created in
+    client: Optional[str] = None
+    # Set on a token that was replaced; it is not extended any more
+    rotated: bool = False
+    # Token that replaced this one; kept in memory only
+    successor: Optional[str] = None
+    # Expiry as last saved to SESSIONS_FILE
+    saved_expires_at: float = 0.0
+
+
+def _load_sessions():
+    sessions = OrderedDict()
+    try:
+        with open(SESSIONS_FILE) as f:
+            stored = json.load(f)
+    except FileNotFoundError:
+        return sessions
+    except (OSError, ValueError) as e:
+        print(f"Error loading login sessions: {str(e)}")
+        return sessions
+
+    now = time.time()
+    for key, data in sorted(stored.items(), key=lambda item: item[1].get("expires_at", 0)):
+        try:
+            session = Session(**data)
+        except TypeError:
+            continue
+        if session.expires_at > now:
+            sessions[key] = session
+    return sessions
+
+
+def _table():
+    """The session table (hash of session id -> Session, least recently used first); call with _lock held."""
+    global _sessions
+    if _sessions is None:
+        _sessions = _load_sessions()
+    return _sessions
+
+
+def _signing_key():
+    global _secret
+    if _secret is None:
+        with _secret_lock:
+            if _secret is None:
+                _secret = _load_secret()
+    return _secret
+
+
+def _stored(session):
+    data = asdict(session)
+    del data["successor"]
+    return data
+
+
+def _save():
+    """Write the session table to SESSIONS_FILE; call with _lock held."""
+    for session in _table().values():
+        session.saved_expires_at = session.expires_at
+    try:
+        storage._write_json(SESSIONS_FILE, {key: _stored(session) for key, session in _table().items()})
+    except OSError as e:
+        print(f"Error saving login sessions: {str(e)}")
+
+
+def client_fingerprint(user_agent):
+    """Return the fingerprint a session is bound to, from the client's User-Agent."""
+    return hashlib.sha256((user_agent or "").encode()).hexdigest()[:32]
+
+
+def _sign(session_id):
+    digest = hmac.new(_signing_key(), session_id.encode(), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+
+
+def _key(session_id):
+    return hashlib.sha256(session_id.encode()).hexdigest()
+
+
+def _session_key(token):
+    """Return the table key of a token with a valid signature, otherwise None."""
+    if not isinstance(token, str):
+        return None
+    session_id, _, signature = token.partition(".")
+    if not session_id or not hmac.compare_digest(signature, _sign(session_id)):
+        return None
+    return _key(session_id)
+
+
+def _purge(now):
+    sessions = _table()
+    while sessions:
+        key, session = next(iter(sessions.items()))
+        if session.expires_at > now and len(sessions) <= MAX_SESSIONS:
+            break
+        del sessions[key]
+
+
+def _add(session, now):
+    """Store a session under a new id; returns its token. Call with _lock held."""
+    session_id = secrets.token_urlsafe(18)
+    _table()[_key(session_id)] = session
+    _purge(now)
+    return f"{session_id}.{_sign(session_id)}"
+
+
+def create_session(username, name, role, user_id, client=None):
+    """Start a session for a logged-in user, bound to a client fingerprint; returns its token."""
+    now = time.time()
+    with _lock:
+        token = _add(Session(username, name, role, user_id, now + SESSION_TTL, client), now)
+        _save()
+    return token
+
+
+def _lookup(key, client, now):
+    """Return the live Session under key for this client; call with _lock held."""
+    session = _table().get(key)
+    if session is None:
+        return None
+    if session.expires_at <= now:
+        del _table()[key]
+        return None
+    if session.client is not None and session.client != client:
+        return None
+    return session
+
+
+def validate(token, client=None):
+    """Return the Session of a token and extend its expiry, or None if invalid, expired or from another client."""
+    key = _session_key(token)
+    if key is None:
+        return None
+
+    now = time.time()
+    with _lock:
+        session = _lookup(key, client, now)
+        if session is None:
+            return None
+        if not session.rotated:
+            session.expires_at = now + SESSION_TTL
+            _table().move_to_end(key)
+            if session.expires_at - session.saved_expires_at > SAVE_INTERVAL:
+                _save()
+        return session
+
+
+def rotate(token, client=None):
+    """Replace a valid token with a new one for the same session; returns (new token, Session) or (None, None).
+
+    The old token keeps working for ROTATION_GRACE seconds. Rotating it
+    again in that time returns the same successor, if it is still valid;
+    a second session is never created from one token.
+    """
+    key = _session_key(token)
+    if key is None:
+        return None, None
+
+    now = time.time()
+    with _lock:
+        session = _lookup(key, client, now)
+        if session is None:
+            return None, None
+        if session.rotated:
+            # Successors are not saved, so after a restart this gives up
+            successor = session.successor
+            renewed = _lookup(_session_key(successor), client, now) if successor else None
+            return (successor, renewed) if renewed is not None else (None, None)
+
+        renewed = Session(session.username, session.name, session.role, session.user_id, now + SESSION_TTL, session.client)
+        new_token = _add(renewed, now)
+        session.rotated = True
+        session.successor = new_token
+        session.expires_at = min(session.expires_at, now + ROTATION_GRACE)
+        _save()
+        return new_token, renewed
+
+
+def revoke(token):
+    """End the session of a token (logout); unknown tokens are ignored."""
+    key = _session_key(token)
+    if key is not None:
+        with _lock:
+            if _table().pop(key, None) is not None:
+                _save()
+
+
+def revoke_user(username):
+    """End every session of a user, e.g. after the user is deleted or their role or password changes."""
+    with _lock:
+        sessions = _table()
+        keys = [key for key, session in sessions.items() if session.username == username]
+        for key in keys:
+            del sessions[key]
+        if keys:
+            _save()
+
+
+def active_sessions():
+    """Return the number of sessions that have not expired."""
+    now = time.time()
+    with _lock:
+        _purge(now)
+        return len(_table())
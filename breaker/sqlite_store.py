@@ -0,0 +1,429 @@
+"""
+Embedded SQLite backend for the Circuit Breakers Team Hub.
+
+Selected with CIRCUIT_BREAKERS_STORAGE=sqlite. It honours the same
+load/save contract as the JSON stores in storage.py: every record is kept
+verbatim as JSON in a ``data`` column, and the fields pages filter and sort
+on are copied into real, indexed columns. The database runs in WAL mode, so
+readers never block the single writer.
+"""
+
+import copy
+import json
+import os
+import sqlite3
+import threading
+
+import storage
+
+# Location of the SQLite database file
+SQLITE_PATH = os.path.join(storage.DATA_DIR, "circuit_breakers.db")
+
+# Collection name -> (table, indexed columns mirrored from record fields)
+COLLECTION_TABLES = {
+    "tasks": ("tasks", ["status", "priority", "category", "assigned_to", "created_by", "created_at", "due_date"]),
+    "logs": ("build_logs", ["category", "author", "date"]),
+    "resources": ("resources", ["category", "file_type", "uploaded_by", "upload_date"]),
+    "media": ("media_items", ["category", "media_type", "uploaded_by", "upload_date"]),
+    "messages": ("messages", ["channel", "category", "author", "parent_id", "timestamp"]),
+    "events": ("events", ["category", "organizer", "start_time", "end_time"]),
+    "sponsors": ("sponsors", ["level", "start_date", "end_date"]),
+}
+
+# Table -> indexes, each a list of columns
+TABLE_INDEXES = {
+    "tasks": [["status"], ["assigned_to"], ["category"], ["due_date"], ["created_at"]],
+    "build_logs": [["category"], ["author"], ["date"]],
+    "resources": [["category"], ["uploaded_by"], ["upload_date"]],
+    "media_items": [["category"], ["uploaded_by"], ["upload_date"]],
+    "messages": [["channel", "timestamp"], ["parent_id"], ["category"], ["author"], ["timestamp"]],
+    "events": [["category"], ["start_time"], ["end_time"]],
+    "sponsors": [["level"], ["start_date"], ["end_date"]],
+    "users": [["id"], ["name"], ["email"], ["role"]],
+}
+
+# Columns mirrored from each user record (keyed by username)
+USER_COLUMNS = ["id", "name", "email", "role", "department", "created_at"]
+
+
+def _column_value(value):
+    """Only scalar values are mirrored into indexed columns."""
+    if isinstance(value, (str, int, float)) or value is None:
+        return value
+    return None
+
+
+def create_schema(conn):
+    """Create all tables and indexes if they don't exist."""
+    for table, columns in COLLECTION_TABLES.values():
+        column_defs = "".join(f", {column}" for column in columns)
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} "
+            f"(id TEXT PRIMARY KEY, position INTEGER NOT NULL{column_defs}, data TEXT NOT NULL)"
+        )
+
+    user_column_defs = "".join(f", {column}" for column in USER_COLUMNS)
+    conn.execute(f"CREATE TABLE IF NOT EXISTS users (username TEXT PRIMARY KEY{user_column_defs}, data TEXT NOT NULL)")
+    conn.execute("CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT)")
+    conn.execute("CREATE TABLE IF NOT EXISTS collection_versions (name TEXT PRIMARY KEY, version INTEGER NOT NULL)")
+
+    for table, indexes in TABLE_INDEXES.items():
+        for columns in indexes:
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_{'_'.join(columns)} ON {table} ({', '.join(columns)})")
+
+
+class SqliteStore:
+    """Collection and document storage in a single WAL-mode SQLite database."""
+
+    def __init__(self, path=SQLITE_PATH):
+        self.path = path
+        self._local = threading.local()
+        # Serializes writers within the process; other processes wait on SQLite's lock
+        self._write_lock = threading.Lock()
+        # name -> (database version, data)
+        self._cache = {}
+        self._cache_lock = threading.Lock()
+        self._times = storage.ParsedTimes()
+
+        with self._write_lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            create_schema(conn)
+            conn.execute("COMMIT")
+
+    def _connection(self):
+        """Return this thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _db_version(self, conn, name):
+        row = conn.execute("SELECT version FROM collection_versions WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else 0
+
+    def _bump_version(self, conn, name):
+        conn.execute(
+            "INSERT INTO collection_versions (name, version) VALUES (?, 1) "
+            "ON CONFLICT(name) DO UPDATE SET version = version + 1",
+            (name,)
+        )
+
+    def _read(self, conn, name):
+        if name == "users":
+            return {username: json.loads(data) for username, data in conn.execute("SELECT username, data FROM users")}
+        if name == "settings":
+            return {key: json.loads(value) for key, value in conn.execute("SELECT key, value FROM settings")}
+        table = COLLECTION_TABLES[name][0]
+        return [json.loads(data) for (data,) in conn.execute(f"SELECT data FROM {table} ORDER BY position")]
+
+    def _refresh(self, name):
+        """Return cached data, re-reading it when another writer bumped the version."""
+        conn = self._connection()
+        version = self._db_version(conn, name)
+        with self._cache_lock:
+            cached = self._cache.get(name)
+            if cached is not None and cached[0] == version:
+                return cached[1]
+
+        # Read the version and rows in one snapshot so they agree; writers
+        # call this from inside their own transaction
+        if conn.in_transaction:
+            version = self._db_version(conn, name)
+            data = self._read(conn, name)
+        else:
+            conn.execute("BEGIN")
+            try:
+                version = self._db_version(conn, name)
+                data = self._read(conn, name)
+            finally:
+                conn.execute("COMMIT")
+
+        with self._cache_lock:
+            self._cache[name] = (version, data)
+        return data
+
+    def _write(self, name, data, apply_changes):
+        """Run apply_changes(conn, current_data) in one write transaction and cache data."""
+        with self._write_lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                apply_changes(conn, self._refresh(name))
+                self._bump_version(conn, name)
+                version = self._db_version(conn, name)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+        with self._cache_lock:
+            self._cache[name] = (version, data)
+
+    def _write_records(self, name, apply_changes, update_cached):
+        """Run targeted row changes in one write transaction.
+
+        apply_changes(conn) returns the number of affected records. When the
+        cache held the version just before this write, update_cached(items)
+        brings it up to date in memory instead of re-reading the table.
+        """
+        with self._write_lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                previous = self._db_version(conn, name)
+                count = apply_changes(conn)
+                if count:
+                    self._bump_version(conn, name)
+                version = self._db_version(conn, name)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+        if count:
+            with self._cache_lock:
+                cached = self._cache.get(name)
+                if cached is not None and cached[0] == previous:
+                    self._cache[name] = (version, update_cached(cached[1]))
+                else:
+                    self._cache.pop(name, None)
+        return count
+
+    def _upsert_rows(self, conn, name, rows):
+        """Insert or replace (position, item) rows for a collection."""
+        table, columns = COLLECTION_TABLES[name]
+        column_names = ", ".join(["id", "position", *columns, "data"])
+        placeholders = ", ".join("?" * (len(columns) + 3))
+        updates = ", ".join(f"{column} = excluded.{column}" for column in ["position", *columns, "data"])
+        conn.executemany(
+            f"INSERT INTO {table} ({column_names}) VALUES ({placeholders}) "
+            f"ON CONFLICT(id) DO UPDATE SET {updates}",
+            [
+                (item["id"], position, *[_column_value(item.get(column)) for column in columns], json.dumps(item))
+                for position, item in rows
+            ]
+        )
+
+    def _current_rows(self, conn, name, ids):
+        """Return {id: (position, item)} for the given ids that exist."""
+        table = COLLECTION_TABLES[name][0]
+        rows = {}
+        for record_id in ids:
+            row = conn.execute(f"SELECT position, data FROM {table} WHERE id = ?", (record_id,)).fetchone()
+            if row:
+                rows[record_id] = (row[0], json.loads(row[1]))
+        return rows
+
+    def load(self, name):
+        return self._times.with_times(name, self._refresh(name))
+
+    def load_shared(self, name):
+        return self._refresh(name)
+
+    def get(self, name, record_id):
+        table = COLLECTION_TABLES[name][0]
+        row = self._connection().execute(f"SELECT data FROM {table} WHERE id = ?", (record_id,)).fetchone()
+        if not row:
+            return None
+        item = json.loads(row[0])
+        return {**item, **storage._parse_times(item)}
+
+    def insert(self, name, new_items):
+        new_items = storage._clean_items(new_items)
+        table = COLLECTION_TABLES[name][0]
+
+        def apply_changes(conn):
+            ids = [item.get("id") for item in new_items]
+            if None in ids or len(set(ids)) != len(ids) or self._current_rows(conn, name, ids):
+                raise ValueError(f"Cannot insert {name} records with missing or duplicate ids")
+            start = conn.execute(f"SELECT COALESCE(MAX(position), -1) + 1 FROM {table}").fetchone()[0]
+            self._upsert_rows(conn, name, enumerate(new_items, start))
+            return len(new_items)
+
+        self._write_records(name, apply_changes, lambda items: items + new_items)
+
+    def update(self, name, items):
+        replacements = {item["id"]: storage._strip_times(item) for item in items}
+
+        def apply_changes(conn):
+            current = self._current_rows(conn, name, replacements)
+            for record_id in list(replacements):
+                if record_id not in current:
+                    del replacements[record_id]
+            self._upsert_rows(conn, name, [(current[record_id][0], item) for record_id, item in replacements.items()])
+            return len(replacements)
+
+        return self._write_records(name, apply_changes, lambda items: storage._replace_items(items, replacements))
+
+    def patch(self, name, patches):
+        replacements = {}
+
+        def apply_changes(conn):
+            current = self._current_rows(conn, name, patches)
+            for record_id, (position, item) in current.items():
+                replacements[record_id] = {**item, **copy.deepcopy(storage._strip_times(patches[record_id]))}
+            self._upsert_rows(conn, name, [(current[record_id][0], item) for record_id, item in replacements.items()])
+            return len(replacements)
+
+        return self._write_records(name, apply_changes, lambda items: storage._replace_items(items, replacements))
+
+    def delete(self, name, ids):
+        ids = set(ids)
+        table = COLLECTION_TABLES[name][0]
+
+        def apply_changes(conn):
+            deleted = 0
+            for record_id in ids:
+                deleted += conn.execute(f"DELETE FROM {table} WHERE id = ?", (record_id,)).rowcount
+            return deleted
+
+        return self._write_records(name, apply_changes, lambda items: storage._delete_items(items, ids))
+
+    def _check_ids(self, name, items):
+        ids = [item.get("id") for item in items]
+        if None in ids or len(set(ids)) != len(ids):
+            raise ValueError(f"Every {name} record needs a unique id to be stored in SQLite")
+
+    def _save_rows(self, conn, name, current_items, items):
+        """Write only the rows that differ between current_items and items."""
+        table = COLLECTION_TABLES[name][0]
+        current = {item["id"]: (position, item) for position, item in enumerate(current_items)}
+        changed = [
+            (position, item) for position, item in enumerate(items)
+            if current.get(item["id"]) != (position, item)
+        ]
+        deleted = [(item_id,) for item_id in current.keys() - {item["id"] for item in items}]
+
+        self._upsert_rows(conn, name, changed)
+        conn.executemany(f"DELETE FROM {table} WHERE id = ?", deleted)
+
+    def _save_document_rows(self, conn, name, current, data):
+        """Write only the users/settings entries that changed."""
+        if name == "users":
+            rows = [
+                (username, *[_column_value(user.get(column)) for column in USER_COLUMNS], json.dumps(user))
+                for username, user in data.items()
+                if username not in current or current[username] != user
+            ]
+            conn.executemany(
+                f"INSERT OR REPLACE INTO users (username, {', '.join(USER_COLUMNS)}, data) "
+                f"VALUES ({', '.join('?' * (len(USER_COLUMNS) + 2))})",
+                rows
+            )
+            conn.executemany("DELETE FROM users WHERE username = ?", [(key,) for key in current.keys() - data.keys()])
+        else:
+            rows = [(key, json.dumps(value)) for key, value in data.items() if key not in current or current[key] != value]
+            conn.executemany("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", rows)
+            conn.executemany("DELETE FROM settings WHERE key = ?", [(key,) for key in current.keys() - data.keys()])
+
+    def save(self, name, items):
+        items = storage._clean_items(items)
+        self._check_ids(name, items)
+        self._write(name, items, lambda conn, current: self._save_rows(conn, name, current, items))
+
+    def load_document(self, name):
+        return copy.deepcopy(self._refresh(name))
+
+    def save_document(self, name, data):
+        data = copy.deepcopy(data)
+        self._write(name, data, lambda conn, current: self._save_document_rows(conn, name, current, data))
+
+    def apply_batch(self, collections, documents):
+        """Apply buffered changes to collections and documents in a single transaction.
+
+        collections maps a collection name to a function turning its current
+        records into the new ones; documents maps a document name to its new
+        contents. Either everything is written or nothing is.
+        """
+        results = {}
+        with self._write_lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                for name, transform in collections.items():
+                    current = self._refresh(name)
+                    items = storage._clean_items(transform(list(current)))
+                    self._check_ids(name, items)
+                    self._save_rows(conn, name, current, items)
+                    self._bump_version(conn, name)
+                    results[name] = items
+                for name, data in documents.items():
+                    data = copy.deepcopy(data)
+                    self._save_document_rows(conn, name, self._refresh(name), data)
+                    self._bump_version(conn, name)
+                    results[name] = data
+                versions = {name: self._db_version(conn, name) for name in results}
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+        with self._cache_lock:
+            for name, data in results.items():
+                self._cache[name] = (versions[name], data)
+
+    def find(self, name, order_by=None, descending=False, limit=None, **filters):
+        table, columns = COLLECTION_TABLES[name]
+        if any(field not in columns and field != "id" for field in [*filters, *([order_by] if order_by else [])]):
+            # Fields without a column are matched on the cached records, as
+            # the JSON stores do
+            return storage._find_in(self.load(name), order_by, descending, limit, filters)
+
+        sql = f"SELECT data FROM {table}"
+        params = []
+        if filters:
+            conditions = []
+            for field, value in filters.items():
+                if value is None:
+                    conditions.append(f"{field} IS NULL")
+                else:
+                    conditions.append(f"{field} = ?")
+                    params.append(value)
+            sql += " WHERE " + " AND ".join(conditions)
+        if order_by:
+            sql += f" ORDER BY {order_by} IS NULL, {order_by} {'DESC' if descending else 'ASC'}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        items = [json.loads(data) for (data,) in self._connection().execute(sql, params)]
+        return [{**item, **storage._parse_times(item)} for item in items]
+
+    def iter_recent(self, name, key):
+        key_field, time_field = storage.PARTITIONED_COLLECTIONS[name]
+        table = COLLECTION_TABLES[name][0]
+        # Served by the (key, time) index; NULL times sort last when descending
+        cursor = self._connection().execute(
+            f"SELECT data FROM {table} WHERE {key_field} IS ? ORDER BY {time_field} DESC", (key,)
+        )
+        try:
+            for (data,) in cursor:
+                item = json.loads(data)
+                yield {**item, **storage._parse_times(item)}
+        finally:
+            cursor.close()
+
+    def partition_counts(self, name):
+        key_field, _ = storage.PARTITIONED_COLLECTIONS[name]
+        table = COLLECTION_TABLES[name][0]
+        return dict(self._connection().execute(f"SELECT {key_field}, COUNT(*) FROM {table} GROUP BY {key_field}"))
+
+    def version(self, name):
+        return self._db_version(self._connection(), name)
+
+    def invalidate(self, name):
+        with self._cache_lock:
+            self._cache.pop(name, None)
+
+    def optimize(self):
+        """Refresh query statistics, reclaim free pages and truncate the WAL."""
+        with self._write_lock:
+            conn = self._connection()
+            conn.execute("PRAGMA optimize")
+            conn.execute("VACUUM")
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
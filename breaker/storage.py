@@ -0,0 +1,1061 @@
+"""
+Collection storage for the Circuit Breakers Team Hub.
+
+The util.load_*/save_* helpers go through this module. Parsed collections are
+kept in a process-wide cache shared by every Streamlit session and are
+revalidated against the backing files' mtime and size, so a rerun only reads
+and parses JSON when something actually changed on disk. Loaded records
+also carry parsed "<field>_dt"/"<field>_ts" values for their TIME_FIELDS.
+
+Three storage modes are available, selected with the CIRCUIT_BREAKERS_STORAGE
+environment variable (see config.configure_environment):
+
+- "json": every save rewrites the collection's JSON file.
+- "journal": each save appends only the changed records to a per-collection
+  JSONL journal next to the JSON snapshot. Reads replay snapshot + journal,
+  and a background compactor folds the journal back into the snapshot once
+  it grows past JOURNAL_COMPACT_THRESHOLD records.
+- "sqlite": collections and the users/settings documents live in one
+  WAL-mode SQLite database with indexed columns (see sqlite_store.py).
+
+In the JSON modes, the collections in PARTITIONED_COLLECTIONS (messages) are
+stored as one file per channel and month plus a manifest, and saves rewrite
+only the partitions that changed. The partitions are created on first use
+from the collection's former single file, which is kept unchanged; they are
+runtime data and not tracked in git.
+"""
+
+import contextlib
+import copy
+import hashlib
+import json
+import os
+import re
+import threading
+from datetime import datetime
+
+# Root directory for all data files
+DATA_DIR = "breaker/data"
+
+# Collection name -> JSON file backing it
+COLLECTION_FILES = {
+    "tasks": os.path.join(DATA_DIR, "tasks", "tasks.json"),
+    "logs": os.path.join(DATA_DIR, "logs", "build_logs.json"),
+    "resources": os.path.join(DATA_DIR, "resources", "resources.json"),
+    "media": os.path.join(DATA_DIR, "media", "media_items.json"),
+    "sponsors": os.path.join(DATA_DIR, "sponsors", "sponsors.json"),
+    "events": os.path.join(DATA_DIR, "events", "events.json"),
+    "messages": os.path.join(DATA_DIR, "messages", "messages.json"),
+}
+
+# Collections stored in the JSON modes as one file per partition instead of a
+# single file: name -> (partition field, time field). Records are grouped by
+# the partition field's value and the month of the time field, and a manifest
+# lists the partitions, so recent records of one key (e.g. the latest messages
+# of a channel) are read without touching older history (see iter_recent).
+PARTITIONED_COLLECTIONS = {
+    "messages": ("channel", "timestamp"),
+}
+
+# Month of partitioned records without a usable time; read after every month
+UNDATED_PARTITION = "undated"
+
+# Document name -> JSON file holding a single object rather than a list
+DOCUMENT_FILES = {
+    "users": os.path.join(DATA_DIR, "users.json"),
+    "settings": os.path.join(DATA_DIR, "settings.json"),
+}
+
+# Record fields holding ISO timestamps. Loaded records also carry
+# "<field>_dt" (datetime) and "<field>_ts" (integer epoch seconds) for each of
+# them, parsed once per change; these derived keys are dropped again on save.
+TIME_FIELDS = [
+    "created_at", "due_date", "completed_at", "date", "start_time", "end_time",
+    "timestamp", "upload_date", "start_date", "end_date",
+]
+DERIVED_TIME_KEYS = {f"{field}{suffix}" for field in TIME_FIELDS for suffix in ("_dt", "_ts")}
+
+# Number of journal records after which a collection is compacted
+JOURNAL_COMPACT_THRESHOLD = 500
+
+
+def _file_stamp(path):
+    """Return the (mtime, size) pair used to validate a cache entry."""
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _write_json(path, data):
+    """Write data to path atomically so readers never see a partial file."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Unique per process and thread, so concurrent writers of the same file
+    # never write into each other's temporary file
+    tmp_path = f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, indent=4)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _data_path(name):
+    """Return the JSON file backing a collection or document.
+
+    For partitioned collections this is the partition manifest.
+    """
+    if name in PARTITIONED_COLLECTIONS:
+        return _manifest_path(name)
+    return COLLECTION_FILES.get(name) or DOCUMENT_FILES[name]
+
+
+def _empty_value(name):
+    return {} if name in DOCUMENT_FILES else []
+
+
+def parse_timestamp(value):
+    """Parse an ISO timestamp string, returning None if it isn't one."""
+    if not isinstance(value, str):
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+def _parse_times(item):
+    """Return the derived datetime/epoch keys for a record's time fields."""
+    parsed = {}
+    for field in TIME_FIELDS:
+        if field in item:
+            value = parse_timestamp(item[field])
+            parsed[f"{field}_dt"] = value
+            parsed[f"{field}_ts"] = int(value.timestamp()) if value else None
+    return parsed
+
+
+def _copy_value(value):
+    # Nested lists and dicts (participants, tags, ...) are copied as well, so
+    # changes to a copy never reach the shared cache, nor the other way round
+    return copy.deepcopy(value) if isinstance(value, (list, dict)) else value
+
+
+def _strip_times(item):
+    """Return a copy of item without derived time keys."""
+    return {key: _copy_value(value) for key, value in item.items() if key not in DERIVED_TIME_KEYS}
+
+
+def _with_times(item, parsed=None):
+    """Return a copy of a cached record with its derived time keys merged in."""
+    record = {key: _copy_value(value) for key, value in item.items()}
+    record.update(_parse_times(item) if parsed is None else parsed)
+    return record
+
+
+def _clean_items(items):
+    """Copy records for storage, dropping derived time keys."""
+    return [_strip_times(item) for item in items]
+
+
+class ParsedTimes:
+    """Per-collection cache of parsed time fields, rebuilt only for changed records."""
+
+    def __init__(self):
+        # name -> (items list the values were parsed from, parsed dicts)
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def get(self, name, items):
+        with self._lock:
+            cached = self._cache.get(name)
+            if cached is not None and cached[0] is items:
+                return cached[1]
+
+        # Unchanged record dicts are shared between cache versions, so their
+        # parsed values can be reused by identity
+        previous = {}
+        if cached is not None:
+            previous = {id(item): parsed for item, parsed in zip(*cached)}
+        parsed = [previous.get(id(item)) or _parse_times(item) for item in items]
+
+        with self._lock:
+            self._cache[name] = (items, parsed)
+        return parsed
+
+    def with_times(self, name, items):
+        """Copy records and merge in their parsed time fields."""
+        return [_with_times(item, parsed) for item, parsed in zip(items, self.get(name, items))]
+
+
+def partition_dir(name):
+    """Return the directory holding a partitioned collection's files."""
+    return os.path.join(os.path.dirname(COLLECTION_FILES[name]), "partitions")
+
+
+def _manifest_path(name):
+    return os.path.join(partition_dir(name), "manifest.json")
+
+
+def _partition_of(name, item):
+    """Return the (key, month) partition a record belongs to."""
+    key_field, time_field = PARTITIONED_COLLECTIONS[name]
+    value = parse_timestamp(item.get(time_field))
+    return item.get(key_field), value.strftime("%Y-%m") if value else UNDATED_PARTITION
+
+
+def _group_partitions(name, items):
+    groups = {}
+    for item in items:
+        groups.setdefault(_partition_of(name, item), []).append(item)
+    return groups
+
+
+def _partition_file(key, month):
+    """Return a partition's file name relative to the partition directory."""
+    if key is None:
+        directory = "_none"
+    else:
+        directory = re.sub(r"[^A-Za-z0-9_-]+", "_", str(key))
+        if directory != key:
+            # Keep keys that only differ in special characters apart
+            directory = f"{directory}-{hashlib.sha1(str(key).encode()).hexdigest()[:8]}"
+    return os.path.join(directory, f"{month}.json")
+
+
+def _newest_first(entries):
+    """Sort manifest entries newest month first, undated ones last."""
+    dated = [entry for entry in entries if entry["month"] != UNDATED_PARTITION]
+    dated.sort(key=lambda entry: entry["month"], reverse=True)
+    return dated + [entry for entry in entries if entry["month"] == UNDATED_PARTITION]
+
+
+def _read_legacy(name):
+    """Read a partitioned collection from its former single file and journal, if any."""
+    items = []
+    path = COLLECTION_FILES[name]
+    if os.path.exists(path) and os.path.getsize(path) > 0:
+        with open(path, 'r') as f:
+            items = json.load(f)
+    records, _ = _read_journal(journal_path(name))
+    return _replay(items, records)
+
+
+def journal_path(name):
+    """Return the JSONL journal file for a collection."""
+    return f"{COLLECTION_FILES[name]}.journal"
+
+
+def _read_journal(path):
+    """Read journal records and the byte length of the complete ones.
+
+    A torn final line left by an interrupted append is not counted, so the
+    caller can truncate it away before appending again.
+    """
+    if not os.path.exists(path):
+        return [], 0
+
+    records = []
+    valid_length = 0
+    with open(path, 'rb') as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                break
+            valid_length += len(line)
+    return records, valid_length
+
+
+def _replay(items, records):
+    """Apply journal records to snapshot items, keeping snapshot order."""
+    by_id = {item.get("id", ("no-id", index)): item for index, item in enumerate(items)}
+    for record in records:
+        if record["op"] == "put":
+            item = record["item"]
+            by_id[item["id"]] = item
+        elif record["op"] == "delete":
+            by_id.pop(record["id"], None)
+    return list(by_id.values())
+
+
+def _diff_records(old_items, new_items):
+    """Return the journal records turning old_items into new_items.
+
+    Returns None when the collection cannot be journaled by id (missing or
+    duplicate ids), in which case the caller rewrites the snapshot instead.
+    """
+    new_by_id = {}
+    for item in new_items:
+        item_id = item.get("id")
+        if item_id is None or item_id in new_by_id:
+            return None
+        new_by_id[item_id] = item
+
+    old_by_id = {item.get("id"): item for item in old_items}
+    if None in old_by_id:
+        return None
+
+    records = [
+        {"op": "put", "item": item}
+        for item_id, item in new_by_id.items()
+        if old_by_id.get(item_id) != item
+    ]
+    records.extend(
+        {"op": "delete", "id": item_id}
+        for item_id in old_by_id
+        if item_id not in new_by_id
+    )
+    return records
+
+
+def _insert_items(items, new_items):
+    """Return items with new_items appended, rejecting missing or taken ids."""
+    taken = {item.get("id") for item in items}
+    for item in new_items:
+        item_id = item.get("id")
+        if item_id is None or item_id in taken:
+            raise ValueError(f"Cannot insert record with missing or duplicate id: {item_id!r}")
+        taken.add(item_id)
+    return items + new_items
+
+
+def _replace_items(items, replacements):
+    """Return items with records swapped for replacements (id -> record), keeping order."""
+    return [replacements.get(item.get("id"), item) for item in items]
+
+
+def _patch_replacements(items, patches):
+    """Turn patches (id -> changed fields) into full replacement records for existing ids."""
+    by_id = {item.get("id"): item for item in items}
+    return {
+        item_id: {**by_id[item_id], **changes}
+        for item_id, changes in patches.items()
+        if item_id in by_id
+    }
+
+
+def _delete_items(items, ids):
+    """Return items without the records whose id is in ids."""
+    return [item for item in items if item.get("id") not in ids]
+
+
+def _find_in(items, order_by, descending, limit, filters):
+    """Filter, sort and limit records the way Store.find does."""
+    items = [item for item in items if all(item.get(field) == value for field, value in filters.items())]
+    if order_by:
+        # Records missing the field go last in either direction, as in SQL
+        present = [item for item in items if item.get(order_by) is not None]
+        present.sort(key=lambda item: item[order_by], reverse=descending)
+        items = present + [item for item in items if item.get(order_by) is None]
+    return items[:limit] if limit is not None else items
+
+
+class JsonStore:
+    """Whole-file JSON storage with a shared, mtime-validated cache."""
+
+    def __init__(self):
+        # name -> (file stamp, parsed items); shared by all sessions in the process
+        self._cache = {}
+        # name -> counter bumped every time the cached contents change
+        names = list(COLLECTION_FILES) + list(DOCUMENT_FILES)
+        self._versions = {name: 0 for name in names}
+        self._locks = {name: threading.RLock() for name in names}
+        self._times = ParsedTimes()
+        # partition file -> (file stamp, items); name -> (file stamp, manifest)
+        self._partitions = {}
+        self._manifests = {}
+
+    def _stamp(self, name):
+        return _file_stamp(_data_path(name))
+
+    def _read(self, name):
+        if name in PARTITIONED_COLLECTIONS:
+            items = []
+            for entry in self._manifest(name)["partitions"]:
+                items.extend(self._partition(name, entry))
+            return items
+
+        path = _data_path(name)
+        if os.path.getsize(path) == 0:
+            return _empty_value(name)
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    def _write(self, name, data):
+        if name in PARTITIONED_COLLECTIONS:
+            self._write_partitions(name, data, self._refresh(name))
+            return
+        _write_json(_data_path(name), data)
+
+    def _create(self, name):
+        """Create the missing file of a collection or document."""
+        if name not in PARTITIONED_COLLECTIONS:
+            _write_json(_data_path(name), _empty_value(name))
+            return
+
+        # Split the collection's former single file (and journal) into
+        # partitions. The old files are left as they were: the single file is
+        # part of the checked-in sample data, and once the manifest exists
+        # neither is read again.
+        self._write_partitions(name, _read_legacy(name), [])
+
+    def _manifest(self, name):
+        path = _manifest_path(name)
+        if not os.path.exists(path):
+            self._refresh(name)
+        stamp = _file_stamp(path)
+        cached = self._manifests.get(name)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        with open(path, 'r') as f:
+            manifest = json.load(f)
+        self._manifests[name] = (stamp, manifest)
+        return manifest
+
+    def _partition(self, name, entry):
+        """Return the records of one partition, re-reading its file only when it changed."""
+        path = os.path.join(partition_dir(name), entry["file"])
+        stamp = _file_stamp(path)
+        cached = self._partitions.get(path)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        with open(path, 'r') as f:
+            items = json.load(f)
+        self._partitions[path] = (stamp, items)
+        return items
+
+    def _write_partitions(self, name, items, old_items):
+        """Rewrite only the partitions whose records changed, then the manifest."""
+        directory = partition_dir(name)
+        old_groups = _group_partitions(name, old_items)
+        new_groups = _group_partitions(name, items)
+        manifest_exists = os.path.exists(_manifest_path(name))
+        files = {
+            (entry["key"], entry["month"]): entry["file"]
+            for entry in (self._manifest(name)["partitions"] if manifest_exists else [])
+        }
+
+        entries = []
+        for (key, month), group in sorted(new_groups.items(), key=lambda kv: (kv[0][1], str(kv[0][0]))):
+            file = files.get((key, month)) or _partition_file(key, month)
+            path = os.path.join(directory, file)
+            if old_groups.get((key, month)) != group or not os.path.exists(path):
+                _write_json(path, group)
+                self._partitions[path] = (_file_stamp(path), group)
+            entries.append({"key": key, "month": month, "file": file, "count": len(group)})
+        _write_json(_manifest_path(name), {"partitions": entries})
+
+        # Emptied partitions go only after the manifest stopped listing them
+        for partition in old_groups.keys() - new_groups.keys():
+            if partition in files:
+                path = os.path.join(directory, files[partition])
+                self._partitions.pop(path, None)
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def _refresh(self, name):
+        """Return the cached data for a collection or document, reloading it if the files changed."""
+        with self._locks[name]:
+            if not os.path.exists(_data_path(name)):
+                self._create(name)
+
+            stamp = self._stamp(name)
+            cached = self._cache.get(name)
+            if cached is not None and cached[0] == stamp:
+                return cached[1]
+
+            items = self._read(name)
+            self._cache[name] = (stamp, items)
+            self._versions[name] += 1
+            return items
+
+    def load(self, name):
+        return self._times.with_times(name, self._refresh(name))
+
+    def load_shared(self, name):
+        return self._refresh(name)
+
+    def save(self, name, items):
+        items = _clean_items(items)
+        with self._locks[name]:
+            self._write(name, items)
+            self._cache[name] = (self._stamp(name), items)
+            self._versions[name] += 1
+
+    def load_document(self, name):
+        return copy.deepcopy(self._refresh(name))
+
+    def save_document(self, name, data):
+        data = copy.deepcopy(data)
+        with self._locks[name]:
+            self._write(name, data)
+            self._cache[name] = (self._stamp(name), data)
+            self._versions[name] += 1
+
+    def _commit(self, name, items, records):
+        """Persist items produced from the cached collection by the given journal records."""
+        self._write(name, items)
+
+    def _apply(self, name, items, records):
+        self._commit(name, items, records)
+        self._cache[name] = (self._stamp(name), items)
+        self._versions[name] += 1
+
+    def get(self, name, record_id):
+        for item in self._refresh(name):
+            if item.get("id") == record_id:
+                return _with_times(item)
+        return None
+
+    def insert(self, name, new_items):
+        new_items = _clean_items(new_items)
+        with self._locks[name]:
+            items = _insert_items(self._refresh(name), new_items)
+            self._apply(name, items, [{"op": "put", "item": item} for item in new_items])
+
+    def update(self, name, items):
+        replacements = {item["id"]: _strip_times(item) for item in items}
+        with self._locks[name]:
+            current = self._refresh(name)
+            existing_ids = {item.get("id") for item in current}
+            replacements = {
+                record_id: item for record_id, item in replacements.items()
+                if record_id in existing_ids
+            }
+            if replacements:
+                items = _replace_items(current, replacements)
+                self._apply(name, items, [{"op": "put", "item": item} for item in replacements.values()])
+            return len(replacements)
+
+    def patch(self, name, patches):
+        patches = {record_id: _strip_times(changes) for record_id, changes in patches.items()}
+        with self._locks[name]:
+            current = self._refresh(name)
+            replacements = copy.deepcopy(_patch_replacements(current, patches))
+            if replacements:
+                items = _replace_items(current, replacements)
+                self._apply(name, items, [{"op": "put", "item": item} for item in replacements.values()])
+            return len(replacements)
+
+    def delete(self, name, ids):
+        ids = set(ids)
+        with self._locks[name]:
+            current = self._refresh(name)
+            items = _delete_items(current, ids)
+            deleted = [item.get("id") for item in current if item.get("id") in ids]
+            if deleted:
+                self._apply(name, items, [{"op": "delete", "id": record_id} for record_id in deleted])
+            return len(deleted)
+
+    def find(self, name, order_by=None, descending=False, limit=None, **filters):
+        items = self._refresh(name)
+        return _find_in(
+            [_with_times(item, parsed) for item, parsed in zip(items, self._times.get(name, items))],
+            order_by, descending, limit, filters
+        )
+
+    def iter_recent(self, name, key):
+        _, time_field = PARTITIONED_COLLECTIONS[name]
+        entries = [entry for entry in self._manifest(name)["partitions"] if entry["key"] == key]
+        for entry in _newest_first(entries):
+            try:
+                items = self._partition(name, entry)
+            except FileNotFoundError:
+                # Emptied by a concurrent write after the manifest was read
+                continue
+            for item in sorted(items, key=lambda item: item.get(time_field) or "", reverse=True):
+                yield _with_times(item)
+
+    def partition_counts(self, name):
+        counts = {}
+        for entry in self._manifest(name)["partitions"]:
+            counts[entry["key"]] = counts.get(entry["key"], 0) + entry["count"]
+        return counts
+
+    def apply_batch(self, collections, documents):
+        """Apply buffered changes to collections and documents.
+
+        collections maps a collection name to a function turning its current
+        records into the new ones; documents maps a document name to its new
+        contents. All new contents are computed under the locks before anything
+        is written, so a failing change leaves every file untouched. The files
+        are then written one at a time: each write is atomic, but an error
+        partway (e.g. a full disk) leaves the earlier files written.
+        """
+        names = sorted(set(collections) | set(documents))
+        with contextlib.ExitStack() as stack:
+            for name in names:
+                stack.enter_context(self._locks[name])
+
+            new_items = {name: transform(list(self._refresh(name))) for name, transform in collections.items()}
+            for name, items in new_items.items():
+                self.save(name, items)
+            for name, data in documents.items():
+                self.save_document(name, data)
+
+    def version(self, name):
+        with self._locks[name]:
+            self._refresh(name)
+            return self._versions[name]
+
+    def invalidate(self, name):
+        with self._locks[name]:
+            self._cache.pop(name, None)
+
+    def optimize(self):
+        """Nothing to do: every collection is already a single JSON file."""
+
+
+class JournalStore(JsonStore):
+    """JSON snapshot plus an append-only JSONL journal of record changes."""
+
+    def __init__(self, compact_threshold=JOURNAL_COMPACT_THRESHOLD):
+        super().__init__()
+        self.compact_threshold = compact_threshold
+        # name -> number of records currently in the journal
+        self._journal_lengths = {name: 0 for name in COLLECTION_FILES}
+        self._compacting = set()
+
+    def _stamp(self, name):
+        if name in DOCUMENT_FILES or name in PARTITIONED_COLLECTIONS:
+            return super()._stamp(name)
+        path = journal_path(name)
+        journal_stamp = _file_stamp(path) if os.path.exists(path) else None
+        return super()._stamp(name), journal_stamp
+
+    def _read(self, name):
+        if name in DOCUMENT_FILES or name in PARTITIONED_COLLECTIONS:
+            return super()._read(name)
+        path = journal_path(name)
+        records, valid_length = _read_journal(path)
+        if os.path.exists(path) and os.path.getsize(path) > valid_length:
+            with open(path, 'r+b') as f:
+                f.truncate(valid_length)
+        self._journal_lengths[name] = len(records)
+        return _replay(super()._read(name), records)
+
+    def _write(self, name, items):
+        # Partitioned collections already rewrite only the changed partitions
+        if name in DOCUMENT_FILES or name in PARTITIONED_COLLECTIONS:
+            super()._write(name, items)
+            return
+        records = _diff_records(self._refresh(name), items)
+        if records is None:
+            self._write_snapshot(name, items)
+            return
+        self._append(name, records)
+
+    def _commit(self, name, items, records):
+        if name in PARTITIONED_COLLECTIONS:
+            super()._commit(name, items, records)
+            return
+        # Record-level changes go straight to the journal without diffing
+        self._append(name, records)
+
+    def _append(self, name, records):
+        if not records:
+            return
+
+        lines = "".join(json.dumps(record) + "\n" for record in records)
+        with open(journal_path(name), 'a') as f:
+            f.write(lines)
+        self._journal_lengths[name] += len(records)
+
+        if self._journal_lengths[name] >= self.compact_threshold:
+            self._schedule_compaction(name)
+
+    def _write_snapshot(self, name, items):
+        _write_json(COLLECTION_FILES[name], items)
+        if os.path.exists(journal_path(name)):
+            os.remove(journal_path(name))
+        self._journal_lengths[name] = 0
+
+    def _schedule_compaction(self, name):
+        if name in self._compacting:
+            return
+        self._compacting.add(name)
+        threading.Thread(target=self._compact_in_background, args=(name,), daemon=True).start()
+
+    def _compact_in_background(self, name):
+        try:
+            self.compact(name)
+        except Exception as e:
+            print(f"Error compacting {name} journal: {str(e)}")
+        finally:
+            self._compacting.discard(name)
+
+    def optimize(self):
+        """Compact every collection that has a journal."""
+        for name in COLLECTION_FILES:
+            if os.path.exists(journal_path(name)):
+                self.compact(name)
+
+    def compact(self, name):
+        """Fold the journal into a new snapshot and truncate it."""
+        with self._locks[name]:
+            items = self._refresh(name)
+            self._write_snapshot(name, items)
+            self._cache[name] = (self._stamp(name), items)
+
+
+# Storage mode -> store class; "sqlite" is resolved lazily in get_store()
+# because sqlite_store itself builds on this module
+STORE_CLASSES = {
+    "json": JsonStore,
+    "journal": JournalStore,
+}
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def storage_mode():
+    """Return the configured storage mode."""
+    return os.environ.get("CIRCUIT_BREAKERS_STORAGE", "json")
+
+
+def get_store():
+    """Return the process-wide store for the configured storage mode."""
+    mode = storage_mode()
+    with _stores_lock:
+        if mode not in _stores:
+            if mode == "sqlite" and mode not in STORE_CLASSES:
+                from sqlite_store import SqliteStore
+                STORE_CLASSES["sqlite"] = SqliteStore
+            if mode not in STORE_CLASSES:
+                raise ValueError(f"Unknown storage mode: {mode}")
+            _stores[mode] = STORE_CLASSES[mode]()
+        return _stores[mode]
+
+
+class Batch:
+    """Writes buffered across collections and documents, applied by commit().
+
+    While a batch is active on a thread (see batch()), the module-level write
+    functions below record their changes here instead of writing, and reads
+    of a touched collection see the buffered changes on top of the stored data.
+    """
+
+    def __init__(self):
+        # name -> list of functions, each turning a list of records into the next
+        self._changes = {}
+        # name -> new document contents
+        self._documents = {}
+        # Functions to call once the changes buffered so far are written
+        self._callbacks = []
+
+    def touches(self, name):
+        return name in self._changes or name in self._documents
+
+    def add(self, name, change):
+        self._changes.setdefault(name, []).append(change)
+
+    def set_document(self, name, data):
+        self._documents[name] = copy.deepcopy(data)
+
+    def view(self, name, items):
+        """Return items with this batch's buffered changes applied."""
+        for change in self._changes.get(name, []):
+            items = change(items)
+        return items
+
+    def document(self, name):
+        return copy.deepcopy(self._documents[name])
+
+    def after_commit(self, callback):
+        """Call callback() once the changes buffered so far are written; never if they are discarded."""
+        self._callbacks.append(callback)
+
+    def commit(self):
+        """Write all buffered changes at once, empty the batch and run the after_commit callbacks."""
+        if self._changes or self._documents:
+            collections = {name: (lambda items, name=name: self.view(name, items)) for name in self._changes}
+            get_store().apply_batch(collections, self._documents)
+        callbacks = self._callbacks
+        self.discard()
+        for callback in callbacks:
+            callback()
+
+    def discard(self):
+        self._changes = {}
+        self._documents = {}
+        self._callbacks = []
+
+
+_active = threading.local()
+
+
+def active_batch():
+    """Return the batch buffering this thread's writes, if any."""
+    return getattr(_active, "batch", None)
+
+
+def _script_control_exceptions():
+    """Streamlit's rerun and stop signals (raised by st.rerun()/st.stop()), or () without Streamlit."""
+    try:
+        from streamlit.runtime.scriptrunner_utils.exceptions import RerunException, StopException
+    except ImportError:
+        try:
+            from streamlit.runtime.scriptrunner import RerunException, StopException
+        except ImportError:
+            return ()
+    return RerunException, StopException
+
+
+@contextlib.contextmanager
+def batch():
+    """Buffer writes made on this thread and commit them once on exit.
+
+    Nested batches join the outermost one. st.rerun() and st.stop() inside
+    the block still commit; any other exception, including KeyboardInterrupt
+    and SystemExit, discards the buffered writes instead.
+    """
+    current = active_batch()
+    if current is not None:
+        yield current
+        return
+
+    current = Batch()
+    _active.batch = current
+    try:
+        yield current
+    except BaseException as e:
+        if isinstance(e, _script_control_exceptions()):
+            current.commit()
+        else:
+            current.discard()
+        raise
+    else:
+        current.commit()
+    finally:
+        _active.batch = None
+
+
+def _pending_items(pending, name):
+    """Records of a collection with a batch's buffered changes applied."""
+    return pending.view(name, list(get_store().load_shared(name)))
+
+
+# Collection name -> functions told about record writes, see add_listener
+_listeners = {}
+
+
+def add_listener(names, listener):
+    """Call listener(name, before, after, removed, added) after record writes to the named collections.
+
+    before and after are the collection versions around the write; removed
+    and added are the affected records as they were and as they are now,
+    with derived time keys. Writes not known record by record (whole
+    collection saves, batches, other processes) only change the version, so
+    a listener keeping derived state must compare versions to notice them.
+    """
+    for name in names:
+        _listeners.setdefault(name, []).append(listener)
+
+
+def _records_by_id(store, name, ids):
+    return {
+        item.get("id"): _with_times(item)
+        for item in store.load_shared(name) if item.get("id") in ids
+    }
+
+
+def _write_records(name, ids, write):
+    """Run write(store) for the records with the given ids and tell the collection's listeners."""
+    store = get_store()
+    listeners = _listeners.get(name)
+    if not listeners:
+        return write(store)
+
+    before = store.version(name)
+    removed = _records_by_id(store, name, ids)
+    result = write(store)
+    after = store.version(name)
+    if after != before:
+        added = _records_by_id(store, name, ids)
+        for listener in listeners:
+            try:
+                listener(name, before, after, list(removed.values()), list(added.values()))
+            except Exception as e:
+                print(f"Error notifying {name} listener: {str(e)}")
+    return result
+
+
+def load_collection(name):
+    """Load a collection, served from the shared cache when nothing changed on disk."""
+    pending = active_batch()
+    if pending is not None and pending.touches(name):
+        return [_with_times(item) for item in _pending_items(pending, name)]
+    return get_store().load(name)
+
+
+def load_collection_shared(name):
+    """Return the cached records themselves, without derived time keys or copies.
+
+    For read-only consumers that build their own structures from the records;
+    the returned list and dicts must not be modified. Changes buffered in an
+    active batch are not included.
+    """
+    return get_store().load_shared(name)
+
+
+def save_collection(name, items):
+    """Persist a collection and replace the cached copy."""
+    pending = active_batch()
+    if pending is not None:
+        new_items = _clean_items(items)
+        pending.add(name, lambda current: list(new_items))
+        return
+    get_store().save(name, items)
+
+
+def load_document(name):
+    """Load a document ("users" or "settings") as a dict."""
+    pending = active_batch()
+    if pending is not None and pending.touches(name):
+        return pending.document(name)
+    return get_store().load_document(name)
+
+
+def save_document(name, data):
+    """Persist a document and replace the cached copy."""
+    pending = active_batch()
+    if pending is not None:
+        pending.set_document(name, data)
+        return
+    get_store().save_document(name, data)
+
+
+def get_record(name, record_id):
+    """Return one record by id, or None."""
+    pending = active_batch()
+    if pending is not None and pending.touches(name):
+        for item in _pending_items(pending, name):
+            if item.get("id") == record_id:
+                return _with_times(item)
+        return None
+    return get_store().get(name, record_id)
+
+
+def insert_records(name, items):
+    """Append new records; raises ValueError if an id is missing or already taken."""
+    pending = active_batch()
+    if pending is not None:
+        new_items = _clean_items(items)
+        # Check ids now so the caller sees the error, not the final commit
+        _insert_items(_pending_items(pending, name), new_items)
+        pending.add(name, lambda current: _insert_items(current, new_items))
+        return
+    _write_records(name, {item.get("id") for item in items}, lambda store: store.insert(name, items))
+
+
+def update_records(name, items):
+    """Replace whole records matched by their id; returns how many existed."""
+    pending = active_batch()
+    if pending is not None:
+        replacements = {item["id"]: _strip_times(item) for item in items}
+        existing_ids = {item.get("id") for item in _pending_items(pending, name)}
+        pending.add(name, lambda current: _replace_items(current, replacements))
+        return len(existing_ids & replacements.keys())
+    return _write_records(name, {item["id"] for item in items}, lambda store: store.update(name, items))
+
+
+def patch_records(name, patches):
+    """Merge field changes (id -> fields) into records; returns how many existed."""
+    pending = active_batch()
+    if pending is not None:
+        patches = {record_id: copy.deepcopy(_strip_times(changes)) for record_id, changes in patches.items()}
+        existing_ids = {item.get("id") for item in _pending_items(pending, name)}
+        pending.add(name, lambda current: _replace_items(current, _patch_replacements(current, patches)))
+        return len(existing_ids & patches.keys())
+    return _write_records(name, set(patches), lambda store: store.patch(name, patches))
+
+
+def delete_records(name, ids):
+    """Delete records by id; returns how many were removed."""
+    ids = set(ids)
+    pending = active_batch()
+    if pending is not None:
+        existing_ids = {item.get("id") for item in _pending_items(pending, name)}
+        pending.add(name, lambda current: _delete_items(current, ids))
+        return len(existing_ids & ids)
+    return _write_records(name, ids, lambda store: store.delete(name, ids))
+
+
+def find_records(name, order_by=None, descending=False, limit=None, **filters):
+    """Return records whose fields equal the given filters, optionally sorted and limited.
+
+    The SQLite store answers this from indexed columns, and scans its cached
+    records for fields without one; the JSON stores scan the cached collection.
+    """
+    pending = active_batch()
+    if pending is not None and pending.touches(name):
+        items = [_with_times(item) for item in _pending_items(pending, name)]
+        return _find_in(items, order_by, descending, limit, filters)
+    return get_store().find(name, order_by=order_by, descending=descending, limit=limit, **filters)
+
+
+def iter_recent(name, key):
+    """Yield the records of one partition key (e.g. one channel's messages), newest first.
+
+    Only as many monthly partitions are read as the caller iterates over, so
+    showing the latest records costs the same however long the history is.
+    The SQLite store walks its (channel, timestamp) index instead.
+    """
+    pending = active_batch()
+    if pending is not None and pending.touches(name):
+        key_field, time_field = PARTITIONED_COLLECTIONS[name]
+        items = [item for item in _pending_items(pending, name) if item.get(key_field) == key]
+        items.sort(key=lambda item: item.get(time_field) or "", reverse=True)
+        return (_with_times(item) for item in items)
+    return get_store().iter_recent(name, key)
+
+
+def partition_counts(name):
+    """Return the number of records per partition key, e.g. messages per channel."""
+    pending = active_batch()
+    if pending is not None and pending.touches(name):
+        key_field, _ = PARTITIONED_COLLECTIONS[name]
+        counts = {}
+        for item in _pending_items(pending, name):
+            counts[item.get(key_field)] = counts.get(item.get(key_field), 0) + 1
+        return counts
+    return get_store().partition_counts(name)
+
+
+def collection_version(name):
+    """Return a counter that changes whenever a collection's or document's contents change."""
+    return get_store().version(name)
+
+
+def optimize():
+    """Compact journals (journal mode) or vacuum the database (sqlite mode)."""
+    get_store().optimize()
+
+
+def remove_temp_files(min_age=60):
+    """Delete leftover "*.tmp" files of interrupted writes; returns how many were removed.
+
+    Only files older than min_age seconds are removed, so writes in progress
+    are left alone.
+    """
+    removed = 0
+    cutoff = datetime.now().timestamp() - min_age
+    for dirpath, _, filenames in os.walk(DATA_DIR):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            if filename.endswith(".tmp") and os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                removed += 1
+    return removed
+
+
+def invalidate(name=None):
+    """Drop one cached collection, or all of them, forcing a reload on next access."""
+    store = get_store()
+    for collection in ([name] if name else list(COLLECTION_FILES) + list(DOCUMENT_FILES)):
+        store.invalidate(collection)
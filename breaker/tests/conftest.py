@@ -0,0 +1,46 @@
+"""
+Shared fixtures for the Circuit Breakers Team Hub tests.
+
+The modules keep their data under paths relative to the working directory
+(storage.DATA_DIR is "breaker/data"), so every test runs in its own
+temporary directory with fresh stores and caches.
+"""
+
+import os
+import sys
+
+import pytest
+
+# The app modules import each other as top-level modules, as app.py does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import intervals
+import metrics
+import storage
+
+STORAGE_MODES = ["json", "journal", "sqlite"]
+
+
+def _reset():
+    with storage._stores_lock:
+        storage._stores.clear()
+    intervals._events = None
+    with metrics._lock:
+        metrics._views.clear()
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Run the test in an empty working directory, in JSON storage mode."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("CIRCUIT_BREAKERS_STORAGE", "json")
+    _reset()
+    yield tmp_path
+    _reset()
+
+
+@pytest.fixture(params=STORAGE_MODES)
+def storage_mode(request, workdir, monkeypatch):
+    """Run the test once per storage mode; returns the mode."""
+    monkeypatch.setenv("CIRCUIT_BREAKERS_STORAGE", request.param)
+    return request.param
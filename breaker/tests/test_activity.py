@@ -0,0 +1,46 @@
+import pytest
+
+import activity
+import storage
+
+
+def _descriptions():
+    return [entry["description"] for entry in activity.recent()]
+
+
+def test_entries_in_a_batch_wait_for_the_commit(workdir):
+    with storage.batch() as pending:
+        storage.insert_records("tasks", [{"id": "a", "title": "Wire the motors"}])
+        activity.record("Task", "Created task: Wire the motors", "Ada")
+        assert _descriptions() == []
+        # Flushing mid-batch writes the entries recorded so far
+        pending.commit()
+        assert _descriptions() == ["Created task: Wire the motors"]
+        activity.record("Task", "Started task: Wire the motors", "Ada")
+    assert _descriptions() == ["Started task: Wire the motors", "Created task: Wire the motors"]
+
+
+def test_discarded_batch_leaves_no_entries(workdir):
+    activity.record("Message", "Posted: Welcome", "Ada")
+    with pytest.raises(RuntimeError):
+        with storage.batch():
+            storage.insert_records("tasks", [{"id": "a", "title": "Wire the motors"}])
+            activity.record("Task", "Created task: Wire the motors", "Ada")
+            raise RuntimeError("save failed")
+    assert storage.load_collection("tasks") == []
+    assert _descriptions() == ["Posted: Welcome"]
+
+
+def test_first_entry_is_not_duplicated_by_the_seed(workdir):
+    storage.insert_records("tasks", [{"id": "a", "title": "Wire the motors", "created_by": "Ada", "created_at": "2025-10-01T09:00:00"}])
+    activity.record("Task", "Created task: Wire the motors", "Ada")
+    activity.record("Task", "Started task: Wire the motors", "Ada")
+    assert _descriptions() == ["Started task: Wire the motors", "Created task: Wire the motors"]
+
+
+def test_ensure_stream_seeds_before_the_first_save(workdir):
+    storage.insert_records("tasks", [{"id": "a", "title": "Old task", "created_by": "Ada", "created_at": "2025-10-01T09:00:00"}])
+    activity.ensure_stream()
+    storage.insert_records("tasks", [{"id": "b", "title": "New task", "created_by": "Ada", "created_at": "2025-10-02T09:00:00"}])
+    activity.record("Task", "Created task: New task", "Ada")
+    assert _descriptions() == ["Created task: New task", "Created task: Old task"]
@@ -0,0 +1,99 @@
+import os
+
+import pytest
+
+import backup
+import storage
+
+
+def _task(task_id, title):
+    return {"id": task_id, "title": title, "status": "To Do"}
+
+
+def _upload(name, content):
+    path = os.path.join("data", "media_uploads", name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(content)
+    return path
+
+
+def _titles():
+    return [task["title"] for task in storage.load_collection("tasks")]
+
+
+def test_backup_verify_restore_round_trip(storage_mode):
+    storage.insert_records("tasks", [_task("a", "Before")])
+    storage.save_document("settings", {"season": "2025"})
+    photo = _upload("car.jpg", b"\xff\xd8 car")
+
+    manifest = backup.create_backup("nightly")
+    assert backup.verify_backup(manifest["id"]) == []
+    assert [m["id"] for m in backup.list_backups()] == [manifest["id"]]
+
+    storage.patch_records("tasks", {"a": {"title": "After"}})
+    storage.insert_records("tasks", [_task("b", "Added")])
+    storage.save_document("settings", {"season": "2026"})
+    os.remove(photo)
+    extra = _upload("later.jpg", b"later")
+
+    safety = backup.restore_backup(manifest["id"])
+
+    assert _titles() == ["Before"]
+    assert storage.load_document("settings") == {"season": "2025"}
+    with open(photo, "rb") as f:
+        assert f.read() == b"\xff\xd8 car"
+    assert not os.path.exists(extra)
+
+    # The state before the restore was backed up and can itself be restored
+    backup.restore_backup(safety["id"])
+    assert _titles() == ["After", "Added"]
+    assert os.path.exists(extra)
+
+
+def test_unchanged_files_are_stored_once(workdir):
+    storage.insert_records("tasks", [_task("a", "One")])
+    _upload("car.jpg", b"car" * 1000)
+
+    first = backup.create_backup("first")
+    second = backup.create_backup("second")
+
+    assert first["new_bytes"] > 0
+    assert second["new_bytes"] == 0
+    assert second["files"] == first["files"]
+
+
+def test_verify_reports_corrupted_and_missing_objects(workdir):
+    storage.insert_records("tasks", [_task("a", "One")])
+    _upload("car.jpg", b"car")
+    manifest = backup.create_backup("nightly")
+
+    digests = sorted({entry["hash"] for entry in manifest["files"].values()})
+    with open(backup._object_path(digests[0]), "wb") as f:
+        f.write(b"garbage")
+    os.remove(backup._object_path(digests[1]))
+
+    problems = backup.verify_backup(manifest["id"])
+    assert any("corrupted" in problem for problem in problems)
+    assert any("missing" in problem for problem in problems)
+    with pytest.raises(ValueError):
+        backup.restore_backup(manifest["id"])
+
+
+def test_delete_collects_only_unreferenced_objects(workdir):
+    storage.insert_records("tasks", [_task("a", "One")])
+    kept = backup.create_backup("kept")
+    _upload("car.jpg", b"only in the second backup")
+    deleted = backup.create_backup("deleted")
+
+    # Files in the object store that are not objects are left alone
+    stray = os.path.join(backup.OBJECTS_DIR, "tmp1234")
+    with open(stray, "w") as f:
+        f.write("in flight")
+
+    assert backup.delete_backup(deleted["id"]) == len(b"only in the second backup")
+    assert os.path.exists(stray)
+    assert backup.verify_backup(kept["id"]) == []
+    assert [m["id"] for m in backup.list_backups()] == [kept["id"]]
+    with pytest.raises(ValueError):
+        backup.load_manifest(deleted["id"])
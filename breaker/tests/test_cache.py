@@ -0,0 +1,68 @@
+import json
+import os
+import threading
+
+import storage
+
+
+def _task(task_id, **fields):
+    return {"id": task_id, "title": f"Task {task_id}", "status": "To Do", **fields}
+
+
+def test_loads_are_served_from_the_shared_cache(workdir):
+    storage.save_collection("tasks", [_task("a")])
+    assert storage.load_collection_shared("tasks") is storage.load_collection_shared("tasks")
+    version = storage.collection_version("tasks")
+    storage.load_collection("tasks")
+    assert storage.collection_version("tasks") == version
+
+
+def test_changes_made_by_another_process_are_picked_up(workdir):
+    storage.save_collection("tasks", [_task("a")])
+    version = storage.collection_version("tasks")
+
+    # Rewritten behind the store's back, as another worker process would
+    with open(storage.COLLECTION_FILES["tasks"], "w") as f:
+        json.dump([_task("a"), _task("b")], f)
+    stat = os.stat(storage.COLLECTION_FILES["tasks"])
+    os.utime(storage.COLLECTION_FILES["tasks"], ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+
+    assert [task["id"] for task in storage.load_collection("tasks")] == ["a", "b"]
+    assert storage.collection_version("tasks") != version
+
+
+def test_loaded_records_do_not_share_nested_values_with_the_cache(storage_mode):
+    participants = ["Ada"]
+    storage.insert_records("events", [{"id": "e1", "title": "Build", "participants": participants}])
+    participants.append("Grace")
+
+    loaded = storage.load_collection("events")[0]
+    loaded["participants"].append("Linus")
+    storage.get_record("events", "e1")["participants"].append("Linus")
+    storage.find_records("events")[0]["participants"].append("Linus")
+
+    assert storage.load_collection("events")[0]["participants"] == ["Ada"]
+    assert storage.load_collection_shared("events")[0]["participants"] == ["Ada"]
+
+
+def test_concurrent_writers_use_their_own_temporary_files(workdir):
+    path = os.path.join("data", "shared.json")
+    errors = []
+
+    def write(value):
+        try:
+            for _ in range(50):
+                storage._write_json(path, {"writer": value, "padding": "x" * 10_000})
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write, args=(value,)) for value in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    with open(path) as f:
+        assert json.load(f)["writer"] in range(4)
+    assert [name for name in os.listdir("data") if name.endswith(".tmp")] == []
@@ -0,0 +1,40 @@
+import pytest
+
+from database import RECORD_CLASSES, Event, Task, User, decode_valid_records
+
+
+def test_round_trip_keeps_stored_nulls_and_unknown_keys():
+    stored = {"id": "t1", "title": "Wheels", "assigned_to": None, "due_date": None, "legacy_flag": None, "points": 3}
+    task = Task.from_dict(stored)
+    assert task.to_dict() == stored
+    assert task.get("assigned_to", "Unassigned") == "Unassigned"
+    assert task.get("points") == 3
+
+
+def test_round_trip_leaves_out_absent_keys():
+    assert Task.from_dict({"id": "t1"}).to_dict() == {"id": "t1"}
+    assert User.from_dict({"username": "ada", "email": None}).to_dict() == {"username": "ada", "email": None}
+
+
+@pytest.mark.parametrize("model", list(RECORD_CLASSES.values()))
+def test_every_model_requires_its_keys(model):
+    with pytest.raises(ValueError):
+        model.from_dict({})
+
+
+def test_field_types_are_validated():
+    with pytest.raises(ValueError):
+        Event.from_dict({"id": "e1", "title": 5})
+    with pytest.raises(ValueError):
+        Task.from_dict(["not", "a", "dict"])
+
+
+def test_invalid_records_are_left_out_and_reported():
+    records, errors = decode_valid_records("tasks", [
+        {"id": "t1", "title": "Wheels"},
+        {"id": "t2", "title": 5},
+        {"title": "No id"},
+        {"id": "t3", "title": "Chassis"},
+    ])
+    assert [record.id for record in records] == ["t1", "t3"]
+    assert set(errors) == {"t2", 2}
@@ -0,0 +1,26 @@
+from datetime import datetime
+
+import ids
+
+
+def test_ids_are_unique_and_increasing():
+    batch = ids.new_ids(1000) + [ids.new_id() for _ in range(100)]
+    assert len(set(batch)) == len(batch)
+    assert batch == sorted(batch)
+    assert all(len(record_id) == ids.TIME_LENGTH + ids.RANDOM_LENGTH for record_id in batch)
+
+
+def test_id_datetime():
+    before = datetime.now().replace(microsecond=0)
+    created = ids.id_datetime(ids.new_id())
+    assert before <= created <= datetime.now()
+    assert ids.id_datetime("20250101120000") == datetime(2025, 1, 1, 12)
+    assert ids.id_datetime("not-an-id") is None
+
+
+def test_sort_key_places_legacy_ids_by_time():
+    new = ids.new_id()
+    legacy_old, legacy_future = "20200101120000", "20991231235959"
+    assert sorted([legacy_future, new, legacy_old], key=ids.sort_key) == [legacy_old, new, legacy_future]
+    # As plain strings every legacy id sorts after the ULIDs
+    assert sorted([legacy_old, new]) == [new, legacy_old]
@@ -0,0 +1,81 @@
+import random
+from datetime import date, datetime
+
+import intervals
+import storage
+from intervals import IntervalIndex
+
+
+def test_overlapping_matches_brute_force():
+    rng = random.Random(7)
+    spans = []
+    for value in range(300):
+        start = rng.randrange(0, 10_000)
+        spans.append((start, start + rng.choice([0, 1, 5, 50, 500, 5000]), value))
+    spans.append((9_000, intervals.FOREVER, "open-ended"))
+    index = IntervalIndex(spans)
+    assert len(index) == len(spans)
+
+    for _ in range(200):
+        t0 = rng.randrange(-100, 11_000)
+        t1 = t0 + rng.randrange(1, 800)
+        # Empty intervals count as the single second they start in
+        expected = [value for start, end, value in sorted(spans, key=lambda span: span[0])
+                    if start < t1 and max(end, start + 1) > t0]
+        assert sorted(index.overlapping(t0, t1), key=str) == sorted(expected, key=str)
+
+
+def test_overlapping_bounds_are_half_open():
+    index = IntervalIndex([(10, 20, "a"), (20, 30, "b")])
+    assert index.overlapping(20, 25) == ["b"]
+    assert index.overlapping(0, 10) == []
+    assert index.overlapping(15, 15) == []
+    assert index.overlapping(19, 21) == ["a", "b"]
+    assert IntervalIndex([]).overlapping(0, 100) == []
+
+
+def _save_events(*events):
+    storage.save_collection("events", list(events))
+
+
+def test_events_between_and_by_day(workdir):
+    _save_events(
+        {"id": "weekend", "start_time": "2025-10-10T18:00:00", "end_time": "2025-10-12T16:00:00"},
+        {"id": "meeting", "start_time": "2025-10-11T09:00:00", "end_time": "2025-10-11T10:00:00"},
+        {"id": "midnight", "start_time": "2025-10-12T22:00:00", "end_time": "2025-10-13T00:00:00"},
+        {"id": "practice", "start_time": "2025-10-06T18:00:00", "end_time": "2025-10-06T20:00:00",
+         "recurrence": "FREQ=WEEKLY;COUNT=3"},
+    )
+
+    found = intervals.events_between(datetime(2025, 10, 11), datetime(2025, 10, 14))
+    assert [event["id"] for event in found] == ["weekend", "meeting", "midnight", "practice"]
+    assert found[-1]["occurrence"] == "2025-10-13"
+
+    by_day = intervals.events_by_day(datetime(2025, 10, 10), datetime(2025, 10, 14))
+    assert {day: [event["id"] for event in events] for day, events in by_day.items()} == {
+        date(2025, 10, 10): ["weekend"],
+        date(2025, 10, 11): ["weekend", "meeting"],
+        date(2025, 10, 12): ["weekend", "midnight"],
+        date(2025, 10, 13): ["practice"],
+    }
+    assert [event["id"] for event in intervals.events_on(date(2025, 10, 20))] == ["practice"]
+    assert intervals.events_on(date(2025, 10, 27)) == []
+
+
+def test_index_is_rebuilt_after_a_save(workdir):
+    _save_events({"id": "a", "start_time": "2025-10-11T09:00:00", "end_time": "2025-10-11T10:00:00"})
+    assert len(intervals.events_on(date(2025, 10, 11))) == 1
+
+    storage.insert_records("events", [{"id": "b", "start_time": "2025-10-11T12:00:00", "end_time": "2025-10-11T13:00:00"}])
+    assert [event["id"] for event in intervals.events_on(date(2025, 10, 11))] == ["a", "b"]
+
+
+def test_events_without_a_start_or_end(workdir):
+    _save_events(
+        {"id": "no-start", "start_time": None, "end_time": "2025-10-11T10:00:00"},
+        {"id": "bad-start", "start_time": "soon", "end_time": "2025-10-11T10:00:00"},
+        {"id": "no-end", "start_time": "2025-10-11T09:00:00", "end_time": None},
+    )
+    # Events without a usable start are left out; one without an end is an instant
+    assert [event["id"] for event in intervals.events_on(date(2025, 10, 11))] == ["no-end"]
+    assert intervals.events_between(datetime(2025, 10, 11, 9, 30), datetime(2025, 10, 12)) == []
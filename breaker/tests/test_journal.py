@@ -0,0 +1,69 @@
+import json
+import os
+
+import pytest
+
+import storage
+
+
+@pytest.fixture
+def journal(workdir, monkeypatch):
+    monkeypatch.setenv("CIRCUIT_BREAKERS_STORAGE", "journal")
+    return storage.get_store()
+
+
+def _task(task_id, **fields):
+    return {"id": task_id, "title": f"Task {task_id}", "status": "To Do", **fields}
+
+
+def _journal_ops(name):
+    with open(storage.journal_path(name)) as f:
+        return [json.loads(line)["op"] for line in f]
+
+
+def _restart():
+    with storage._stores_lock:
+        storage._stores.clear()
+
+
+def test_record_writes_append_to_the_journal(journal):
+    storage.save_collection("tasks", [_task("a")])
+    with open(storage.COLLECTION_FILES["tasks"]) as f:
+        snapshot = f.read()
+
+    storage.insert_records("tasks", [_task("b")])
+    storage.patch_records("tasks", {"a": {"status": "Done"}})
+    storage.delete_records("tasks", ["b"])
+    # A whole-collection save of a small change is written as a diff too
+    storage.save_collection("tasks", [_task("a", status="Done"), _task("c")])
+
+    assert _journal_ops("tasks") == ["put", "put", "put", "delete", "put"]
+    with open(storage.COLLECTION_FILES["tasks"]) as f:
+        assert f.read() == snapshot
+
+    _restart()
+    assert [(task["id"], task["status"]) for task in storage.load_collection("tasks")] == [("a", "Done"), ("c", "To Do")]
+
+
+def test_torn_last_line_is_dropped(journal):
+    storage.insert_records("tasks", [_task("a"), _task("b")])
+    with open(storage.journal_path("tasks"), "a") as f:
+        f.write('{"op": "put", "item": {"id": "c"')
+
+    _restart()
+    assert [task["id"] for task in storage.load_collection("tasks")] == ["a", "b"]
+    storage.insert_records("tasks", [_task("d")])
+    _restart()
+    assert [task["id"] for task in storage.load_collection("tasks")] == ["a", "b", "d"]
+
+
+def test_compaction_folds_the_journal_into_the_snapshot(journal):
+    storage.insert_records("tasks", [_task("a"), _task("b")])
+    storage.delete_records("tasks", ["a"])
+
+    storage.optimize()
+
+    assert not os.path.exists(storage.journal_path("tasks"))
+    with open(storage.COLLECTION_FILES["tasks"]) as f:
+        assert [task["id"] for task in json.load(f)] == ["b"]
+    assert [task["id"] for task in storage.load_collection("tasks")] == ["b"]
@@ -0,0 +1,46 @@
+from datetime import datetime
+
+import metrics
+import storage
+
+
+def _ids(items):
+    return [item["id"] for item in items]
+
+
+def _log(log_id, date, category):
+    return {"id": log_id, "title": log_id, "date": date, "category": category, "author": "Ada"}
+
+
+def test_log_summary_follows_writes(storage_mode):
+    storage.save_collection("logs", [
+        _log("a", "2025-10-01", "Mechanical"),
+        _log("b", "2025-10-05", "Electrical"),
+        _log("c", None, "Mechanical"),
+    ])
+    assert metrics.log_summary() == (3, {"Mechanical": 2, "Electrical": 1}, (datetime(2025, 10, 1), datetime(2025, 10, 5)))
+
+    # Record-level writes update the view in place
+    storage.insert_records("logs", [_log("d", "2025-10-09", "Software")])
+    storage.delete_records("logs", ["b"])
+    assert metrics.log_summary() == (3, {"Mechanical": 2, "Software": 1}, (datetime(2025, 10, 1), datetime(2025, 10, 9)))
+    assert metrics.log_count_since(datetime(2025, 10, 2)) == 1
+
+
+def test_log_summary_without_dated_entries(workdir):
+    storage.save_collection("logs", [_log("a", None, "Mechanical")])
+    assert metrics.log_summary() == (1, {"Mechanical": 1}, None)
+
+
+def test_listeners_see_record_writes(storage_mode):
+    seen = []
+    storage.add_listener(["sponsors"], lambda name, before, after, removed, added: seen.append(
+        (name, before != after, _ids(removed), _ids(added))
+    ))
+    try:
+        storage.insert_records("sponsors", [{"id": "s1", "name": "Acme"}])
+        storage.delete_records("sponsors", ["s1"])
+    finally:
+        storage._listeners["sponsors"].pop()
+
+    assert seen == [("sponsors", True, [], ["s1"]), ("sponsors", True, ["s1"], [])]
@@ -0,0 +1,54 @@
+import json
+import os
+
+import storage
+
+
+def _message(message_id, channel, timestamp):
+    return {"id": message_id, "channel": channel, "author": "Ada", "content": "hi", "timestamp": timestamp}
+
+
+def _ids(items):
+    return [item["id"] for item in items]
+
+
+def test_messages_are_partitioned(storage_mode):
+    storage.insert_records("messages", [
+        _message("m1", "general", "2025-09-30T10:00:00"),
+        _message("m2", "general", "2025-10-01T10:00:00"),
+        _message("m3", "build", "2025-10-02T10:00:00"),
+        _message("m4", "general", None),
+    ])
+
+    assert _ids(storage.iter_recent("messages", "general")) == ["m2", "m1", "m4"]
+    assert storage.partition_counts("messages") == {"general": 3, "build": 1}
+
+    if storage_mode != "sqlite":
+        with open(os.path.join(storage.partition_dir("messages"), "manifest.json")) as f:
+            partitions = {(entry["key"], entry["month"]) for entry in json.load(f)["partitions"]}
+        assert partitions == {
+            ("general", "2025-09"), ("general", "2025-10"), ("build", "2025-10"), ("general", storage.UNDATED_PARTITION),
+        }
+
+
+def test_legacy_messages_file_is_split_into_partitions(workdir):
+    # Messages as stored before partitioning: one file plus a journal
+    path = storage.COLLECTION_FILES["messages"]
+    os.makedirs(os.path.dirname(path))
+    with open(path, "w") as f:
+        json.dump([_message("m1", "general", "2025-09-30T10:00:00")], f)
+    with open(storage.journal_path("messages"), "w") as f:
+        f.write(json.dumps({"op": "put", "item": _message("m2", "build", "2025-10-01T10:00:00")}) + "\n")
+
+    with open(path) as f:
+        legacy = f.read()
+
+    assert _ids(storage.load_collection("messages")) == ["m1", "m2"]
+    assert os.path.exists(os.path.join(storage.partition_dir("messages"), "manifest.json"))
+    assert _ids(storage.iter_recent("messages", "build")) == ["m2"]
+
+    # The former file is kept as it was and no longer read
+    storage.delete_records("messages", ["m1"])
+    with open(path) as f:
+        assert f.read() == legacy
+    assert _ids(storage.load_collection("messages")) == ["m2"]
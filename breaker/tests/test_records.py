@@ -0,0 +1,63 @@
+import pytest
+
+import storage
+
+
+def _task(task_id, **fields):
+    return {"id": task_id, "title": f"Task {task_id}", "status": "To Do", "created_at": "2025-10-01T09:00:00", **fields}
+
+
+def _ids(items):
+    return [item["id"] for item in items]
+
+
+def test_insert_and_load(storage_mode):
+    storage.insert_records("tasks", [_task("a"), _task("b")])
+
+    tasks = storage.load_collection("tasks")
+    assert _ids(tasks) == ["a", "b"]
+    assert tasks[0]["created_at_ts"] == int(tasks[0]["created_at_dt"].timestamp())
+    assert storage.get_record("tasks", "b")["title"] == "Task b"
+    assert storage.get_record("tasks", "missing") is None
+
+
+def test_insert_rejects_taken_id(storage_mode):
+    storage.insert_records("tasks", [_task("a")])
+    with pytest.raises(ValueError):
+        storage.insert_records("tasks", [_task("a")])
+
+
+def test_update_patch_delete(storage_mode):
+    storage.insert_records("tasks", [_task("a"), _task("b"), _task("c")])
+    version = storage.collection_version("tasks")
+
+    assert storage.update_records("tasks", [_task("a", title="Renamed")]) == 1
+    assert storage.patch_records("tasks", {"b": {"status": "Done"}, "missing": {"status": "Done"}}) == 1
+    assert storage.delete_records("tasks", ["c", "missing"]) == 1
+
+    tasks = {task["id"]: task for task in storage.load_collection("tasks")}
+    assert set(tasks) == {"a", "b"}
+    assert tasks["a"]["title"] == "Renamed"
+    assert tasks["b"]["status"] == "Done"
+    assert storage.collection_version("tasks") != version
+
+
+def test_find_records(storage_mode):
+    storage.insert_records("tasks", [
+        _task("a", status="Done", created_at="2025-10-03T09:00:00"),
+        _task("b", status="To Do"),
+        _task("c", status="Done", created_at="2025-10-02T09:00:00"),
+    ])
+
+    done = storage.find_records("tasks", order_by="created_at", descending=True, status="Done")
+    assert _ids(done) == ["a", "c"]
+    assert _ids(storage.find_records("tasks", order_by="created_at", limit=1)) == ["b"]
+
+
+def test_save_collection_and_document(storage_mode):
+    storage.save_collection("tasks", [_task("a"), _task("b")])
+    storage.save_collection("tasks", [_task("b")])
+    assert _ids(storage.load_collection("tasks")) == ["b"]
+
+    storage.save_document("settings", {"season": "2025"})
+    assert storage.load_document("settings") == {"season": "2025"}
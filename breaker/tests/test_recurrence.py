@@ -0,0 +1,128 @@
+from datetime import date, datetime, timedelta
+from itertools import takewhile
+
+import pytest
+
+import recurrence
+import storage
+
+
+def _event(start, rule, end=None, **fields):
+    event = {"id": "e1", "title": "Practice", "start_time": start, "end_time": end or start, "recurrence": rule, **fields}
+    return {**event, **storage._parse_times(event)}
+
+
+def _dates(event, start, end):
+    return [occurrence["occurrence"] for occurrence in recurrence.occurrences(event, start, end)]
+
+
+SEASON = (datetime(2025, 1, 1), datetime(2027, 1, 1))
+
+
+def test_parse_and_format_rule():
+    rule = recurrence.parse_rule("FREQ=WEEKLY;INTERVAL=2;BYDAY=TH,TU;UNTIL=20251219")
+    assert rule == recurrence.Rule("WEEKLY", 2, (1, 3), date(2025, 12, 19), None)
+    assert recurrence.format_rule(rule) == "FREQ=WEEKLY;INTERVAL=2;BYDAY=TU,TH;UNTIL=20251219"
+    assert recurrence.describe(rule) == "Every 2 weeks on Tue, Thu until Dec 19, 2025"
+
+
+@pytest.mark.parametrize("text", ["FREQ=YEARLY", "FREQ=DAILY;INTERVAL=0", "FREQ=DAILY;COUNT=x", "FREQ=DAILY;BYMONTH=1", "DAILY"])
+def test_parse_rule_rejects_malformed_rules(text):
+    with pytest.raises(ValueError):
+        recurrence.parse_rule(text)
+
+
+def test_daily_count():
+    event = _event("2025-10-01T18:00:00", "FREQ=DAILY;INTERVAL=2;COUNT=3", "2025-10-01T20:00:00")
+    assert _dates(event, *SEASON) == ["2025-10-01", "2025-10-03", "2025-10-05"]
+    assert recurrence.series_span(event) == (datetime(2025, 10, 1, 18), datetime(2025, 10, 5, 20))
+
+
+def test_weekly_byday_until_is_inclusive():
+    event = _event("2025-10-07T18:00:00", "FREQ=WEEKLY;BYDAY=TU,TH;UNTIL=20251016")
+    assert _dates(event, *SEASON) == ["2025-10-07", "2025-10-09", "2025-10-14", "2025-10-16"]
+
+
+def test_weekly_byday_starts_at_first_occurrence():
+    # A Thursday start with Tuesdays in the rule does not go back to that week's Tuesday
+    event = _event("2025-10-09T18:00:00", "FREQ=WEEKLY;INTERVAL=2;BYDAY=TU,TH;COUNT=4")
+    assert _dates(event, *SEASON) == ["2025-10-09", "2025-10-21", "2025-10-23", "2025-11-04"]
+
+
+def test_monthly_skips_months_without_the_day():
+    event = _event("2025-01-31T10:00:00", "FREQ=MONTHLY;COUNT=3")
+    assert _dates(event, *SEASON) == ["2025-01-31", "2025-03-31", "2025-05-31"]
+
+
+def test_window_only_yields_overlapping_occurrences():
+    event = _event("2025-10-01T18:00:00", "FREQ=DAILY", "2025-10-01T20:00:00")
+    # The occurrence running across the window start is included, the one starting at its end is not
+    assert _dates(event, datetime(2026, 3, 10, 19), datetime(2026, 3, 12, 18)) == ["2026-03-10", "2026-03-11"]
+    assert recurrence.series_span(event) == (datetime(2025, 10, 1, 18), None)
+
+
+def test_exceptions_and_overrides():
+    event = _event(
+        "2025-10-06T18:00:00", "FREQ=WEEKLY;COUNT=4", "2025-10-06T20:00:00",
+        exceptions=["2025-10-13"],
+        overrides={"2025-10-20": {"start_time": "2025-10-21T17:00:00", "end_time": "2025-10-21T19:00:00", "location": "Lab"}},
+    )
+    occurrences = list(recurrence.occurrences(event, *SEASON))
+
+    assert [o["occurrence"] for o in occurrences] == ["2025-10-06", "2025-10-20", "2025-10-27"]
+    moved = occurrences[1]
+    assert moved["start_time_dt"] == datetime(2025, 10, 21, 17)
+    assert moved["end_time_dt"] == datetime(2025, 10, 21, 19)
+    assert moved["location"] == "Lab"
+    assert moved["id"] == "e1"
+    assert "location" not in occurrences[0]
+
+
+def test_override_moved_into_window_is_found():
+    event = _event(
+        "2025-10-06T18:00:00", "FREQ=WEEKLY;COUNT=4", "2025-10-06T20:00:00",
+        overrides={"2025-10-13": {"start_time": "2025-10-18T10:00:00", "end_time": "2025-10-18T12:00:00"}},
+    )
+    assert _dates(event, datetime(2025, 10, 18), datetime(2025, 10, 19)) == ["2025-10-13"]
+    assert _dates(event, datetime(2025, 10, 13), datetime(2025, 10, 14)) == []
+    start, end = recurrence.series_span(event)
+    assert start <= datetime(2025, 10, 6, 18) and end >= datetime(2025, 10, 27, 20)
+
+
+def test_current_adjustments_drop_dates_the_series_no_longer_has():
+    event = _event(
+        "2025-10-06T18:00:00", "FREQ=WEEKLY;COUNT=4",
+        exceptions=["2025-10-13", "2025-10-14", "2025-11-03"],
+        overrides={"2025-10-20": {"location": "Lab"}, "2025-10-21": {"location": "Lab"}, "not a date": {}},
+    )
+    assert recurrence.current_adjustments(event) == (["2025-10-13"], {"2025-10-20": {"location": "Lab"}})
+
+    # Moved to Tuesdays: only the Tuesday dates are still occurrences
+    moved = _event("2025-10-07T18:00:00", "FREQ=WEEKLY;COUNT=4", exceptions=event["exceptions"], overrides=event["overrides"])
+    assert recurrence.current_adjustments(moved) == (["2025-10-14"], {"2025-10-21": {"location": "Lab"}})
+
+
+def test_count_includes_cancelled_dates():
+    event = _event("2025-10-01T18:00:00", "FREQ=DAILY;COUNT=3", exceptions=["2025-10-02"])
+    assert _dates(event, *SEASON) == ["2025-10-01", "2025-10-03"]
+
+
+def test_one_off_event_is_its_own_occurrence():
+    event = _event("2025-10-01T18:00:00", None, "2025-10-01T20:00:00")
+    assert list(recurrence.occurrences(event, datetime(2025, 10, 1, 19), datetime(2025, 10, 2))) == [event]
+    assert list(recurrence.occurrences(event, datetime(2025, 10, 1, 20), datetime(2025, 10, 2))) == []
+
+
+def test_matches_naive_expansion():
+    first = datetime(2025, 10, 9, 18, 30)
+    for text in ["FREQ=DAILY;INTERVAL=3", "FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,TH,SU", "FREQ=MONTHLY;INTERVAL=5"]:
+        rule = recurrence.parse_rule(text)
+        # Generated one by one from the first occurrence, without skipping ahead
+        naive = takewhile(lambda start: start < datetime(2027, 1, 1), recurrence._starts(rule, first, first))
+        event = _event(first.isoformat(), text, (first + timedelta(hours=2)).isoformat())
+        window = (datetime(2026, 2, 1), datetime(2026, 6, 1))
+        expected = [
+            start.date().isoformat() for start in naive
+            if start < window[1] and start + timedelta(hours=2) > window[0]
+        ]
+        assert _dates(event, *window) == expected
@@ -0,0 +1,119 @@
+from datetime import datetime, time, timedelta
+
+import scheduling
+import storage
+
+
+def _event(event_id, start, end, participants, **fields):
+    return {"id": event_id, "title": event_id, "start_time": start, "end_time": end, "participants": participants, **fields}
+
+
+def _setup_events():
+    storage.save_collection("events", [
+        _event("build", "2025-10-13T09:00:00", "2025-10-13T12:00:00", ["Ada", "Grace"]),
+        _event("cad", "2025-10-13T11:00:00", "2025-10-13T13:00:00", ["ada"]),
+        _event("review", "2025-10-13T15:00:00", "2025-10-13T16:00:00", ["Linus"]),
+        _event("all-hands", "2025-10-14T18:00:00", "2025-10-14T19:00:00", ["All team members"]),
+        _event("practice", "2025-10-13T19:00:00", "2025-10-13T20:00:00", ["Grace", "Linus"],
+               recurrence="FREQ=DAILY;COUNT=3"),
+    ])
+
+
+DAY = (datetime(2025, 10, 13), datetime(2025, 10, 14))
+
+
+def test_busy_intervals_are_merged_and_clipped(workdir):
+    _setup_events()
+    busy = scheduling.busy_intervals(["Ada", "Grace"], datetime(2025, 10, 13, 10), DAY[1])
+    assert busy == {
+        "Ada": [(datetime(2025, 10, 13, 10), datetime(2025, 10, 13, 13))],
+        "Grace": [(datetime(2025, 10, 13, 10), datetime(2025, 10, 13, 12)),
+                  (datetime(2025, 10, 13, 19), datetime(2025, 10, 13, 20))],
+    }
+
+
+def test_clashes_match_names_case_insensitively(workdir):
+    _setup_events()
+    found = scheduling.clashes(["ADA", "Linus"], datetime(2025, 10, 13, 11, 30), datetime(2025, 10, 13, 15, 30))
+    assert {name: [event["id"] for event in events] for name, events in found.items()} == {
+        "ADA": ["build", "cad"],
+        "Linus": ["review"],
+    }
+    # The event being edited does not clash with itself
+    assert scheduling.clashes(["Linus"], datetime(2025, 10, 13, 15), datetime(2025, 10, 13, 16), exclude_id="review") == {}
+
+
+def test_whole_team_events_clash_with_everyone(workdir):
+    _setup_events()
+    found = scheduling.clashes(["Margaret"], datetime(2025, 10, 14, 18, 30), datetime(2025, 10, 14, 20))
+    assert [event["id"] for event in found["Margaret"]] == ["all-hands"]
+
+
+def test_recurring_occurrences_clash(workdir):
+    _setup_events()
+    found = scheduling.clashes(["Linus"], datetime(2025, 10, 15, 19, 30), datetime(2025, 10, 15, 21))
+    assert [event["occurrence"] for event in found["Linus"]] == ["2025-10-15"]
+    assert scheduling.clashes(["Linus"], datetime(2025, 10, 16, 19), datetime(2025, 10, 16, 20)) == {}
+
+
+def test_series_clashes_check_every_occurrence(workdir):
+    _setup_events()
+    proposal = {
+        "start_time_dt": datetime(2025, 10, 12, 19, 30),
+        "end_time_dt": datetime(2025, 10, 12, 20, 30),
+        "recurrence": "FREQ=DAILY",
+        "exceptions": ["2025-10-14"],
+    }
+    found = scheduling.series_clashes(["Linus"], proposal, window=timedelta(days=7))
+    # The practice runs Oct 13-15; the proposal is cancelled on the 14th
+    assert [(occurrence["occurrence"], [e["occurrence"] for e in busy["Linus"]]) for occurrence, busy in found] == [
+        ("2025-10-13", ["2025-10-13"]),
+        ("2025-10-15", ["2025-10-15"]),
+    ]
+
+    one_off = {"start_time_dt": datetime(2025, 10, 13, 15, 30), "end_time_dt": datetime(2025, 10, 13, 17)}
+    assert [[e["id"] for e in busy["Linus"]] for _, busy in scheduling.series_clashes(["Linus"], one_off)] == [["review"]]
+
+
+def test_conflicts(workdir):
+    _setup_events()
+    found = scheduling.conflicts(None, *DAY)
+    assert [(c.participant, c.first["id"], c.second["id"], c.start, c.end) for c in found] == [
+        ("Ada", "build", "cad", datetime(2025, 10, 13, 11), datetime(2025, 10, 13, 12)),
+    ]
+    assert scheduling.conflicts(["Grace", "Linus"], *DAY) == []
+
+
+def test_free_slots(workdir):
+    _setup_events()
+    slots = scheduling.free_slots(["Ada", "Linus"], *DAY, timedelta(hours=1), time(8), time(21))
+    assert slots == [
+        (datetime(2025, 10, 13, 8), datetime(2025, 10, 13, 9)),
+        (datetime(2025, 10, 13, 13), datetime(2025, 10, 13, 15)),
+        (datetime(2025, 10, 13, 16), datetime(2025, 10, 13, 19)),
+        (datetime(2025, 10, 13, 20), datetime(2025, 10, 13, 21)),
+    ]
+    # Gaps shorter than the duration are left out
+    longer = scheduling.free_slots(["Ada", "Linus"], *DAY, timedelta(hours=2, minutes=30), time(8), time(21))
+    assert longer == [(datetime(2025, 10, 13, 16), datetime(2025, 10, 13, 19))]
+    # The event being edited does not block its own slot
+    edited = scheduling.free_slots(["Ada", "Linus"], *DAY, timedelta(hours=1), time(8), time(21), exclude_id="review")
+    assert (datetime(2025, 10, 13, 13), datetime(2025, 10, 13, 19)) in edited
+
+
+def test_free_slots_match_brute_force(workdir):
+    _setup_events()
+    start, end = datetime(2025, 10, 13), datetime(2025, 10, 16)
+    people = ["Ada", "Grace", "Linus"]
+    busy = [span for spans in scheduling.busy_intervals(people, start, end).values() for span in spans]
+    slots = scheduling.free_slots(people, start, end, timedelta(minutes=30))
+
+    minute = start
+    while minute < end:
+        in_hours = scheduling.DAY_START <= minute.time() < scheduling.DAY_END
+        free = in_hours and not any(s <= minute < e for s, e in busy)
+        in_slot = any(s <= minute < e for s, e in slots)
+        # Every minute in a slot is free; free minutes outside slots belong to gaps under 30 minutes
+        assert not in_slot or free
+        minute += timedelta(minutes=15)
+    assert all(e - s >= timedelta(minutes=30) for s, e in slots)
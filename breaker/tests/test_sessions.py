@@ -0,0 +1,46 @@
+import os
+
+import pytest
+
+import sessions
+
+
+@pytest.fixture
+def fresh_sessions(workdir, monkeypatch):
+    monkeypatch.delenv("CIRCUIT_BREAKERS_SESSION_SECRET", raising=False)
+    monkeypatch.setattr(sessions, "_secret", None)
+    monkeypatch.setattr(sessions, "_sessions", None)
+    return workdir
+
+
+def test_nothing_is_read_or_written_before_first_use(fresh_sessions):
+    assert not os.path.exists(sessions.SESSIONS_DIR)
+    token = sessions.create_session("ada", "Ada", "Admin", 1, client="browser")
+    assert os.path.exists(sessions.SECRET_FILE)
+    assert sessions.validate(token, "browser").username == "ada"
+    assert sessions.validate(token, "other browser") is None
+
+
+def test_rotation_returns_one_successor(fresh_sessions):
+    token = sessions.create_session("ada", "Ada", "Admin", 1, client="browser")
+    successor, session = sessions.rotate(token, "browser")
+    assert session.username == "ada" and successor != token
+
+    # A second rotation within the grace period gets the same successor
+    again, _ = sessions.rotate(token, "browser")
+    assert again == successor
+    assert sessions.active_sessions() == 2
+
+    sessions.revoke(successor)
+    assert sessions.rotate(token, "browser") == (None, None)
+
+
+def test_sessions_survive_a_restart(fresh_sessions, monkeypatch):
+    token = sessions.create_session("ada", "Ada", "Admin", 1, client="browser")
+    successor, _ = sessions.rotate(token, "browser")
+    monkeypatch.setattr(sessions, "_secret", None)
+    monkeypatch.setattr(sessions, "_sessions", None)
+
+    assert sessions.validate(successor, "browser").username == "ada"
+    # Successors are not saved: the replaced token cannot be rotated again
+    assert sessions.rotate(token, "browser") == (None, None)
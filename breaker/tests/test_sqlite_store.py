@@ -0,0 +1,38 @@
+import database
+import storage
+
+
+def _task(task_id, **fields):
+    return {"id": task_id, "title": f"Task {task_id}", "status": "To Do", "created_at": "2025-10-01T09:00:00", **fields}
+
+
+def _message(message_id, channel, timestamp):
+    return {"id": message_id, "channel": channel, "author": "Ada", "content": "hi", "timestamp": timestamp}
+
+
+def _ids(items):
+    return [item["id"] for item in items]
+
+
+def test_json_data_is_migrated_into_sqlite(workdir, monkeypatch):
+    storage.insert_records("tasks", [_task("a"), _task("b")])
+    storage.insert_records("messages", [_message("m1", "general", "2025-10-01T10:00:00")])
+    storage.save_document("users", {"ada": {"id": 1, "name": "Ada", "role": "Admin"}})
+
+    monkeypatch.setenv("CIRCUIT_BREAKERS_STORAGE", "sqlite")
+    database.migrate_data_from_json()
+
+    assert storage.get_store().__class__.__name__ == "SqliteStore"
+    assert _ids(storage.load_collection("tasks")) == ["a", "b"]
+    assert _ids(storage.iter_recent("messages", "general")) == ["m1"]
+    assert storage.load_document("users")["ada"]["name"] == "Ada"
+
+
+def test_find_on_fields_without_a_column_matches_the_json_stores(storage_mode):
+    storage.insert_records("tasks", [
+        _task("a", points=3, created_at="2025-10-03T09:00:00"),
+        _task("b", points=5),
+        _task("c", points=3, created_at="2025-10-02T09:00:00"),
+    ])
+    assert _ids(storage.find_records("tasks", order_by="created_at", points=3)) == ["c", "a"]
+    assert _ids(storage.find_records("tasks", order_by="points", descending=True, limit=1)) == ["b"]
@@ -0,0 +1,24 @@
+from datetime import datetime
+
+import storage
+
+
+def _task(task_id, **fields):
+    return {"id": task_id, "title": f"Task {task_id}", "status": "To Do", "created_at": "2025-10-01T09:00:00", **fields}
+
+
+def test_times_are_parsed_on_load(storage_mode):
+    storage.insert_records("tasks", [_task("a"), _task("b", created_at="not a date", due_date=None)])
+    first, second = storage.load_collection("tasks")
+    assert first["created_at_dt"] == datetime(2025, 10, 1, 9)
+    assert first["created_at_ts"] == int(first["created_at_dt"].timestamp())
+    # Missing and unparseable times are None rather than errors
+    assert second["created_at_dt"] is None and second["created_at_ts"] is None
+    assert second["due_date_dt"] is None
+
+
+def test_saved_records_drop_derived_keys(storage_mode):
+    storage.insert_records("tasks", [_task("a")])
+    storage.save_collection("tasks", storage.load_collection("tasks"))
+    stored = storage.load_collection_shared("tasks")[0]
+    assert not storage.DERIVED_TIME_KEYS & stored.keys()
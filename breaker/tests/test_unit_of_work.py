@@ -0,0 +1,71 @@
+import pytest
+
+import storage
+
+
+def _task(task_id, **fields):
+    return {"id": task_id, "title": f"Task {task_id}", "status": "To Do", "created_at": "2025-10-01T09:00:00", **fields}
+
+
+def _ids(items):
+    return [item["id"] for item in items]
+
+
+def test_batch_commits_once(storage_mode):
+    storage.insert_records("tasks", [_task("a")])
+    version = storage.collection_version("tasks")
+
+    with storage.batch():
+        storage.insert_records("tasks", [_task("b")])
+        storage.patch_records("tasks", {"a": {"status": "Done"}})
+        storage.save_document("settings", {"season": "2026"})
+        # Reads inside the batch see its writes; the store does not yet
+        assert _ids(storage.load_collection("tasks")) == ["a", "b"]
+        assert storage.get_record("tasks", "a")["status"] == "Done"
+        assert storage.collection_version("tasks") == version
+
+    assert _ids(storage.load_collection("tasks")) == ["a", "b"]
+    assert storage.get_record("tasks", "a")["status"] == "Done"
+    assert storage.load_document("settings") == {"season": "2026"}
+
+
+def test_batch_discarded_on_error(storage_mode):
+    storage.insert_records("tasks", [_task("a")])
+
+    with pytest.raises(RuntimeError):
+        with storage.batch():
+            storage.delete_records("tasks", ["a"])
+            storage.save_document("settings", {"season": "2026"})
+            raise RuntimeError("abort")
+
+    assert _ids(storage.load_collection("tasks")) == ["a"]
+    assert storage.load_document("settings") == {}
+
+
+def test_batch_checks_ids_on_insert(storage_mode):
+    storage.insert_records("tasks", [_task("a")])
+    with pytest.raises(ValueError):
+        with storage.batch():
+            storage.insert_records("tasks", [_task("a")])
+    assert _ids(storage.load_collection("tasks")) == ["a"]
+
+
+class _Rerun(BaseException):
+    """Stands in for Streamlit's RerunException."""
+
+
+def test_batch_commits_on_rerun_only(workdir, monkeypatch):
+    monkeypatch.setattr(storage, "_script_control_exceptions", lambda: (_Rerun,))
+
+    with pytest.raises(_Rerun):
+        with storage.batch():
+            storage.insert_records("tasks", [_task("a")])
+            raise _Rerun()
+    assert _ids(storage.load_collection("tasks")) == ["a"]
+
+    for interruption in (KeyboardInterrupt, SystemExit):
+        with pytest.raises(interruption):
+            with storage.batch():
+                storage.insert_records("tasks", [_task("b")])
+                raise interruption()
+        assert _ids(storage.load_collection("tasks")) == ["a"]
@@ -1,10 +1,32 @@
 import streamlit as st
-import pandas as pd
-import json
 import os
 from datetime import datetime
-import base64
-from io import BytesIO
+import threading
+import activity
+import directory
+import ids
+import storage
+from database import RECORD_CLASSES, decode_valid_records
+
+# Columns of each collection's DataFrame stored as categoricals and as datetime64
+FRAME_COLUMNS = {
+    "tasks": (["status", "priority", "category", "assigned_to", "created_by"], ["created_at", "due_date"]),
+    "logs": (["category", "author"], ["date"]),
+    "resources": (["category", "file_type", "uploaded_by"], ["upload_date"]),
+    "media": (["category", "media_type", "uploaded_by"], ["upload_date"]),
+    "sponsors": (["level"], ["start_date", "end_date"]),
+    "events": (["category", "organizer", "location"], ["start_time", "end_time"]),
+    "messages": (["channel", "category", "priority", "author"], ["timestamp"]),
+}
+
+# collection -> (collection version, typed DataFrame); shared by all sessions
+_frames = {}
+_frames_lock = threading.Lock()
+
+# collection -> (collection version, decoded records); records are immutable
+# so the decoded list is shared by all sessions
+_records = {}
+_records_lock = threading.Lock()
 
 # Create data directories if they don't exist
 def initialize_data_directories():
@@ -19,8 +41,8 @@ def initialize_data_directories():
         "data/messages"
     ]
     
-    for directory in directories:
-        os.makedirs(directory, exist_ok=True)
+    for path in directories:
+        os.makedirs(path, exist_ok=True)
 
 # Check if user has required role
 def check_role_access(required_roles):
@@ -31,159 +53,224 @@ def check_role_access(required_roles):
 
 # Load a task file
 def load_tasks():
-    task_file = "breaker/data/tasks/tasks.json"
-    if not os.path.exists(task_file):
-        tasks = []
-        with open(task_file, 'w') as f:
-            json.dump(tasks, f, indent=4)
-        return tasks
-    
-    with open(task_file, 'r') as f:
-        return json.load(f)
+    return storage.load_collection("tasks")
 
 # Save tasks to file
 def save_tasks(tasks):
-    task_file = "breaker/data/tasks/tasks.json"
-    with open(task_file, 'w') as f:
-        json.dump(tasks, f, indent=4)
+    storage.save_collection("tasks", tasks)
 
 # Load build log entries
 def load_logs():
-    log_file = "breaker/data/logs/build_logs.json"
-    if not os.path.exists(log_file):
-        logs = []
-        with open(log_file, 'w') as f:
-            json.dump(logs, f, indent=4)
-        return logs
-    
-    with open(log_file, 'r') as f:
-        return json.load(f)
+    return storage.load_collection("logs")
 
 # Save build log entries
 def save_logs(logs):
-    log_file = "breaker/data/logs/build_logs.json"
-    with open(log_file, 'w') as f:
-        json.dump(logs, f, indent=4)
+    storage.save_collection("logs", logs)
 
 # Load resources/documents
 def load_resources():
-    resource_file = "breaker/data/resources/resources.json"
-    if not os.path.exists(resource_file):
-        resources = []
-        with open(resource_file, 'w') as f:
-            json.dump(resources, f, indent=4)
-        return resources
-    
-    with open(resource_file, 'r') as f:
-        return json.load(f)
+    return storage.load_collection("resources")
 
 # Save resources/documents
 def save_resources(resources):
-    resource_file = "breaker/data/resources/resources.json"
-    with open(resource_file, 'w') as f:
-        json.dump(resources, f, indent=4)
+    storage.save_collection("resources", resources)
 
 # Load media items
 def load_media():
-    media_file = "breaker/data/media/media_items.json"
-    if not os.path.exists(media_file):
-        media_items = []
-        with open(media_file, 'w') as f:
-            json.dump(media_items, f, indent=4)
-        return media_items
-    
-    with open(media_file, 'r') as f:
-        return json.load(f)
+    return storage.load_collection("media")
 
 # Save media items
 def save_media(media_items):
-    media_file = "breaker/data/media/media_items.json"
-    with open(media_file, 'w') as f:
-        json.dump(media_items, f, indent=4)
+    storage.save_collection("media", media_items)
 
 # Load sponsors
 def load_sponsors():
-    sponsor_file = "breaker/data/sponsors/sponsors.json"
-    if not os.path.exists(sponsor_file):
-        sponsors = []
-        with open(sponsor_file, 'w') as f:
-            json.dump(sponsors, f, indent=4)
-        return sponsors
-    
-    with open(sponsor_file, 'r') as f:
-        return json.load(f)
+    return storage.load_collection("sponsors")
 
 # Save sponsors
 def save_sponsors(sponsors):
-    sponsor_file = "breaker/data/sponsors/sponsors.json"
-    with open(sponsor_file, 'w') as f:
-        json.dump(sponsors, f, indent=4)
+    storage.save_collection("sponsors", sponsors)
 
 # Load events
 def load_events():
-    event_file = "breaker/data/events/events.json"
-    if not os.path.exists(event_file):
-        events = []
-        with open(event_file, 'w') as f:
-            json.dump(events, f, indent=4)
-        return events
-    
-    with open(event_file, 'r') as f:
-        return json.load(f)
+    return storage.load_collection("events")
 
 # Save events
 def save_events(events):
-    event_file = "breaker/data/events/events.json"
-    with open(event_file, 'w') as f:
-        json.dump(events, f, indent=4)
+    storage.save_collection("events", events)
 
-# Load team members
+# Load team members (username, name, role and email) from the cached user directory
 def load_team_members():
-    user_data_file = "breaker/data/users.json"
-    if not os.path.exists(user_data_file):
-        return []
-    
-    with open(user_data_file, 'r') as f:
-        user_data = json.load(f)
-    
-    members = []
-    for username, data in user_data.items():
-        member = {
-            "username": username,
-            "name": data["name"],
-            "role": data["role"],
-            "email": data["email"]
-        }
-        members.append(member)
-    
-    return members
+    return directory.team_members()
 
 # Load messages
 def load_messages():
-    message_file = "breaker/data/messages/messages.json"
-    if not os.path.exists(message_file):
-        messages = []
-        with open(message_file, 'w') as f:
-            json.dump(messages, f, indent=4)
-        return messages
-    
-    with open(message_file, 'r') as f:
-        return json.load(f)
+    return storage.load_collection("messages")
 
 # Save messages
 def save_messages(messages):
-    message_file = "breaker/data/messages/messages.json"
-    with open(message_file, 'w') as f:
-        json.dump(messages, f, indent=4)
+    storage.save_collection("messages", messages)
+
+# Build a typed DataFrame from a collection's records. pandas is imported
+# here, on first use, so pages without analytics never load it.
+def build_collection_frame(collection, records):
+    import pandas as pd
+    
+    category_columns, time_columns = FRAME_COLUMNS[collection]
+    frame = pd.DataFrame.from_records(records)
+    
+    for column in category_columns:
+        if column not in frame:
+            frame[column] = None
+        frame[column] = frame[column].astype("category")
+    
+    for column in time_columns:
+        if column not in frame:
+            frame[column] = None
+        frame[column] = pd.to_datetime(frame[column], errors="coerce", format="ISO8601")
+    
+    return frame
+
+# Cached, typed DataFrame of a collection for vectorized analytics. It is
+# rebuilt only when the collection's version changes (i.e. after a save), and
+# each caller gets its own copy to modify freely.
+def collection_frame(collection):
+    version = storage.collection_version(collection)
+    with _frames_lock:
+        cached = _frames.get(collection)
+    
+    if cached is None or cached[0] != version:
+        frame = build_collection_frame(collection, storage.load_collection_shared(collection))
+        cached = (version, frame)
+        with _frames_lock:
+            _frames[collection] = cached
+    
+    return cached[1].copy()
+
+# Decode a collection into record objects once per version; records that
+# fail validation are reported and left out, not fatal for the page
+def _decoded_records(collection):
+    version = storage.collection_version(collection)
+    with _records_lock:
+        cached = _records.get(collection)
+    
+    if cached is None or cached[0] != version:
+        records, errors = decode_valid_records(collection, storage.load_collection_shared(collection))
+        for record_id, error in errors.items():
+            print(f"Error loading {collection} record '{record_id}': {error}")
+        cached = (version, records, errors)
+        with _records_lock:
+            _records[collection] = cached
+    
+    return cached
+
+# Load a collection as immutable, slotted record objects (see database.py),
+# decoded once per collection version. Lighter than dicts for large
+# collections and suited to read-only filtering. Invalid records are skipped
+# (see invalid_records).
+def load_records(collection):
+    return list(_decoded_records(collection)[1])
+
+# Records of a collection that failed validation and were left out of
+# load_records, as {record id (or position): error}
+def invalid_records(collection):
+    return dict(_decoded_records(collection)[2])
+
+# Iterate the records of one channel (partition key) of a partitioned
+# collection, newest first; older months are only read as far as the caller
+# iterates, so stop as soon as the view has what it needs
+def iter_recent(collection, key):
+    return storage.iter_recent(collection, key)
+
+# Number of records per channel (partition key) of a partitioned collection
+def partition_counts(collection):
+    return storage.partition_counts(collection)
+
+# Validate records against the collection's model before they are stored
+def validate_records(collection, records):
+    from_dict = RECORD_CLASSES[collection].from_dict
+    for record in records:
+        from_dict(storage._strip_times(record))
+
+# Get a single record by id from a collection ("tasks", "logs", "resources",
+# "media", "sponsors", "events" or "messages"); returns None if missing
+def get_record(collection, record_id):
+    return storage.get_record(collection, record_id)
+
+# Add a new record to a collection
+def insert_record(collection, record):
+    validate_records(collection, [record])
+    storage.insert_records(collection, [record])
+
+# Add several new records to a collection in one write
+def insert_records(collection, records):
+    validate_records(collection, records)
+    storage.insert_records(collection, records)
+
+# Replace a record with the same id; returns False if it no longer exists
+def update_record(collection, record):
+    validate_records(collection, [record])
+    return storage.update_records(collection, [record]) == 1
+
+# Replace several records in one write; returns how many still existed
+def update_records(collection, records):
+    validate_records(collection, records)
+    return storage.update_records(collection, records)
+
+# Change only the given fields of a record; returns False if it no longer exists
+def patch_record(collection, record_id, changes):
+    validate_records(collection, [{**changes, "id": record_id}])
+    return storage.patch_records(collection, {record_id: changes}) == 1
+
+# Change fields of several records ({id: changes}) in one write
+def patch_records(collection, patches):
+    validate_records(collection, [{**changes, "id": record_id} for record_id, changes in patches.items()])
+    return storage.patch_records(collection, patches)
+
+# Delete a record by id; returns False if it was already gone
+def delete_record(collection, record_id):
+    return storage.delete_records(collection, [record_id]) == 1
+
+# Delete several records by id in one write
+def delete_records(collection, record_ids):
+    return storage.delete_records(collection, record_ids)
+
+# Group every write made inside the block (any collection or document) into
+# one unit of work, flushed once when the block ends: a single transaction in
+# SQLite mode, one write per touched file in the JSON modes (each file is
+# replaced atomically, but a failure partway can leave only some of them
+# written). Reads through load_*/get_record/find see the pending changes; the
+# cached frames and records (collection_frame, load_records) only after the
+# flush. st.rerun() and st.stop() inside the block still flush; any other
+# exception (KeyboardInterrupt included) discards the pending writes.
+def unit_of_work():
+    return storage.batch()
+
+# Flush the writes pending in the current unit of work now, e.g. before
+# reading the cached frames; the unit of work stays open for further writes
+def commit():
+    pending = storage.active_batch()
+    if pending is not None:
+        pending.commit()
+
+# Add an entry to the team activity stream (see activity.py), attributed to
+# the logged-in user; call it after the change it describes was saved. In a
+# unit of work the entry is only written if the pending writes are flushed
+def record_activity(kind, description):
+    activity.record(kind, description, st.session_state.get("user"))
 
 # Format date from ISO format to user-friendly display
 def format_date(iso_date):
     date_obj = datetime.fromisoformat(iso_date)
     return date_obj.strftime("%m/%d/%Y %I:%M %p")
 
-# Generate a task ID
+# Generate a unique, time-sortable record ID (ULID)
 def generate_id():
-    return datetime.now().strftime("%Y%m%d%H%M%S")
+    return ids.new_id()
+
+# Generate several IDs at once, e.g. for bulk imports (sorted by creation order)
+def generate_ids(count):
+    return ids.new_ids(count)
 
 # Load SVG file
 def load_svg(svg_path):
@@ -208,6 +295,3 @@ def load_svg(svg_path):
     
     with open(svg_path, 'r') as f:
         return f.read()
-
-# Initialize data directories when module is imported
-initialize_data_directories()
@@ -5,6 +5,7 @@ import os
 from datetime import datetime
 import base64
 from io import BytesIO
+import ids
 from database import (
     SessionLocal, User, Task, BuildLog, Resource, 
     MediaItem, Message, Event, Sponsor, AppSetting
@@ -34,6 +35,46 @@ def check_role_access(required_roles):
         return False
     return True
 
+# Map user ids to names using a single IN query
+def get_user_names_by_id(db, user_ids):
+    user_ids = {user_id for user_id in user_ids if user_id}
+    if not user_ids:
+        return {}
+    return {user.id: user.name for user in db.query(User).filter(User.id.in_(user_ids)).all()}
+
+# Map user names to ids using a single IN query
+def get_user_ids_by_name(db, names):
+    names = {name for name in names if name}
+    if not names:
+        return {}
+    return {user.name: user.id for user in db.query(User).filter(User.name.in_(names)).all()}
+
+# Save a full collection as a diff against the current rows: one query reads
+# the table, then missing rows are deleted and new or changed rows are
+# written with bulk insert/update statements. build_row(record, existing_row)
+# returns the column values for a record (existing_row is None for new ones).
+def bulk_save(db, model, records, build_row):
+    existing_rows = {row.id: row for row in db.query(model).all()}
+    new_ids = {record['id'] for record in records if 'id' in record}
+    
+    inserts = []
+    updates = []
+    for record in records:
+        existing_row = existing_rows.get(record.get('id'))
+        values = build_row(record, existing_row)
+        if existing_row is None:
+            inserts.append(values)
+        elif any(getattr(existing_row, column) != value for column, value in values.items()):
+            updates.append(values)
+    
+    deleted_ids = [row_id for row_id in existing_rows if row_id not in new_ids]
+    if deleted_ids:
+        db.query(model).filter(model.id.in_(deleted_ids)).delete(synchronize_session=False)
+    if updates:
+        db.bulk_update_mappings(model, updates)
+    if inserts:
+        db.bulk_insert_mappings(model, inserts)
+
 # Load tasks from database
 def load_tasks():
     # Try to load from database first
@@ -42,13 +83,12 @@ def load_tasks():
         tasks = []
         db_tasks = db.query(Task).order_by(desc(Task.created_at)).all()
         
+        # Resolve every assignee name with one batched query instead of one per row
+        user_names = get_user_names_by_id(db, [task.assignee_id for task in db_tasks])
+        
         for task in db_tasks:
             # Get assignee name if available
-            assignee_name = None
-            if task.assignee_id:
-                user = db.query(User).filter(User.id == task.assignee_id).first()
-                if user:
-                    assignee_name = user.name
+            assignee_name = user_names.get(task.assignee_id)
             
             tasks.append({
                 "id": task.id,
@@ -71,14 +111,11 @@ def load_tasks():
                 
                 # Migrate tasks to the database if found in JSON
                 if json_tasks:
+                    # Map assignees to user IDs with one batched query
+                    user_ids = get_user_ids_by_name(db, [task_data.get('assignee') for task_data in json_tasks])
+                    
                     for task_data in json_tasks:
-                        # Map assignee to user ID if possible
-                        assignee_id = None
-                        assignee_name = task_data.get('assignee')
-                        if assignee_name:
-                            user = db.query(User).filter(User.name == assignee_name).first()
-                            if user:
-                                assignee_id = user.id
+                        assignee_id = user_ids.get(task_data.get('assignee'))
                         
                         new_task = Task(
                             id=task_data.get('id', generate_id()),
@@ -115,49 +152,33 @@ def save_tasks(tasks):
     try:
         # Clear existing tasks if replacing all
         if tasks:
-            # Get existing task IDs
-            existing_ids = [task.id for task in db.query(Task).all()]
-            new_ids = [task['id'] for task in tasks if 'id' in task]
+            # Resolve every assignee name with one batched query
+            user_ids = get_user_ids_by_name(db, [task_data.get('assignee') for task_data in tasks])
             
-            # Delete tasks not in the new list
-            for task_id in existing_ids:
-                if task_id not in new_ids:
-                    db.query(Task).filter(Task.id == task_id).delete()
-            
-            # Update or insert tasks
-            for task_data in tasks:
-                # Find user ID for assignee if present
-                assignee_id = None
-                if 'assignee' in task_data and task_data['assignee']:
-                    user = db.query(User).filter(User.name == task_data['assignee']).first()
-                    if user:
-                        assignee_id = user.id
-                
-                # Check if task exists
-                task_id = task_data.get('id')
-                existing_task = db.query(Task).filter(Task.id == task_id).first() if task_id else None
-                
+            def build_row(task_data, existing_task):
+                # Existing values are kept for fields missing from task_data
                 if existing_task:
-                    # Update existing task
-                    existing_task.title = task_data.get('title', existing_task.title)
-                    existing_task.description = task_data.get('description', existing_task.description)
-                    existing_task.status = task_data.get('status', existing_task.status)
-                    existing_task.priority = task_data.get('priority', existing_task.priority)
-                    existing_task.due_date = task_data.get('due_date', existing_task.due_date)
-                    existing_task.assignee_id = assignee_id
-                else:
-                    # Create new task
-                    new_task = Task(
-                        id=task_data.get('id', generate_id()),
-                        title=task_data.get('title', ''),
-                        description=task_data.get('description', ''),
-                        status=task_data.get('status', 'Not Started'),
-                        priority=task_data.get('priority', 'Medium'),
-                        due_date=task_data.get('due_date', None),
-                        assignee_id=assignee_id
-                    )
-                    db.add(new_task)
+                    return {
+                        "id": existing_task.id,
+                        "title": task_data.get('title', existing_task.title),
+                        "description": task_data.get('description', existing_task.description),
+                        "status": task_data.get('status', existing_task.status),
+                        "priority": task_data.get('priority', existing_task.priority),
+                        "due_date": task_data.get('due_date', existing_task.due_date),
+                        "assignee_id": user_ids.get(task_data.get('assignee'))
+                    }
+                return {
+                    "id": task_data.get('id', generate_id()),
+                    "title": task_data.get('title', ''),
+                    "description": task_data.get('description', ''),
+                    "status": task_data.get('status', 'Not Started'),
+                    "priority": task_data.get('priority', 'Medium'),
+                    "due_date": task_data.get('due_date', None),
+                    "assignee_id": user_ids.get(task_data.get('assignee'))
+                }
             
+            # Apply only the differences as bulk statements in one transaction
+            bulk_save(db, Task, tasks, build_row)
             db.commit()
         
         # For backward compatibility and backup, also save to JSON
@@ -184,13 +205,12 @@ def load_logs():
         logs = []
         db_logs = db.query(BuildLog).order_by(desc(BuildLog.created_at)).all()
         
+        # Resolve every author name with one batched query instead of one per row
+        user_names = get_user_names_by_id(db, [log.author_id for log in db_logs])
+        
         for log in db_logs:
             # Get author name if available
-            author_name = None
-            if log.author_id:
-                user = db.query(User).filter(User.id == log.author_id).first()
-                if user:
-                    author_name = user.name
+            author_name = user_names.get(log.author_id)
             
             logs.append({
                 "id": log.id,
@@ -230,47 +250,31 @@ def save_logs(logs):
     try:
         # Process logs
         if logs:
-            # Get existing log IDs
-            existing_ids = [log.id for log in db.query(BuildLog).all()]
-            new_ids = [log['id'] for log in logs if 'id' in log]
+            # Resolve every author name with one batched query
+            user_ids = get_user_ids_by_name(db, [log_data.get('author') for log_data in logs])
             
-            # Delete logs not in the new list
-            for log_id in existing_ids:
-                if log_id not in new_ids:
-                    db.query(BuildLog).filter(BuildLog.id == log_id).delete()
-            
-            # Update or insert logs
-            for log_data in logs:
-                # Find user ID for author if present
-                author_id = None
-                if 'author' in log_data and log_data['author']:
-                    user = db.query(User).filter(User.name == log_data['author']).first()
-                    if user:
-                        author_id = user.id
-                
-                # Check if log exists
-                log_id = log_data.get('id')
-                existing_log = db.query(BuildLog).filter(BuildLog.id == log_id).first() if log_id else None
-                
+            def build_row(log_data, existing_log):
+                # Existing values are kept for fields missing from log_data
                 if existing_log:
-                    # Update existing log
-                    existing_log.title = log_data.get('title', existing_log.title)
-                    existing_log.description = log_data.get('description', existing_log.description)
-                    existing_log.category = log_data.get('category', existing_log.category)
-                    existing_log.date = log_data.get('date', existing_log.date)
-                    existing_log.author_id = author_id
-                else:
-                    # Create new log
-                    new_log = BuildLog(
-                        id=log_data.get('id', generate_id()),
-                        title=log_data.get('title', ''),
-                        description=log_data.get('description', ''),
-                        category=log_data.get('category', 'General'),
-                        date=log_data.get('date', datetime.now().isoformat()),
-                        author_id=author_id
-                    )
-                    db.add(new_log)
+                    return {
+                        "id": existing_log.id,
+                        "title": log_data.get('title', existing_log.title),
+                        "description": log_data.get('description', existing_log.description),
+                        "category": log_data.get('category', existing_log.category),
+                        "date": log_data.get('date', existing_log.date),
+                        "author_id": user_ids.get(log_data.get('author'))
+                    }
+                return {
+                    "id": log_data.get('id', generate_id()),
+                    "title": log_data.get('title', ''),
+                    "description": log_data.get('description', ''),
+                    "category": log_data.get('category', 'General'),
+                    "date": log_data.get('date', datetime.now().isoformat()),
+                    "author_id": user_ids.get(log_data.get('author'))
+                }
             
+            # Apply only the differences as bulk statements in one transaction
+            bulk_save(db, BuildLog, logs, build_row)
             db.commit()
         
         # For backward compatibility, also save to JSON
@@ -297,13 +301,12 @@ def load_resources():
         resources = []
         db_resources = db.query(Resource).order_by(desc(Resource.created_at)).all()
         
+        # Resolve every author name with one batched query instead of one per row
+        user_names = get_user_names_by_id(db, [resource.author_id for resource in db_resources])
+        
         for resource in db_resources:
             # Get author name if available
-            author_name = None
-            if resource.author_id:
-                user = db.query(User).filter(User.id == resource.author_id).first()
-                if user:
-                    author_name = user.name
+            author_name = user_names.get(resource.author_id)
             
             resources.append({
                 "id": resource.id,
@@ -344,49 +347,33 @@ def save_resources(resources):
     try:
         # Process resources
         if resources:
-            # Get existing resource IDs
-            existing_ids = [resource.id for resource in db.query(Resource).all()]
-            new_ids = [resource['id'] for resource in resources if 'id' in resource]
+            # Resolve every author name with one batched query
+            user_ids = get_user_ids_by_name(db, [resource_data.get('author') for resource_data in resources])
             
-            # Delete resources not in the new list
-            for resource_id in existing_ids:
-                if resource_id not in new_ids:
-                    db.query(Resource).filter(Resource.id == resource_id).delete()
-            
-            # Update or insert resources
-            for resource_data in resources:
-                # Find user ID for author if present
-                author_id = None
-                if 'author' in resource_data and resource_data['author']:
-                    user = db.query(User).filter(User.name == resource_data['author']).first()
-                    if user:
-                        author_id = user.id
-                
-                # Check if resource exists
-                resource_id = resource_data.get('id')
-                existing_resource = db.query(Resource).filter(Resource.id == resource_id).first() if resource_id else None
-                
+            def build_row(resource_data, existing_resource):
+                # Existing values are kept for fields missing from resource_data
                 if existing_resource:
-                    # Update existing resource
-                    existing_resource.title = resource_data.get('title', existing_resource.title)
-                    existing_resource.description = resource_data.get('description', existing_resource.description)
-                    existing_resource.category = resource_data.get('category', existing_resource.category)
-                    existing_resource.url = resource_data.get('url', existing_resource.url)
-                    existing_resource.file_path = resource_data.get('file_path', existing_resource.file_path)
-                    existing_resource.author_id = author_id
-                else:
-                    # Create new resource
-                    new_resource = Resource(
-                        id=resource_data.get('id', generate_id()),
-                        title=resource_data.get('title', ''),
-                        description=resource_data.get('description', ''),
-                        category=resource_data.get('category', 'General'),
-                        url=resource_data.get('url', None),
-                        file_path=resource_data.get('file_path', None),
-                        author_id=author_id
-                    )
-                    db.add(new_resource)
+                    return {
+                        "id": existing_resource.id,
+                        "title": resource_data.get('title', existing_resource.title),
+                        "description": resource_data.get('description', existing_resource.description),
+                        "category": resource_data.get('category', existing_resource.category),
+                        "url": resource_data.get('url', existing_resource.url),
+                        "file_path": resource_data.get('file_path', existing_resource.file_path),
+                        "author_id": user_ids.get(resource_data.get('author'))
+                    }
+                return {
+                    "id": resource_data.get('id', generate_id()),
+                    "title": resource_data.get('title', ''),
+                    "description": resource_data.get('description', ''),
+                    "category": resource_data.get('category', 'General'),
+                    "url": resource_data.get('url', None),
+                    "file_path": resource_data.get('file_path', None),
+                    "author_id": user_ids.get(resource_data.get('author'))
+                }
             
+            # Apply only the differences as bulk statements in one transaction
+            bulk_save(db, Resource, resources, build_row)
             db.commit()
         
         # For backward compatibility, also save to JSON
@@ -413,13 +400,12 @@ def load_media():
         media_items = []
         db_media = db.query(MediaItem).order_by(desc(MediaItem.created_at)).all()
         
+        # Resolve every author name with one batched query instead of one per row
+        user_names = get_user_names_by_id(db, [media.author_id for media in db_media])
+        
         for media in db_media:
             # Get author name if available
-            author_name = None
-            if media.author_id:
-                user = db.query(User).filter(User.id == media.author_id).first()
-                if user:
-                    author_name = user.name
+            author_name = user_names.get(media.author_id)
             
             media_items.append({
                 "id": media.id,
@@ -462,53 +448,37 @@ def save_media(media_items):
     try:
         # Process media items
         if media_items:
-            # Get existing media IDs
-            existing_ids = [media.id for media in db.query(MediaItem).all()]
-            new_ids = [media['id'] for media in media_items if 'id' in media]
-            
-            # Delete media items not in the new list
-            for media_id in existing_ids:
-                if media_id not in new_ids:
-                    db.query(MediaItem).filter(MediaItem.id == media_id).delete()
+            # Resolve every author name with one batched query
+            user_ids = get_user_ids_by_name(db, [media_data.get('author') for media_data in media_items])
             
-            # Update or insert media items
-            for media_data in media_items:
-                # Find user ID for author if present
-                author_id = None
-                if 'author' in media_data and media_data['author']:
-                    user = db.query(User).filter(User.name == media_data['author']).first()
-                    if user:
-                        author_id = user.id
-                
-                # Check if media item exists
-                media_id = media_data.get('id')
-                existing_media = db.query(MediaItem).filter(MediaItem.id == media_id).first() if media_id else None
-                
+            def build_row(media_data, existing_media):
+                # Existing values are kept for fields missing from media_data
                 if existing_media:
-                    # Update existing media item
-                    existing_media.title = media_data.get('title', existing_media.title)
-                    existing_media.description = media_data.get('description', existing_media.description)
-                    existing_media.media_type = media_data.get('media_type', existing_media.media_type)
-                    existing_media.url = media_data.get('url', existing_media.url)
-                    existing_media.file_path = media_data.get('file_path', existing_media.file_path)
-                    existing_media.event = media_data.get('event', existing_media.event)
-                    existing_media.date = media_data.get('date', existing_media.date)
-                    existing_media.author_id = author_id
-                else:
-                    # Create new media item
-                    new_media = MediaItem(
-                        id=media_data.get('id', generate_id()),
-                        title=media_data.get('title', ''),
-                        description=media_data.get('description', ''),
-                        media_type=media_data.get('media_type', 'Image'),
-                        url=media_data.get('url', None),
-                        file_path=media_data.get('file_path', None),
-                        event=media_data.get('event', None),
-                        date=media_data.get('date', datetime.now().isoformat()),
-                        author_id=author_id
-                    )
-                    db.add(new_media)
+                    return {
+                        "id": existing_media.id,
+                        "title": media_data.get('title', existing_media.title),
+                        "description": media_data.get('description', existing_media.description),
+                        "media_type": media_data.get('media_type', existing_media.media_type),
+                        "url": media_data.get('url', existing_media.url),
+                        "file_path": media_data.get('file_path', existing_media.file_path),
+                        "event": media_data.get('event', existing_media.event),
+                        "date": media_data.get('date', existing_media.date),
+                        "author_id": user_ids.get(media_data.get('author'))
+                    }
+                return {
+                    "id": media_data.get('id', generate_id()),
+                    "title": media_data.get('title', ''),
+                    "description": media_data.get('description', ''),
+                    "media_type": media_data.get('media_type', 'Image'),
+                    "url": media_data.get('url', None),
+                    "file_path": media_data.get('file_path', None),
+                    "event": media_data.get('event', None),
+                    "date": media_data.get('date', datetime.now().isoformat()),
+                    "author_id": user_ids.get(media_data.get('author'))
+                }
             
+            # Apply only the differences as bulk statements in one transaction
+            bulk_save(db, MediaItem, media_items, build_row)
             db.commit()
         
         # For backward compatibility, also save to JSON
@@ -578,48 +548,36 @@ def save_sponsors(sponsors):
     try:
         # Process sponsors
         if sponsors:
-            # Get existing sponsor IDs
-            existing_ids = [sponsor.id for sponsor in db.query(Sponsor).all()]
-            new_ids = [sponsor['id'] for sponsor in sponsors if 'id' in sponsor]
-            
-            # Delete sponsors not in the new list
-            for sponsor_id in existing_ids:
-                if sponsor_id not in new_ids:
-                    db.query(Sponsor).filter(Sponsor.id == sponsor_id).delete()
-            
-            # Update or insert sponsors
-            for sponsor_data in sponsors:
-                # Check if sponsor exists
-                sponsor_id = sponsor_data.get('id')
-                existing_sponsor = db.query(Sponsor).filter(Sponsor.id == sponsor_id).first() if sponsor_id else None
-                
+            def build_row(sponsor_data, existing_sponsor):
+                # Existing values are kept for fields missing from sponsor_data
                 if existing_sponsor:
-                    # Update existing sponsor
-                    existing_sponsor.name = sponsor_data.get('name', existing_sponsor.name)
-                    existing_sponsor.contact_name = sponsor_data.get('contact_name', existing_sponsor.contact_name)
-                    existing_sponsor.contact_email = sponsor_data.get('contact_email', existing_sponsor.contact_email)
-                    existing_sponsor.contact_phone = sponsor_data.get('contact_phone', existing_sponsor.contact_phone)
-                    existing_sponsor.sponsorship_level = sponsor_data.get('sponsorship_level', existing_sponsor.sponsorship_level)
-                    existing_sponsor.amount = sponsor_data.get('amount', existing_sponsor.amount)
-                    existing_sponsor.date_added = sponsor_data.get('date_added', existing_sponsor.date_added)
-                    existing_sponsor.notes = sponsor_data.get('notes', existing_sponsor.notes)
-                    existing_sponsor.logo_path = sponsor_data.get('logo_path', existing_sponsor.logo_path)
-                else:
-                    # Create new sponsor
-                    new_sponsor = Sponsor(
-                        id=sponsor_data.get('id', generate_id()),
-                        name=sponsor_data.get('name', ''),
-                        contact_name=sponsor_data.get('contact_name', None),
-                        contact_email=sponsor_data.get('contact_email', None),
-                        contact_phone=sponsor_data.get('contact_phone', None),
-                        sponsorship_level=sponsor_data.get('sponsorship_level', 'Bronze'),
-                        amount=sponsor_data.get('amount', None),
-                        date_added=sponsor_data.get('date_added', datetime.now().isoformat()),
-                        notes=sponsor_data.get('notes', None),
-                        logo_path=sponsor_data.get('logo_path', None)
-                    )
-                    db.add(new_sponsor)
+                    return {
+                        "id": existing_sponsor.id,
+                        "name": sponsor_data.get('name', existing_sponsor.name),
+                        "contact_name": sponsor_data.get('contact_name', existing_sponsor.contact_name),
+                        "contact_email": sponsor_data.get('contact_email', existing_sponsor.contact_email),
+                        "contact_phone": sponsor_data.get('contact_phone', existing_sponsor.contact_phone),
+                        "sponsorship_level": sponsor_data.get('sponsorship_level', existing_sponsor.sponsorship_level),
+                        "amount": sponsor_data.get('amount', existing_sponsor.amount),
+                        "date_added": sponsor_data.get('date_added', existing_sponsor.date_added),
+                        "notes": sponsor_data.get('notes', existing_sponsor.notes),
+                        "logo_path": sponsor_data.get('logo_path', existing_sponsor.logo_path)
+                    }
+                return {
+                    "id": sponsor_data.get('id', generate_id()),
+                    "name": sponsor_data.get('name', ''),
+                    "contact_name": sponsor_data.get('contact_name', None),
+                    "contact_email": sponsor_data.get('contact_email', None),
+                    "contact_phone": sponsor_data.get('contact_phone', None),
+                    "sponsorship_level": sponsor_data.get('sponsorship_level', 'Bronze'),
+                    "amount": sponsor_data.get('amount', None),
+                    "date_added": sponsor_data.get('date_added', datetime.now().isoformat()),
+                    "notes": sponsor_data.get('notes', None),
+                    "logo_path": sponsor_data.get('logo_path', None)
+                }
             
+            # Apply only the differences as bulk statements in one transaction
+            bulk_save(db, Sponsor, sponsors, build_row)
             db.commit()
         
         # For backward compatibility, also save to JSON
@@ -646,13 +604,12 @@ def load_events():
         events = []
         db_events = db.query(Event).order_by(desc(Event.created_at)).all()
         
+        # Resolve every creator name with one batched query instead of one per row
+        user_names = get_user_names_by_id(db, [event.creator_id for event in db_events])
+        
         for event in db_events:
             # Get creator name if available
-            creator_name = None
-            if event.creator_id:
-                user = db.query(User).filter(User.id == event.creator_id).first()
-                if user:
-                    creator_name = user.name
+            creator_name = user_names.get(event.creator_id)
             
             events.append({
                 "id": event.id,
@@ -694,51 +651,35 @@ def save_events(events):
     try:
         # Process events
         if events:
-            # Get existing event IDs
-            existing_ids = [event.id for event in db.query(Event).all()]
-            new_ids = [event['id'] for event in events if 'id' in event]
+            # Resolve every creator name with one batched query
+            user_ids = get_user_ids_by_name(db, [event_data.get('creator') for event_data in events])
             
-            # Delete events not in the new list
-            for event_id in existing_ids:
-                if event_id not in new_ids:
-                    db.query(Event).filter(Event.id == event_id).delete()
-            
-            # Update or insert events
-            for event_data in events:
-                # Find user ID for creator if present
-                creator_id = None
-                if 'creator' in event_data and event_data['creator']:
-                    user = db.query(User).filter(User.name == event_data['creator']).first()
-                    if user:
-                        creator_id = user.id
-                
-                # Check if event exists
-                event_id = event_data.get('id')
-                existing_event = db.query(Event).filter(Event.id == event_id).first() if event_id else None
-                
+            def build_row(event_data, existing_event):
+                # Existing values are kept for fields missing from event_data
                 if existing_event:
-                    # Update existing event
-                    existing_event.title = event_data.get('title', existing_event.title)
-                    existing_event.description = event_data.get('description', existing_event.description)
-                    existing_event.event_type = event_data.get('event_type', existing_event.event_type)
-                    existing_event.start_date = event_data.get('start_date', existing_event.start_date)
-                    existing_event.end_date = event_data.get('end_date', existing_event.end_date)
-                    existing_event.location = event_data.get('location', existing_event.location)
-                    existing_event.creator_id = creator_id
-                else:
-                    # Create new event
-                    new_event = Event(
-                        id=event_data.get('id', generate_id()),
-                        title=event_data.get('title', ''),
-                        description=event_data.get('description', ''),
-                        event_type=event_data.get('event_type', 'Meeting'),
-                        start_date=event_data.get('start_date', datetime.now().isoformat()),
-                        end_date=event_data.get('end_date', None),
-                        location=event_data.get('location', None),
-                        creator_id=creator_id
-                    )
-                    db.add(new_event)
+                    return {
+                        "id": existing_event.id,
+                        "title": event_data.get('title', existing_event.title),
+                        "description": event_data.get('description', existing_event.description),
+                        "event_type": event_data.get('event_type', existing_event.event_type),
+                        "start_date": event_data.get('start_date', existing_event.start_date),
+                        "end_date": event_data.get('end_date', existing_event.end_date),
+                        "location": event_data.get('location', existing_event.location),
+                        "creator_id": user_ids.get(event_data.get('creator'))
+                    }
+                return {
+                    "id": event_data.get('id', generate_id()),
+                    "title": event_data.get('title', ''),
+                    "description": event_data.get('description', ''),
+                    "event_type": event_data.get('event_type', 'Meeting'),
+                    "start_date": event_data.get('start_date', datetime.now().isoformat()),
+                    "end_date": event_data.get('end_date', None),
+                    "location": event_data.get('location', None),
+                    "creator_id": user_ids.get(event_data.get('creator'))
+                }
             
+            # Apply only the differences as bulk statements in one transaction
+            bulk_save(db, Event, events, build_row)
             db.commit()
         
         # For backward compatibility, also save to JSON
@@ -829,13 +770,12 @@ def load_messages():
         messages = []
         db_messages = db.query(Message).order_by(desc(Message.created_at)).all()
         
+        # Resolve every author name with one batched query instead of one per row
+        user_names = get_user_names_by_id(db, [message.author_id for message in db_messages])
+        
         for message in db_messages:
             # Get author name if available
-            author_name = None
-            if message.author_id:
-                user = db.query(User).filter(User.id == message.author_id).first()
-                if user:
-                    author_name = user.name
+            author_name = user_names.get(message.author_id)
             
             messages.append({
                 "id": message.id,
@@ -876,47 +816,31 @@ def save_messages(messages):
     try:
         # Process messages
         if messages:
-            # Get existing message IDs
-            existing_ids = [message.id for message in db.query(Message).all()]
-            new_ids = [message['id'] for message in messages if 'id' in message]
+            # Resolve every author name with one batched query
+            user_ids = get_user_ids_by_name(db, [message_data.get('author') for message_data in messages])
             
-            # Delete messages not in the new list
-            for message_id in existing_ids:
-                if message_id not in new_ids:
-                    db.query(Message).filter(Message.id == message_id).delete()
-            
-            # Update or insert messages
-            for message_data in messages:
-                # Find user ID for author if present
-                author_id = None
-                if 'author' in message_data and message_data['author']:
-                    user = db.query(User).filter(User.name == message_data['author']).first()
-                    if user:
-                        author_id = user.id
-                
-                # Check if message exists
-                message_id = message_data.get('id')
-                existing_message = db.query(Message).filter(Message.id == message_id).first() if message_id else None
-                
+            def build_row(message_data, existing_message):
+                # Existing values are kept for fields missing from message_data
                 if existing_message:
-                    # Update existing message
-                    existing_message.title = message_data.get('title', existing_message.title)
-                    existing_message.content = message_data.get('content', existing_message.content)
-                    existing_message.category = message_data.get('category', existing_message.category)
-                    existing_message.author_id = author_id
-                    existing_message.parent_id = message_data.get('parent_id', existing_message.parent_id)
-                else:
-                    # Create new message
-                    new_message = Message(
-                        id=message_data.get('id', generate_id()),
-                        title=message_data.get('title', ''),
-                        content=message_data.get('content', ''),
-                        category=message_data.get('category', 'General'),
-                        author_id=author_id,
-                        parent_id=message_data.get('parent_id', None)
-                    )
-                    db.add(new_message)
+                    return {
+                        "id": existing_message.id,
+                        "title": message_data.get('title', existing_message.title),
+                        "content": message_data.get('content', existing_message.content),
+                        "category": message_data.get('category', existing_message.category),
+                        "parent_id": message_data.get('parent_id', existing_message.parent_id),
+                        "author_id": user_ids.get(message_data.get('author'))
+                    }
+                return {
+                    "id": message_data.get('id', generate_id()),
+                    "title": message_data.get('title', ''),
+                    "content": message_data.get('content', ''),
+                    "category": message_data.get('category', 'General'),
+                    "parent_id": message_data.get('parent_id', None),
+                    "author_id": user_ids.get(message_data.get('author'))
+                }
             
+            # Apply only the differences as bulk statements in one transaction
+            bulk_save(db, Message, messages, build_row)
             db.commit()
         
         # For backward compatibility, also save to JSON
@@ -944,9 +868,9 @@ def format_date(iso_date):
     except:
         return iso_date
 
-# Generate a task ID
+# Generate a unique, time-sortable record ID (ULID)
 def generate_id():
-    return datetime.now().strftime("%Y%m%d%H%M%S")
+    return ids.new_id()
 
 # Load SVG file
 def load_svg(svg_path):